@@ -0,0 +1,27 @@
+# Data segment example: sum an array that is preloaded into DataMemory
+# instead of being built with addi/sw sequences at run time
+#   python3 tools/mips_assembler.py examples/data_segment.asm --data data_segment_data.hex
+
+.data
+count:  .word 5
+values: .word 3, 1, 4, 1, 5
+        .align 3
+result: .space 4
+
+.text
+main:
+    lw    $t0, count            # $t0 = 5 elements
+    la    $t1, values           # $t1 = address of values
+    addi  $s0, $zero, 0         # $s0 = running sum
+
+loop:
+    lw    $t2, 0($t1)           # @loop 4 (back edge taken 4 times)
+    addu  $s0, $s0, $t2
+    addiu $t1, $t1, 4
+    addi  $t0, $t0, -1
+    bnez  $t0, loop
+
+    sw    $s0, result           # result = 14
+
+end:
+    j end
@@ -9,12 +9,18 @@ module DataMemory(
 );
 
     reg [31:0] memory [1023:0]; // 1KB data memory
+    reg [1023:0] dmem_file;
     
-    // Initialize memory
+    // Initialize memory, then preload the assembler's .data image if given:
+    //   python3 tools/mips_assembler.py prog.asm --data prog_data.hex
+    //   vvp <sim> +dmem=prog_data.hex
     initial begin
         for (integer i = 0; i < 1024; i = i + 1) begin
             memory[i] = 32'h0;
         end
+        if ($value$plusargs("dmem=%s", dmem_file)) begin
+            $readmemh(dmem_file, memory);
+        end
     end
 
     // Write operation
@@ -5,6 +5,7 @@ module InstructionMemory(
 );
 
     reg [31:0] memory [1023:0]; // 1KB instruction memory
+    reg [1023:0] imem_file;
     
     // Initialize with comprehensive test program
     initial begin
@@ -38,6 +39,15 @@ module InstructionMemory(
         for (integer i = 24; i < 1024; i = i + 1) begin
             memory[i] = 32'h00000000;
         end
+
+        // Replace the built-in program with an image if given:
+        //   vvp <sim> +imem=prog.hex
+        if ($value$plusargs("imem=%s", imem_file)) begin
+            for (integer i = 0; i < 1024; i = i + 1) begin
+                memory[i] = 32'h00000000;
+            end
+            $readmemh(imem_file, memory);
+        end
     end
 
     assign instruction = memory[address[11:2]]; // Word-aligned access
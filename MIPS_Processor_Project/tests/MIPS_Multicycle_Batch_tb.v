@@ -0,0 +1,63 @@
+// Batch testbench for MIPS Multi-cycle Processor
+// Runs any program image for a fixed number of cycles and dumps the final
+// architectural state. Compiled once and reused for every program by
+// tools/batch_runner.py:
+//   vvp mips_batch +imem=prog.hex [+dmem=prog_data.hex] +cycles=N +dump=state.txt
+`include "definitions.vh"
+
+module MIPS_Multicycle_Batch_tb();
+
+    reg clk;
+    reg rst;
+
+    reg [1023:0] dump_file;
+    integer cycles = 0;
+    integer cycle = 0;
+    integer fd;
+
+    // Clock generation
+    initial begin
+        clk = 0;
+        forever #5 clk = ~clk; // 100MHz clock
+    end
+
+    // DUT instantiation (+imem / +dmem are loaded by the memories)
+    MIPS_Multicycle cpu(
+        .clk(clk),
+        .rst(rst)
+    );
+
+    initial begin
+        rst = 1;
+        if (!$value$plusargs("dump=%s", dump_file)) begin
+            $display("Usage: +dump=<file> [+imem=<file>] [+dmem=<file>] [+cycles=N]");
+            $finish;
+        end
+        if (!$value$plusargs("cycles=%d", cycles)) cycles = 200;
+        #22 rst = 0;
+    end
+
+    // Count clock edges out of reset, then dump once the last edge has settled
+    always @(posedge clk) begin
+        if (!rst) begin
+            cycle = cycle + 1;
+            if (cycle >= cycles) begin
+                #1;
+                fd = $fopen(dump_file, "w");
+                $fdisplay(fd, "cycles %0d", cycle);
+                $fdisplay(fd, "pc %h", cpu.pc_reg);
+                for (integer i = 0; i < 32; i = i + 1) begin
+                    $fdisplay(fd, "r%0d %h", i, cpu.regfile.registers[i]);
+                end
+                for (integer i = 0; i < 1024; i = i + 1) begin
+                    if (cpu.dmem.memory[i] !== 32'h0)
+                        $fdisplay(fd, "m%0d %h", i, cpu.dmem.memory[i]);
+                end
+                $fclose(fd);
+                $display("DONE: %0d cycles", cycle);
+                $finish;
+            end
+        end
+    end
+
+endmodule
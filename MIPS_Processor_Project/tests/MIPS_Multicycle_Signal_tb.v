@@ -0,0 +1,69 @@
+// Control-signal testbench for MIPS Multi-cycle Processor
+// Compares state, control signals and PC every clock against expectations
+// exported by tools/datapath_model.py:
+//   python3 tools/datapath_model.py prog.asm --cycles 500 --imem prog.hex --export expected.hex
+//   vvp mips_signal +imem=prog.hex +expected=expected.hex +cycles=500
+`include "definitions.vh"
+
+module MIPS_Multicycle_Signal_tb();
+
+    reg clk;
+    reg rst;
+
+    reg [63:0] expected [0:65535];
+    reg [1023:0] expected_file;
+    integer cycles = 0;
+    integer cycle = 0;
+    integer errors = 0;
+
+    wire [22:0] control = {cpu.current_state, cpu.alu_ctrl, cpu.alu_src_a, cpu.alu_src_b,
+                           cpu.mem_read, cpu.mem_write, cpu.reg_write, cpu.reg_dst,
+                           cpu.mem_to_reg, cpu.pc_src, cpu.pc_write, cpu.pc_write_cond,
+                           cpu.ir_write, cpu.ext_op};
+
+    // Clock generation
+    initial begin
+        clk = 0;
+        forever #5 clk = ~clk; // 100MHz clock
+    end
+
+    // DUT instantiation
+    MIPS_Multicycle cpu(
+        .clk(clk),
+        .rst(rst)
+    );
+
+    initial begin
+        rst = 1;
+        if (!$value$plusargs("expected=%s", expected_file)) begin
+            $display("Usage: +expected=<file> [+imem=<file>] [+cycles=N]");
+            $finish;
+        end
+        if (!$value$plusargs("cycles=%d", cycles)) cycles = 200;
+
+        // +imem is loaded by InstructionMemory itself
+        $readmemh(expected_file, expected);
+        #22 rst = 0;
+    end
+
+    // Sample pre-edge values: all datapath registers update with non-blocking assignments
+    always @(posedge clk) begin
+        if (!rst) begin
+            if ({control, cpu.pc_reg} !== expected[cycle][54:0]) begin
+                errors = errors + 1;
+                if (errors <= 10)
+                    $display("Cycle %0d: got state/control %h pc %h, expected %h pc %h",
+                             cycle, control, cpu.pc_reg, expected[cycle][54:32], expected[cycle][31:0]);
+            end
+            cycle = cycle + 1;
+            if (cycle == cycles) begin
+                if (errors == 0)
+                    $display("PASS: %0d cycles match the datapath model", cycles);
+                else
+                    $display("FAIL: %0d of %0d cycles differ from the datapath model", errors, cycles);
+                $finish;
+            end
+        end
+    end
+
+endmodule
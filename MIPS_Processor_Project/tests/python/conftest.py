@@ -0,0 +1,24 @@
+"""Shared setup for the tool tests: tools/ is a flat directory of scripts"""
+
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TOOLS_DIR = os.path.join(PROJECT_ROOT, 'tools')
+if TOOLS_DIR not in sys.path:
+    sys.path.insert(0, TOOLS_DIR)
+
+
+@pytest.fixture
+def project_root():
+    return PROJECT_ROOT
+
+
+def write_program(directory, name, text):
+    """Write an .asm file and return its path"""
+    path = os.path.join(str(directory), name)
+    with open(path, 'w') as f:
+        f.write(text)
+    return path
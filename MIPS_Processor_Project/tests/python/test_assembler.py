@@ -0,0 +1,143 @@
+"""Pseudo-instruction expansion and the peephole optimizer (mips_assembler.py)"""
+
+import random
+
+import pytest
+
+from advanced_mips_verifier import MIPSProcessor
+from mips_assembler import MIPSAssembler
+
+
+def ops(source, optimize=False):
+    assembler = MIPSAssembler(optimize=optimize)
+    assembler.assemble(source)
+    return [stmt['parts'][0] for stmt in assembler.instructions]
+
+
+def final_state(words, steps=2000):
+    processor = MIPSProcessor()
+    processor.load_program(words)
+    processor.run(steps)
+    return processor.registers, processor.memory
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('5', ['addiu']),
+    ('-32768', ['addiu']),
+    ('0xFFFF', ['ori']),
+    ('0x10000', ['lui']),
+    ('0x12345678', ['lui', 'ori']),
+])
+def test_li_uses_cheapest_sequence(value, expected):
+    assert ops(f"li $t0, {value}") == expected
+
+
+def test_li_values():
+    for value in [0, 1, -1, 0x7FFF, 0x8000, 0xFFFF, 0x10000, 0x12345678, 0xFFFF0000]:
+        assembler = MIPSAssembler()
+        registers, _ = final_state(assembler.assemble(f"li $t0, {value}"))
+        assert registers[8] == value & 0xFFFFFFFF
+
+
+def test_only_slt_branches_use_at():
+    for source in ["bnez $t0, done\ndone: nop", "bne $t0, $t1, done\ndone: nop"]:
+        assembler = MIPSAssembler()
+        assembler.assemble(source)
+        assert all('$at' not in stmt['parts'] for stmt in assembler.instructions)
+    for op in ['blt', 'bge', 'bgt', 'ble']:
+        assembler = MIPSAssembler()
+        assembler.assemble(f"{op} $t0, $t1, done\ndone: nop")
+        assert assembler.instructions[0]['parts'][:2] == ['slt', '$at']
+
+
+@pytest.mark.parametrize('op, a, b, taken', [
+    ('blt', 1, 2, True), ('blt', 2, 2, False), ('bge', 2, 2, True), ('bge', 1, 2, False),
+    ('bgt', 3, 2, True), ('bgt', 2, 2, False), ('ble', 2, 2, True), ('ble', 3, 2, False),
+    ('bne', 1, 2, True), ('bne', 2, 2, False),
+])
+def test_compare_branches(op, a, b, taken):
+    source = f"""
+        li $t0, {a}
+        li $t1, {b}
+        {op} $t0, $t1, target
+        li $v0, 1
+        j end
+target: li $v0, 2
+end:    nop
+    """
+    registers, _ = final_state(MIPSAssembler().assemble(source))
+    assert registers[2] == (2 if taken else 1)
+
+
+def test_peephole_removes_redundant_instructions():
+    source = """
+        addiu $t0, $zero, 4
+        nop
+        addu $t1, $t1, $zero
+        sw $t0, 0($t0)
+        lw $t0, 0($t0)
+        addiu $t2, $t0, 1
+        addiu $t2, $t0, 1
+    """
+    assert ops(source, optimize=True) == ['addiu', 'sw', 'addiu']
+
+
+def test_peephole_cascades_through_removed_instructions():
+    # Dropping the nop makes the jump land on its own fall-through
+    source = """
+        addiu $t0, $zero, 1
+        j next
+        nop
+next:   addiu $t1, $zero, 2
+    """
+    assert ops(source, optimize=True) == ['addiu', 'addiu']
+
+
+def test_peephole_keeps_repeats_across_labels():
+    source = """
+        addiu $t0, $zero, 1
+loop:   addiu $t0, $zero, 1
+    """
+    assert ops(source, optimize=True) == ['addiu', 'addiu']
+
+
+def test_peephole_skips_numeric_targets():
+    assembler = MIPSAssembler(optimize=True)
+    assembler.assemble("nop\nbeq $zero, $zero, 0\nnop")
+    assert len(assembler.instructions) == 3
+    assert 'peephole_skipped' in assembler.stats
+
+
+def random_program(rng, length):
+    """Straight-line code with forward branches and labels that split peephole windows"""
+    registers = ['$zero', '$t0', '$t1', '$t2', '$t3']
+    lines = []
+    for i in range(length):
+        if rng.random() < 0.2:
+            lines.append(f"L{i}:")
+        r = lambda: rng.choice(registers)
+        lines.append(rng.choice([
+            f"addiu {r()}, {r()}, {rng.choice([0, 1, 4])}",
+            f"addu {r()}, {r()}, {r()}",
+            f"subu {r()}, {r()}, $zero",
+            f"ori {r()}, {r()}, 0",
+            "nop",
+            f"sw {r()}, 0x40($zero)",
+            f"lw {r()}, 0x40($zero)",
+            f"beq {r()}, {r()}, end",
+        ]))
+    lines.append("end: nop")
+    return '\n'.join(lines)
+
+
+def test_peephole_preserves_final_state():
+    rng = random.Random(26)
+    removed = 0
+    for _ in range(200):
+        source = random_program(rng, 20)
+        plain = final_state(MIPSAssembler().assemble(source))
+        assembler = MIPSAssembler(optimize=True)
+        optimized = final_state(assembler.assemble(source))
+        assert plain == optimized, source
+        removed += assembler.stats['removed']
+    assert removed > 0
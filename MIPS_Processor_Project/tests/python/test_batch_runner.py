@@ -0,0 +1,98 @@
+"""Batch regression flow with the Python stub simulator (batch_runner.py, stub_simulator.py)"""
+
+import os
+import re
+import subprocess
+import sys
+
+from batch_runner import compare_states, expected_state, format_dump, parse_dump
+from conftest import TOOLS_DIR, write_program
+from mips_assembler import MIPSAssembler
+
+GOOD = """
+        addiu $t0, $zero, 0x40
+        addiu $t1, $zero, 3
+loop:   sw $t1, 0($t0)
+        addiu $t0, $t0, 4
+        addiu $t1, $t1, -1
+        beq $t1, $zero, done
+        j loop
+done:   lw $t2, 0x44($zero)
+"""
+STUB = f"{sys.executable} {os.path.join(TOOLS_DIR, 'stub_simulator.py')}"
+
+
+def batch(programs, simulator):
+    process = subprocess.run([sys.executable, os.path.join(TOOLS_DIR, 'batch_runner.py'), '-j', '2',
+                              '--simulator', simulator] + programs, capture_output=True, text=True)
+    statuses = {}
+    for line in process.stdout.splitlines():
+        match = re.match(r'\s+(PASS|FAIL|ERROR)\s+(\S+)', line)
+        if match:
+            statuses[os.path.basename(match.group(2))] = match.group(1)
+    return process, statuses
+
+
+def test_dump_round_trip():
+    registers = list(range(32))
+    text = format_dump(12, 0x20, registers, {3: 7, 5: 0})
+    state = parse_dump(text)
+    assert state == {'cycles': 12, 'pc': 0x20, 'registers': registers, 'memory': {3: 7}}
+    assert parse_dump("pc xxxxxxxx\nr1 0000zz00\n")['registers'][1] is None
+
+
+def test_expected_state_aliases_like_data_memory():
+    assembler = MIPSAssembler()
+    words = assembler.assemble("""
+        addiu $t0, $zero, 5
+        addiu $t1, $zero, 7
+        sw $t0, 0x1004($zero)
+        sw $t1, 6($zero)
+        lw $t2, 0x404($zero)
+        lw $t3, 0x1005($zero)
+    """)
+    expected = expected_state(words, assembler.data, 100)
+    assert expected['memory'] == {1: 7}
+    assert expected['registers'][10] == 0 and expected['registers'][11] == 7
+    assert expected['cycles'] == 3 + 3 + 4 + 4 + 5 + 5
+    assert expected['halted']
+
+
+def test_compare_states_reports_mismatches():
+    expected = expected_state(MIPSAssembler().assemble("addiu $t0, $zero, 1"), {}, 10)
+    actual = dict(expected, registers=list(expected['registers']), memory={2: 9})
+    actual['registers'][8] = None
+    assert compare_states(expected, expected) == []
+    assert compare_states(expected, actual) == ["$8: expected 00000001, got x",
+                                                "mem[0x8]: expected 00000000, got 00000009"]
+
+
+def test_classification(tmp_path):
+    programs = [write_program(tmp_path, 'good.asm', GOOD),
+                write_program(tmp_path, 'data.asm', ".data\nvalues: .word 3, 4\n.text\n"
+                                                     "lw $t0, values\nsw $t0, 0x1006($zero)\n"),
+                write_program(tmp_path, 'broken.asm', "addiu $t0, $zero\nbogus $t1\n"),
+                write_program(tmp_path, 'empty.asm', "# nothing to run\n")]
+    process, statuses = batch(programs, STUB)
+    assert statuses == {'good.asm': 'PASS', 'data.asm': 'PASS', 'broken.asm': 'ERROR', 'empty.asm': 'ERROR'}
+    assert "4 programs: 2 passed, 0 failed, 2 errors" in process.stdout
+    assert process.returncode == 1
+
+    process, statuses = batch(programs[:1], STUB)
+    assert statuses == {'good.asm': 'PASS'}
+    assert process.returncode == 0
+
+
+def test_mismatching_simulator_fails(tmp_path):
+    # The datapath model writes back the stale ALU output for ADDIU, like the RTL
+    program = write_program(tmp_path, 'good.asm', GOOD)
+    process, statuses = batch([program], STUB + ' --model datapath')
+    assert statuses == {'good.asm': 'FAIL'}
+    assert process.returncode == 1
+
+
+def test_simulator_without_dump_is_an_error(tmp_path):
+    program = write_program(tmp_path, 'good.asm', GOOD)
+    process, statuses = batch([program], f"{sys.executable} -c pass")
+    assert statuses == {'good.asm': 'ERROR'}
+    assert 'no state dump' in process.stdout
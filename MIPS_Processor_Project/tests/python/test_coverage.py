@@ -0,0 +1,107 @@
+"""Coverage databases: collection, merging and corrupt files (mips_coverage.py)"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from advanced_mips_verifier import MIPSProcessor
+from conftest import TOOLS_DIR, write_program
+from mips_assembler import MIPSAssembler
+from mips_coverage import (DECODE, EXECUTE, FETCH, MEMORY, WRITEBACK, CoverageCollector, CoverageDB,
+                           format_report, merge_databases)
+
+BRANCH = """
+        addiu $t0, $zero, {value}
+        beq $t0, $zero, skip
+        sw $t0, 0x20($zero)
+skip:   lw $t1, 0x1004($zero)
+"""
+
+
+def collect(source, db=None):
+    assembler = MIPSAssembler()
+    processor = MIPSProcessor()
+    processor.load_program(assembler.assemble(source))
+    collector = CoverageCollector(db)
+    collector.run(processor)
+    return collector.db
+
+
+def test_collection_counts():
+    db = collect(BRANCH.format(value=1))
+    assert list(db.totals) == [1, 4]
+    assert list(db.beq_taken) == [0, 1]
+    assert db.beq_sites[1] == 1 and db.beq_directions[1] == 2
+    assert db.stores[0x20 >> 2] == 1
+    assert db.loads[(0x1004 >> 2) & 0x3FF] == 1
+    assert list(db.out_of_range) == [1, 0]
+    assert db.transitions[FETCH * 5 + DECODE] == 4
+    assert db.transitions[EXECUTE * 5 + MEMORY] == 2
+    assert db.transitions[MEMORY * 5 + WRITEBACK] == 1
+
+
+def test_round_trip():
+    db = collect(BRANCH.format(value=0))
+    copy = CoverageDB.from_bytes(db.to_bytes())
+    assert copy.to_bytes() == db.to_bytes()
+    assert len(db.to_bytes()) == CoverageDB.encoded_size()
+
+
+def test_merge_matches_serial_collection():
+    taken, not_taken = BRANCH.format(value=0), BRANCH.format(value=1)
+    serial = collect(not_taken, collect(taken))
+    merged = merge_databases([collect(taken).to_bytes(), collect(not_taken).to_bytes()])
+    assert merged.to_bytes() == serial.to_bytes()
+    assert merged.beq_directions[1] == 3
+    assert list(merged.totals) == [2, 7]
+    reversed_order = merge_databases([collect(not_taken).to_bytes(), collect(taken).to_bytes()])
+    assert reversed_order.to_bytes() == merged.to_bytes()
+    assert "1/1 sites took both directions" in format_report(merged)
+
+
+def test_unreachable_beq_reports_both_directions():
+    db = collect("""
+        addiu $t0, $zero, 1
+        beq $t0, $zero, skip
+        j done
+        beq $t0, $t1, done
+skip:   addiu $t1, $zero, 2
+done:   sw $t0, 0x20($zero)
+""")
+    assert db.beq_sites[3] == 1 and db.beq_directions[3] == 0
+    report = format_report(db)
+    assert "0/2 sites took both directions" in report
+    assert "!! 0x0004 never taken" in report
+    assert "!! 0x000C never taken" in report
+    assert "!! 0x000C never not taken" in report
+
+
+@pytest.mark.parametrize('data', [b'', b'MIPSCOV1', b'NOTCOVDB' + bytes(100)])
+def test_corrupt_database_raises_value_error(data):
+    with pytest.raises(ValueError, match='broken.db'):
+        CoverageDB.from_bytes(data, 'broken.db')
+
+
+def test_truncated_file(tmp_path):
+    path = tmp_path / 'cov.db'
+    collect(BRANCH.format(value=0)).save(str(path))
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(ValueError, match='truncated'):
+        CoverageDB.load(str(path))
+    process = subprocess.run([sys.executable, os.path.join(TOOLS_DIR, 'mips_coverage.py'), 'report', str(path)],
+                             capture_output=True, text=True)
+    assert process.returncode == 1
+    assert process.stdout.startswith(f"Error: {path}")
+
+
+def test_parallel_run_matches_serial(tmp_path):
+    programs = [write_program(tmp_path, f'p{value}.asm', BRANCH.format(value=value)) for value in range(3)]
+    outputs = []
+    for jobs in ['1', '3']:
+        output = str(tmp_path / f'j{jobs}.db')
+        subprocess.run([sys.executable, os.path.join(TOOLS_DIR, 'mips_coverage.py'), 'run', '-j', jobs,
+                        '-o', output] + programs, check=True, capture_output=True)
+        outputs.append(CoverageDB.load(output).to_bytes())
+    assert outputs[0] == outputs[1]
@@ -0,0 +1,117 @@
+"""Static best/worst-case cycle bounds (cycle_estimator.py)"""
+
+from advanced_mips_verifier import MIPSProcessor
+from cycle_estimator import CycleEstimator
+from mips_assembler import MIPSAssembler, instruction_cycles
+
+
+def estimate(source):
+    assembler = MIPSAssembler()
+    words = assembler.assemble(source)
+    return CycleEstimator(assembler).analyze(), words
+
+
+def dynamic_cycles(words, max_steps=10000):
+    processor = MIPSProcessor()
+    processor.load_program(words)
+    cycles = 0
+    for _ in range(max_steps):
+        executed = processor.step()
+        if executed is None:
+            return cycles
+        cycles += instruction_cycles(executed[2].lower())
+    raise AssertionError("program did not halt")
+
+
+def test_straight_line_is_exact():
+    result, words = estimate("""
+        addiu $t0, $zero, 4
+        sw $t0, 0($zero)
+        lw $t1, 0($zero)
+        addu $t2, $t0, $t1
+    """)
+    assert result['best'] == result['worst'] == 3 + 4 + 5 + 3 == dynamic_cycles(words)
+    assert result['warnings'] == []
+
+
+def test_branch_bounds_cover_both_paths():
+    source = """
+        addiu $t0, $zero, {value}
+        beq $t0, $zero, skip
+        lw $t1, 0($zero)
+        lw $t1, 0($zero)
+skip:   addiu $t2, $zero, 1
+    """
+    result, taken = estimate(source.format(value=0))
+    _, not_taken = estimate(source.format(value=1))
+    assert result['best'] == dynamic_cycles(taken)
+    assert result['worst'] == dynamic_cycles(not_taken)
+
+
+def test_bounded_loop():
+    result, words = estimate("""
+        addiu $t0, $zero, 5
+loop:   addiu $t0, $t0, -1
+        beq $t0, $zero, done
+        j loop              # @loop 4
+done:   addiu $t1, $zero, 1
+    """)
+    assert result['warnings'] == []
+    assert result['best'] <= dynamic_cycles(words) <= result['worst']
+
+
+def test_nested_loops_multiply_bounds():
+    result, words = estimate("""
+        addiu $t0, $zero, 3
+outer:  addiu $t1, $zero, 3
+inner:  addiu $t1, $t1, -1
+        beq $t1, $zero, next
+        j inner             # @loop 2
+next:   addiu $t0, $t0, -1
+        beq $t0, $zero, done
+        j outer             # @loop 2
+done:   nop
+    """)
+    assert result['warnings'] == []
+    assert result['best'] <= dynamic_cycles(words) <= result['worst']
+
+
+def test_unbounded_loop_is_reported():
+    result, _ = estimate("""
+loop:   addiu $t0, $t0, 1
+        beq $t0, $zero, done
+        j loop
+done:   nop
+    """)
+    assert result['worst'] is None
+    assert any('@loop' in warning for warning in result['warnings'])
+
+
+def test_call_includes_callee():
+    result, words = estimate("""
+        jal func
+        jal func
+        j end
+func:   lw $t0, 0($zero)
+        jr $ra
+end:    nop
+    """)
+    assert result['warnings'] == []
+    assert result['best'] == result['worst'] == dynamic_cycles(words)
+
+
+def test_recursion_is_unbounded():
+    result, _ = estimate("""
+func:   jal func
+        jr $ra
+    """)
+    assert result['worst'] is None
+    assert any('recursive' in warning for warning in result['warnings'])
+
+
+def test_listing_annotates_blocks():
+    assembler = MIPSAssembler()
+    assembler.assemble("addiu $t0, $zero, 1\nbeq $t0, $zero, end\nnop\nend: nop")
+    listing = CycleEstimator(assembler).format_listing()
+    assert listing.startswith('; B0')
+    assert listing.splitlines()[-1].startswith('; cycles: best')
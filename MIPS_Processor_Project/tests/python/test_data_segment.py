@@ -0,0 +1,76 @@
+"""Data segment directives and DataMemory images (mips_assembler.py, datapath_model.py)"""
+
+import pytest
+
+from advanced_mips_verifier import MIPSProcessor
+from datapath_model import export_data_image
+from mips_assembler import MIPSAssembler, format_data_image
+
+SOURCE = """
+        .data 0x100
+table:  .word 1, 2, 0x30
+        .space 2
+        .align 3
+buf:    .word table+4, end
+        .text
+        la $t0, table
+        lw $t1, 4($t0)
+        lw $t2, buf
+        sw $t1, buf+4
+end:    nop
+"""
+
+
+def test_layout_and_labels():
+    assembler = MIPSAssembler()
+    assembler.assemble(SOURCE)
+    assert assembler.data_labels == {'table': 0x100, 'buf': 0x110}
+    assert assembler.data == {0x100: 1, 0x104: 2, 0x108: 0x30, 0x110: 0x104, 0x114: 4 * 4}
+
+
+def test_program_reads_preloaded_data():
+    assembler = MIPSAssembler()
+    processor = MIPSProcessor()
+    processor.load_program(assembler.assemble(SOURCE))
+    processor.load_memory(assembler.data)
+    processor.run(100)
+    assert processor.registers[9] == 2
+    assert processor.registers[10] == 0x104
+    assert processor.memory[0x114] == 2
+
+
+def test_data_image(tmp_path):
+    assembler = MIPSAssembler()
+    assembler.assemble(SOURCE)
+    assert format_data_image(assembler.data).splitlines() == [
+        "// Data image: 5 words", "@40", "00000001", "00000002", "00000030", "@44", "00000104", "00000010"]
+    path = tmp_path / 'data.hex'
+    export_data_image(assembler.data, str(path))
+    assert "00000104" in path.read_text()
+
+
+@pytest.mark.parametrize('source, message', [
+    (".data\n.word undefined", "Line 2: "),
+    (".data foo", "Line 1: invalid .data argument: foo"),
+    (".data\n.space", "Line 2: .space takes one argument"),
+    (".data\n.align x", "Line 2: invalid .align argument: x"),
+    (".word 1", "Line 1: .word is only allowed in .data"),
+    (".data\naddu $t0, $t0, $t0", "Line 2: instruction in .data section"),
+    (".data\n.space 4100", "Line 2: data exceeds"),
+    (".data\na: .word 1\na: .word 2", "Line 3: duplicate label a"),
+    (".bss", "Line 1: unknown directive .bss"),
+])
+def test_directive_errors_name_the_line(source, message):
+    with pytest.raises(ValueError, match=message):
+        MIPSAssembler().assemble(source)
+
+
+@pytest.mark.parametrize('offset, ok', [(0x7FFF, True), (-0x8000, True), (0x8000, False), (0xFFFF, False)])
+def test_load_store_offsets_are_signed(offset, ok):
+    source = f"lw $t0, {offset}($zero)"
+    if ok:
+        word = MIPSAssembler().assemble(source)[0]
+        assert word & 0xFFFF == offset & 0xFFFF
+    else:
+        with pytest.raises(ValueError, match='does not fit in 16 signed bits'):
+            MIPSAssembler().assemble(source)
@@ -0,0 +1,55 @@
+"""Cycle-level datapath model and its exported control vectors (datapath_model.py)"""
+
+import pytest
+
+from datapath_model import (INSTRUCTION_CLASSES, STATE_FETCH, STATE_NAMES, MulticycleDatapath,
+                            export_expectations, next_state)
+from mips_assembler import MIPSAssembler, instruction_cycles
+
+
+def fsm_cycles(cls):
+    state, cycles = next_state(STATE_FETCH, cls), 1
+    while state != STATE_FETCH:
+        state, cycles = next_state(state, cls), cycles + 1
+    return cycles
+
+
+@pytest.mark.parametrize('cls', INSTRUCTION_CLASSES)
+def test_fsm_matches_assembler_cycle_costs(cls):
+    if cls != 'OTHER':
+        assert fsm_cycles(cls) == instruction_cycles(cls.lower())
+
+
+def test_memory_and_jumps_match_the_isa():
+    words = MIPSAssembler().assemble("""
+        lw $t0, 0x10($zero)
+        sw $t0, 0x1004($zero)
+        j next
+        lw $t2, 0x10($zero)
+next:   lw $t1, 4($zero)
+end:    beq $zero, $zero, end
+    """)
+    model = MulticycleDatapath(words, {0x10: 0xCAFE})
+    assert model.run_instructions(4) == 5 + 4 + 3 + 5
+    assert model.registers[8] == model.registers[9] == 0xCAFE
+    assert model.registers[10] == 0
+    assert model.dmem[1] == 0xCAFE
+    assert model.pc == 20
+
+
+def test_immediate_writes_use_the_stale_alu_output():
+    # ALUOut is overwritten in the write-back cycle, as in MIPS_Multicycle.v
+    model = MulticycleDatapath(MIPSAssembler().assemble("addiu $t0, $zero, 7"))
+    model.run_instructions(1)
+    assert model.registers[8] != 7
+
+
+def test_exported_vectors(tmp_path):
+    model = MulticycleDatapath(MIPSAssembler().assemble("lw $t0, 0($zero)"))
+    vectors = model.run(5)
+    assert [STATE_NAMES[v >> 52] for v in vectors] == ['FETCH', 'DECODE', 'EXECUTE', 'MEMORY', 'WRITEBACK']
+    assert model.describe(vectors[0]).startswith('pc=00000000 FETCH')
+    path = tmp_path / 'expected.hex'
+    export_expectations(vectors, str(path))
+    lines = path.read_text().splitlines()
+    assert len(lines) == 6 and int(lines[1], 16) == vectors[0]
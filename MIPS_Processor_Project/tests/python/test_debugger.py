@@ -0,0 +1,127 @@
+"""Undo log, snapshots, breakpoints and watchpoints (mips_debugger.py)"""
+
+from advanced_mips_verifier import MIPSProcessor
+from mips_assembler import MIPSAssembler
+from mips_debugger import MIPSDebugger
+
+PROGRAM = """
+        addiu $t0, $zero, 0x40
+        addiu $t1, $zero, 0
+        addiu $t2, $zero, 6
+loop:   sw $t1, 0($t0)
+        sw $t1, 4($t0)
+        lw $t3, 0($t0)
+        addu $t1, $t1, $t3
+        addiu $t1, $t1, 1
+        addiu $t2, $t2, -1
+        beq $t2, $zero, done
+        j loop
+done:   sw $t1, 8($t0)
+"""
+
+
+def make_debugger(source=PROGRAM, **options):
+    assembler = MIPSAssembler()
+    processor = MIPSProcessor()
+    processor.load_program(assembler.assemble(source))
+    processor.decode_program()
+    return MIPSDebugger(processor, assembler.labels, **options)
+
+
+def state(debugger):
+    p = debugger.processor
+    return p.pc, list(p.registers), dict(p.memory)
+
+
+def test_undo_restores_every_step():
+    debugger = make_debugger()
+    history = [state(debugger)]
+    while debugger.run(1) != 'end':
+        history.append(state(debugger))
+    assert debugger.steps == len(history) - 1
+    while debugger.steps:
+        debugger.undo()
+        assert state(debugger) == history[debugger.steps]
+    assert debugger.undo() is None
+
+
+def test_goto_through_snapshots():
+    debugger = make_debugger(snapshot_interval=7)
+    history = [state(debugger)]
+    while debugger.run(1) != 'end':
+        history.append(state(debugger))
+    for step in [3, 30, 0, len(history) - 1, 15, 14, 16]:
+        debugger.goto(step)
+        assert debugger.steps == step
+        assert state(debugger) == history[step]
+
+
+def test_trimmed_history_clamps_to_oldest_step():
+    debugger = make_debugger(snapshot_interval=5, history_limit=10)
+    debugger.run()
+    assert debugger.log_base > 0
+    assert debugger.goto(0) == 'start of history'
+    assert debugger.steps == debugger.log_base
+
+
+def test_breakpoint_on_label():
+    debugger = make_debugger()
+    debugger.breakpoints.add(debugger.resolve_address('done'))
+    assert debugger.run().startswith('breakpoint')
+    assert debugger.processor.pc == debugger.labels['done'] * 4
+    assert debugger.reverse(1) == 'limit'
+    debugger.breakpoints.add(debugger.resolve_address('loop'))
+    assert debugger.reverse().endswith('(reverse)')
+    assert debugger.processor.pc == debugger.labels['loop'] * 4
+
+
+def test_register_watch_ignores_same_value_writes():
+    debugger = make_debugger("""
+        addiu $t0, $zero, 1
+        addiu $t0, $zero, 1
+        addiu $t1, $zero, 2
+        addiu $t0, $zero, 3
+    """)
+    debugger.watch_registers.add(8)
+    assert debugger.run() == 'watch $t0: 0x00000000 -> 0x00000001'
+    assert debugger.run() == 'watch $t0: 0x00000001 -> 0x00000003'
+    assert debugger.steps == 4
+    assert debugger.reverse() == 'watch $t0 (reverse)'
+    assert debugger.steps == 3
+
+
+def test_memory_watch_ignores_same_value_stores():
+    debugger = make_debugger("""
+        addiu $t0, $zero, 5
+        sw $zero, 0x10($zero)
+        sw $t0, 0x10($zero)
+        sw $t0, 0x10($zero)
+        sw $t0, 0x14($zero)
+        sw $zero, 0x10($zero)
+    """)
+    debugger.watch_memory.add(0x10)
+    assert debugger.run() == 'watch mem[0x10]: 0x00000000 -> 0x00000005'
+    assert debugger.steps == 3
+    assert debugger.run() == 'watch mem[0x10]: 0x00000005 -> 0x00000000'
+    assert debugger.steps == 6
+    assert debugger.reverse() == 'watch mem[0x10] (reverse)'
+    assert debugger.steps == 5
+    assert debugger.reverse() == 'watch mem[0x10] (reverse)'
+    assert debugger.steps == 2
+    assert debugger.reverse() == 'start of history'
+
+
+def test_goto_ignores_watchpoints_and_breakpoints():
+    reference = make_debugger(snapshot_interval=7)
+    history = [state(reference)]
+    while reference.run(1) != 'end':
+        history.append(state(reference))
+
+    debugger = make_debugger(snapshot_interval=7)
+    debugger.watch_registers.add(9)
+    debugger.watch_memory.update([0x40, 0x44])
+    debugger.breakpoints.add(debugger.resolve_address('loop'))
+    for step in [20, 25, 3, 40, 21, len(history) - 1, 1]:
+        debugger.goto(step)
+        assert debugger.steps == step
+        assert state(debugger) == history[step]
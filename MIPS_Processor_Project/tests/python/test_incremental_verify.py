@@ -0,0 +1,103 @@
+"""Job graph, result cache and watch-mode restarts (incremental_verify.py)"""
+
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import pytest
+
+from conftest import PROJECT_ROOT
+from incremental_verify import BuildGraph, local_imports
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """A private copy of the project that the tests can edit"""
+    for directory in ['src', 'tests', 'examples', 'tools']:
+        shutil.copytree(os.path.join(PROJECT_ROOT, directory), str(tmp_path / directory),
+                        ignore=shutil.ignore_patterns('__pycache__', 'python'))
+    return tmp_path
+
+
+def run(tree, patterns=()):
+    graph = BuildGraph(str(tree))
+    results = graph.run(graph.select(list(patterns)))
+    return {result['name']: result for result in results}
+
+
+def append(path, text):
+    with open(path, 'a') as f:
+        f.write(text)
+
+
+def test_local_imports_follow_the_import_graph():
+    closure = local_imports(PROJECT_ROOT, 'tools/mips_assembler.py')
+    assert 'tools/mips_assembler.py' in closure
+    assert 'tools/instrumentation.py' in closure
+    assert 'tools/batch_runner.py' not in closure
+    assert set(local_imports(PROJECT_ROOT, 'tools/datapath_model.py')) >= set(closure)
+
+
+def test_second_run_is_cached(tree):
+    first = run(tree)
+    assert not any(result['cached'] for result in first.values())
+    assert all(result['status'] != 'fail' for result in first.values())
+    second = run(tree)
+    assert all(result['cached'] for result in second.values())
+    assert {n: r['digest'] for n, r in first.items()} == {n: r['digest'] for n, r in second.items()}
+
+
+def test_comment_edit_stops_at_unchanged_image(tree):
+    run(tree)
+    append(tree / 'examples' / 'test_program.asm', '\n# trailing comment\n')
+    results = run(tree, ['*:test_program'])
+    assert not results['image:test_program']['cached']
+    assert results['simulate:test_program']['cached']
+
+
+def test_tool_edit_invalidates_dependent_jobs(tree):
+    run(tree)
+    append(tree / 'tools' / 'instrumentation.py', '\n# edited\n')
+    results = run(tree)
+    assert not results['image:test_program']['cached']
+    assert not results['encoding']['cached']
+    assert results['compile:signal']['cached']
+    graph = BuildGraph(str(tree))
+    affected = graph.affected(['tools/instrumentation.py'])
+    assert 'static:ALU' in affected and 'simulate:stress_test' in affected
+    assert 'compile:signal' not in affected
+
+
+def test_encoding_check_keeps_working_directory(tree):
+    cwd = os.getcwd()
+    assert run(tree, ['encoding'])['encoding']['status'] == 'pass'
+    assert os.getcwd() == cwd
+
+
+def test_watch_restarts_on_tool_edit(tree):
+    process = subprocess.Popen([sys.executable, '-u', str(tree / 'tools' / 'incremental_verify.py'), '--watch',
+                                '--no-cache', 'image:test_program'],
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    try:
+        lines = []
+
+        def wait_for(text):
+            deadline = time.time() + 20
+            while time.time() < deadline:
+                line = process.stdout.readline()
+                lines.append(line)
+                if text in line:
+                    return
+            raise AssertionError(''.join(lines))
+
+        wait_for('Watching')
+        time.sleep(0.3)
+        append(tree / 'tools' / 'mips_assembler.py', '\n# edited\n')
+        wait_for('restarting')
+        wait_for('Watching')
+        assert sum('image:test_program' in line for line in lines) == 2
+    finally:
+        process.kill()
+        process.wait()
@@ -0,0 +1,90 @@
+"""Timing spans, counters and their exports (instrumentation.py)"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import instrumentation
+from conftest import PROJECT_ROOT, TOOLS_DIR
+from mips_assembler import MIPSAssembler
+
+
+@pytest.fixture
+def enabled():
+    instrumentation.reset()
+    instrumentation.enable()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def test_disabled_records_nothing():
+    instrumentation.reset()
+    assert instrumentation.span('x') is instrumentation.span('y')
+    with instrumentation.span('x'):
+        instrumentation.count('n', 5)
+    assert instrumentation.summary()['spans'] == {}
+    assert instrumentation.summary()['counters'] == {}
+
+
+def test_spans_and_counters(enabled):
+    for _ in range(3):
+        with instrumentation.span('outer', program='p'):
+            with instrumentation.span('inner'):
+                instrumentation.count('items', 2)
+    summary = instrumentation.summary()
+    assert summary['spans']['outer']['count'] == 3
+    assert summary['spans']['inner']['total_ms'] <= summary['spans']['outer']['total_ms']
+    assert summary['counters'] == {'items': 6}
+    events = instrumentation.trace_events()
+    complete = [e for e in events if e['ph'] == 'X']
+    assert len(complete) == 6 and complete[1]['args'] == {'program': 'p'}
+    assert [e['args']['value'] for e in events if e['ph'] == 'C'] == [2, 4, 6]
+
+
+def test_assembler_stages(enabled):
+    MIPSAssembler(optimize=True).assemble("nop\naddiu $t0, $zero, 1")
+    summary = instrumentation.summary()
+    assert {'assemble.parse', 'assemble.peephole', 'assemble.encode'} <= set(summary['spans'])
+    assert summary['counters']['assemble.instructions'] == 1
+
+
+def test_environment_exports(tmp_path):
+    summary, trace = tmp_path / 'summary.json', tmp_path / 'trace.json'
+    env = dict(os.environ, MIPS_INSTRUMENT=f"{summary},chrome:{trace}")
+    subprocess.run([sys.executable, os.path.join(TOOLS_DIR, 'check_mips.py')], env=env, check=True,
+                   capture_output=True)
+    data = json.loads(summary.read_text())
+    assert 'check.design' in data['spans']
+    assert any(e.get('name') == 'check.module' for e in json.loads(trace.read_text())['traceEvents'])
+    printed = subprocess.run([sys.executable, os.path.join(TOOLS_DIR, 'instrumentation.py'), str(summary)],
+                             capture_output=True, text=True, check=True)
+    assert 'check.design' in printed.stdout
+
+
+PACKAGE_SCRIPT = """
+import glob, importlib, os
+for path in sorted(glob.glob(os.path.join('tools', '*.py'))):
+    importlib.import_module('tools.' + os.path.basename(path)[:-3])
+
+from tools.mips_assembler import MIPSAssembler
+assembler = MIPSAssembler()
+assembler.assemble('loop: lw $t0, 0($zero)\\n beq $t0, $zero, loop\\n sw $t0, 4($zero)')
+bounds = assembler.estimate_cycles()
+assert bounds['best'] == 5 + 3 + 4, bounds
+assert 'loop' in assembler.generate_listing()
+
+from tools.advanced_mips_verifier import MIPSProcessor
+processor = MIPSProcessor()
+processor.load_program(assembler.assemble('addiu $t0, $zero, 7'))
+processor.run()
+assert processor.registers[8] == 7
+"""
+
+
+def test_tools_work_as_package_modules():
+    subprocess.run([sys.executable, '-c', PACKAGE_SCRIPT], cwd=PROJECT_ROOT, check=True,
+                   env=dict(os.environ, PYTHONPATH=''))
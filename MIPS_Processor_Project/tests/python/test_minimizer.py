@@ -0,0 +1,120 @@
+"""ddmin and simplification in the failing-program minimizer (mips_minimizer.py)"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+import mips_minimizer
+from advanced_mips_verifier import WordMemory
+from conftest import PROJECT_ROOT, TOOLS_DIR, write_program
+from mips_assembler import MIPSAssembler
+from mips_minimizer import Minimizer, disassemble, model_disagreement, parse_program, render
+
+PADDING = '\n'.join(f"addiu $t{i % 8}, $t{(i + 1) % 8}, {i}" for i in range(30))
+
+
+def instructions(program):
+    return [value for kind, value in program if kind == 'instr']
+
+
+@pytest.fixture
+def oracle(monkeypatch):
+    """Replace the worker oracle with a predicate over the parsed candidate"""
+    calls = []
+
+    def install(predicate):
+        def evaluate(task):
+            source = task[0]
+            calls.append(source)
+            try:
+                MIPSAssembler().assemble(source)
+            except (ValueError, IndexError, KeyError):
+                return False
+            return predicate(instructions(parse_program(source)))
+        monkeypatch.setattr(mips_minimizer, 'evaluate', evaluate)
+        return calls
+    return install
+
+
+def minimize(source):
+    with Minimizer(jobs=1, verbose=False) as minimizer:
+        return minimizer.minimize(parse_program(source))
+
+
+def test_ddmin_keeps_only_the_needed_instructions(oracle):
+    oracle(lambda program: {'sw', 'lw'} <= {parts[0] for parts in program})
+    source = f"{PADDING}\nsw $t1, 8($t2)\n{PADDING}\nlw $t3, 4($t4)\n{PADDING}\n"
+    result = instructions(minimize(source))
+    assert result == [('sw', '$zero', '0($zero)'), ('lw', '$zero', '0($zero)')]
+
+
+def test_result_is_one_minimal(oracle):
+    def needs_pair(program):
+        ops = [parts[0] for parts in program]
+        return 'lui' in ops and 'ori' in ops[ops.index('lui'):]
+    oracle(needs_pair)
+    result = minimize(f"{PADDING}\nlui $t0, 0x1234\n{PADDING}\nori $t0, $t0, 0x5678\n")
+    ops = instructions(result)
+    assert [parts[0] for parts in ops] == ['lui', 'ori']
+    for index in range(len(ops)):
+        assert not needs_pair(ops[:index] + ops[index + 1:])
+
+
+def test_labels_stay_until_unused(oracle):
+    oracle(lambda program: any(parts[0] == 'beq' for parts in program))
+    result = minimize(f"{PADDING}\nloop: addiu $t0, $t0, 1\nbeq $t0, $t1, loop\n{PADDING}\n")
+    assert instructions(result) == [('beq', '$zero', '$zero', 'loop')]
+    assert ('label', 'loop') in result
+    MIPSAssembler().assemble(render(result))
+
+
+def test_results_are_cached(oracle):
+    calls = oracle(lambda program: any(parts[0] == 'lw' for parts in program))
+    minimize(f"{PADDING}\nlw $t3, 4($t4)\n")
+    assert len(calls) == len(set(calls))
+
+
+def test_input_must_fail(oracle):
+    oracle(lambda program: False)
+    with pytest.raises(ValueError, match='does not fail'):
+        minimize(PADDING)
+
+
+def test_disassemble_round_trip():
+    with open(os.path.join(PROJECT_ROOT, 'examples', 'test_program.asm')) as f:
+        words = MIPSAssembler().assemble(f.read())
+    assert MIPSAssembler().assemble(render(disassemble(words))) == words
+
+
+def test_model_oracle_ignores_memory_aliasing():
+    assembler = MIPSAssembler()
+    words = assembler.assemble(".data\n.word 5\n.text\nlw $t0, 0($zero)\nsw $t0, 0x1006($zero)\n")
+    assert model_disagreement(words, 100, assembler.data) is None
+
+
+def test_model_oracle_minimizes_real_disagreement():
+    # MulticycleDatapath writes back the stale ALU output for ADDIU, as the RTL does
+    assert model_disagreement(MIPSAssembler().assemble("addiu $t0, $zero, 7"), 10) is not None
+    result = instructions(minimize(f"{PADDING}\naddiu $t0, $zero, 7\n"))
+    assert result == [('addiu', '$t0', '$zero', '0')]
+
+
+def test_word_memory_aliases_like_data_memory():
+    memory = WordMemory()
+    memory.write_word(0x1006, 0x1_0000_0005)
+    assert memory.read_word(0x4) == 5
+    assert memory.read_word(0x7) == 5
+    memory.write_word(0x4, 9)
+    assert memory.words() == {1: 9}
+
+
+def test_cli_requires_an_oracle(tmp_path):
+    path = write_program(tmp_path, 'failing.asm', "addiu $t0, $zero, 7\n")
+    script = os.path.join(TOOLS_DIR, 'mips_minimizer.py')
+    missing = subprocess.run([sys.executable, script, path], capture_output=True, text=True)
+    assert missing.returncode != 0 and '--model' in missing.stderr
+    result = subprocess.run([sys.executable, script, path, '--model', '-j', '1'], capture_output=True,
+                            text=True, check=True)
+    assert 'Mismatch: $t0' in result.stdout
@@ -0,0 +1,105 @@
+"""Bus toggle counting and NumPy/pure-Python parity (power_estimator.py)"""
+
+import os
+
+import pytest
+
+import power_estimator
+from advanced_mips_verifier import MIPSProcessor
+from conftest import PROJECT_ROOT
+from mips_assembler import MIPSAssembler, instruction_cycles
+from power_estimator import ActivityEstimator, format_report, write_saif
+
+PROGRAM = """
+        addiu $t0, $zero, 0x40
+        addiu $t1, $zero, 9
+loop:   sw $t1, 0($t0)
+        lw $t2, 0($t0)
+        jal twice
+        addiu $t0, $t0, 4
+        addiu $t1, $t1, -1
+        beq $t1, $zero, done
+        j loop
+twice:  addu $v0, $t2, $t2
+        slt $v1, $v0, $t1
+        jr $ra
+done:   lui $s0, 0xABCD
+        ori $s0, $s0, 0x1234
+"""
+
+
+def estimate(source=PROGRAM, max_steps=100000):
+    assembler = MIPSAssembler()
+    processor = MIPSProcessor()
+    processor.load_program(assembler.assemble(source))
+    estimator = ActivityEstimator(processor, assembler.labels)
+    estimator.run(max_steps)
+    return estimator
+
+
+def results(estimator):
+    counters = [(c.name, c.events, c.toggles, c.bit_toggles, c.bit_high, c.region_toggles)
+                for c in estimator.counters]
+    return (counters, estimator.class_counts, estimator.region_cycles, estimator.region_instructions,
+            estimator.cycles, estimator.instructions)
+
+
+def test_write_port_toggles():
+    estimator = estimate("addiu $t0, $zero, 0xFF\naddiu $t1, $zero, 0xF0")
+    counters = {counter.name: counter for counter in estimator.counters}
+    # 0 -> 0xFF -> 0xF0 on the data bus, register 0 -> 8 -> 9 on the address bus
+    assert counters['regfile/write_data'].toggles == 8 + 4
+    assert counters['regfile/write_reg'].toggles == 1 + 1
+    assert counters['regfile/write_data'].bit_toggles[:8] == [2, 2, 2, 2, 1, 1, 1, 1]
+
+
+def test_cycles_follow_the_fsm():
+    assembler = MIPSAssembler()
+    processor = MIPSProcessor()
+    processor.load_program(assembler.assemble(PROGRAM))
+    cycles = 0
+    while True:
+        executed = processor.step()
+        if executed is None:
+            break
+        cycles += instruction_cycles(executed[2].lower())
+    estimator = estimate()
+    assert estimator.cycles == cycles
+    assert sum(estimator.region_cycles) == cycles
+    for counter in estimator.counters:
+        assert all(0 <= high <= cycles for high in counter.bit_high)
+
+
+def test_pure_python_matches_numpy(monkeypatch):
+    pytest.importorskip('numpy')
+    vectorized = results(estimate())
+    monkeypatch.setattr(power_estimator, 'np', None)
+    assert results(estimate()) == vectorized
+
+
+def test_batches_carry_state(monkeypatch):
+    whole = results(estimate())
+    monkeypatch.setattr(power_estimator, 'BATCH', 7)
+    assert results(estimate()) == whole
+
+
+def test_example_parity(monkeypatch):
+    pytest.importorskip('numpy')
+    with open(os.path.join(PROJECT_ROOT, 'examples', 'stress_test.asm')) as f:
+        source = f.read()
+    monkeypatch.setattr(power_estimator, 'BATCH', 1000)
+    vectorized = results(estimate(source, 5000))
+    monkeypatch.setattr(power_estimator, 'np', None)
+    assert results(estimate(source, 5000)) == vectorized
+
+
+def test_report_and_saif(tmp_path):
+    estimator = estimate()
+    report = format_report(estimator, 'loop')
+    assert report.splitlines()[-1].startswith('Power proxy:')
+    assert 'twice' in report
+    path = tmp_path / 'activity.saif'
+    write_saif(estimator, str(path))
+    text = path.read_text()
+    assert text.count('(TC ') == sum(width for _, width in power_estimator.BUSES)
+    assert f'(DURATION {estimator.cycles * 10})' in text
@@ -0,0 +1,92 @@
+"""JSON-RPC request handling of the simulation server (mips_server.py)"""
+
+import json
+import os
+
+import pytest
+
+from conftest import PROJECT_ROOT
+from mips_server import SimulationService
+
+
+@pytest.fixture
+def service():
+    return SimulationService(PROJECT_ROOT)
+
+
+def call(service, method, **params):
+    response = json.loads(service.handle(json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': method,
+                                                     'params': params})))
+    assert response['id'] == 1
+    return response
+
+
+def test_assemble_and_run(service):
+    source = "addiu $t0, $zero, 5\nsw $t0, 0x10($zero)\nlw $t1, 0x10($zero)"
+    assembled = call(service, 'assemble', source=source)['result']
+    assert len(assembled['words']) == 3
+    result = call(service, 'run', image=assembled['image'])['result']
+    assert result['halted'] and result['steps'] == 3
+    assert result['cycles'] == 3 + 4 + 5
+    assert result['registers'][9] == 5
+    assert call(service, 'assemble', source=source)['result']['image'] == assembled['image']
+
+
+def test_run_from_project_path(service):
+    result = call(service, 'run', path='examples/test_program.asm', max_steps=50)['result']
+    assert result['steps'] == 50 and not result['halted']
+
+
+@pytest.mark.parametrize('path', ['/etc/passwd', '../requests.jsonl', 'src/../../LICENSE'])
+def test_reads_are_confined_to_the_project(service, path):
+    error = call(service, 'run', path=path)['error']
+    assert error['message'].startswith('Path outside the project root')
+
+
+def test_symlink_out_of_the_project(tmp_path):
+    root = tmp_path / 'project'
+    root.mkdir()
+    (tmp_path / 'outside.asm').write_text('nop\n')
+    (root / 'inside.asm').write_text('nop\n')
+    os.symlink(str(tmp_path / 'outside.asm'), str(root / 'link.asm'))
+    service = SimulationService(str(root))
+    assert 'result' in call(service, 'assemble', path='inside.asm')
+    assert call(service, 'assemble', path='link.asm')['error']['message'].startswith('Path outside')
+
+
+def test_errors(service):
+    assert json.loads(service.handle('{not json'))['error']['message'].startswith('Parse error')
+    assert call(service, 'bogus')['error']['message'] == 'Unknown method: bogus'
+    assert 'Unknown instruction' in call(service, 'assemble', source='bogus $t0')['error']['message']
+    assert call(service, 'run', image='0' * 16)['error']['message'].startswith('Unknown image')
+
+
+@pytest.mark.parametrize('ending', ['end: j end', 'end: beq $zero, $zero, end'])
+def test_spin_loop_halts(service, ending):
+    result = call(service, 'run', source=f"addiu $t0, $zero, 1\n{ending}", max_steps=1000)['result']
+    assert result['halted'] and result['halt'] == 'spin'
+    assert result['steps'] == 2 and result['pc'] == 4
+
+
+def test_program_ending_at_the_step_budget_halted(service):
+    source = "addiu $t0, $zero, 1\naddiu $t1, $zero, 2"
+    result = call(service, 'run', source=source, max_steps=2)['result']
+    assert result['halted'] and result['halt'] == 'end'
+    result = call(service, 'run', source=source, max_steps=1)['result']
+    assert not result['halted'] and result['halt'] is None
+
+
+def test_caches_are_bounded():
+    service = SimulationService(PROJECT_ROOT, cache_size=2)
+    images = [call(service, 'assemble', source=f"addiu $t0, $zero, {n}")['result']['image'] for n in range(3)]
+    assert len(service.images) == 2 and len(service.assembled) == 2
+    assert call(service, 'run', image=images[0])['error']['message'].startswith('Unknown image')
+    assert call(service, 'run', image=images[2])['result']['halted']
+    # A cached assembly whose image was evicted on its own registers the image again
+    source = "addiu $t0, $zero, 9"
+    call(service, 'assemble', source=source)
+    call(service, 'load_image', words=[1])
+    call(service, 'load_image', words=[2])
+    assert source in [entry['source'] for entry in service.assembled.entries.values()]
+    assert call(service, 'run', source=source)['result']['registers'][8] == 9
+    assert call(service, 'ping')['result']['images'] == 2
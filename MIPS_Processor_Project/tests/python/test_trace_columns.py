@@ -0,0 +1,107 @@
+"""Columnar traces and the query API (trace_columns.py)"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from advanced_mips_verifier import MIPSProcessor
+from conftest import TOOLS_DIR, write_program
+from mips_assembler import MIPSAssembler
+from trace_columns import (FLAG_MEM_READ, FLAG_MEM_WRITE, FLAG_REG_WRITE, NO_REGISTER, TraceRecorder,
+                           TraceTable)
+
+PROGRAM = """
+        addiu $t0, $zero, 0x60
+        addiu $t1, $zero, 3
+loop:   sw $t1, 4($t0)
+        lw $t2, 4($t0)
+        addiu $t0, $t0, 4
+        addiu $t1, $t1, -1
+        beq $t1, $zero, done
+        j loop
+done:   addu $t3, $t2, $t2
+"""
+
+
+def record(source=PROGRAM):
+    processor = MIPSProcessor()
+    processor.load_program(MIPSAssembler().assemble(source))
+    recorder = TraceRecorder()
+    recorder.run(processor)
+    return recorder
+
+
+def test_rows_follow_execution():
+    recorder = record()
+    table = recorder.table()
+    assert len(table) == 2 + 3 * 6 - 1 + 1  # The last iteration skips the jump
+    assert table['cycle'][0] == 0 and table['cycle'][1] == 3
+    assert recorder.cycles == int(table['cycle'][-1]) + 3
+    stores = table.query().stores()
+    assert stores.column('mem_addr').tolist() == [0x64, 0x68, 0x6C]
+    assert stores.column('mem_value').tolist() == [3, 2, 1]
+    loads = table.query().loads()
+    assert loads.column('mem_value').tolist() == [3, 2, 1]
+    assert (loads.column('flags') == FLAG_MEM_READ | FLAG_REG_WRITE).all()
+    assert table['dest'][-1] == 11 and table['value'][-1] == 2
+    assert (table.query().flagged(FLAG_MEM_WRITE).column('dest') == NO_REGISTER).all()
+
+
+def test_save_and_memory_mapped_load(tmp_path):
+    recorder = record()
+    path = str(tmp_path / 'trace.npz')
+    recorder.save(path)
+    for mmap in [True, False]:
+        loaded = TraceTable.load(path, mmap=mmap)
+        assert (loaded.records() == recorder.table().records()).all()
+    assert isinstance(TraceTable.load(path)['pc'], np.memmap)
+
+
+def test_where_conditions():
+    table = record().table()
+    assert table.where(pc=(8, 16)).count() == 6
+    assert table.where(pc=[0, 4]).count() == 2
+    assert table.where(cycle=(None, 6)).count() == 2
+    assert table.where(rt=lambda column: column == 9).count() == table.where(rt=9).count()
+
+
+def test_memory_columns_match_only_memory_rows():
+    table = record().table()
+    assert table.where(mem_addr=(0, 0x68)).count() == 2
+    assert table.where(mem_value=0).count() == 0
+    assert table.query().stores().where(mem_addr=(0x64, 0x70)).count() == 3
+
+
+def test_unknown_column():
+    with pytest.raises(ValueError, match='Unknown trace column: bogus'):
+        record().table().where(bogus=1)
+
+
+def test_aggregates():
+    query = record().table().query()
+    assert query.count_by('opcode')[0x2B] == 3
+    assert query.write_frequency()[9] == 4
+    per_pc = query.aggregate('pc', 'cycle', 'min')
+    assert per_pc[0] == 0 and per_pc[4] == 3
+    assert query.aggregate('pc', 'value', 'count') == query.per_pc()
+
+
+def run_cli(*args):
+    return subprocess.run([sys.executable, os.path.join(TOOLS_DIR, 'trace_columns.py')] + list(args),
+                          capture_output=True, text=True)
+
+
+def test_query_cli(tmp_path):
+    program = write_program(tmp_path, 'loop.asm', PROGRAM)
+    trace = str(tmp_path / 'trace.npz')
+    assert run_cli('export', program, '-o', trace).returncode == 0
+    process = run_cli('query', trace, 'store', 'mem_addr=0x64:0x6c', '--count-by', 'mem_addr')
+    assert process.stdout.splitlines() == ["2 of 20 rows match", "  mem_addr=0x64: 1", "  mem_addr=0x68: 1"]
+    for condition, message in [('bogus=1', 'Unknown trace column'), ('foo', 'Bad condition')]:
+        process = run_cli('query', trace, condition)
+        assert process.returncode == 1
+        assert process.stdout.startswith(f"Error: {message}")
@@ -0,0 +1,14 @@
+"""
+MIPS processor tools
+Every tool is also a standalone script that imports its siblings by bare
+module name (import instrumentation, from mips_assembler import ...), so
+importing the package puts this directory on sys.path for those imports
+to resolve when a tool is used as tools.<module>.
+"""
+
+import os
+import sys
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+if TOOLS_DIR not in sys.path:
+    sys.path.insert(0, TOOLS_DIR)
@@ -8,13 +8,39 @@ import re
 import os
 from typing import Dict, List, Tuple, Optional
 
+import instrumentation
+
+MEMORY_WORDS = 1024  # Depth of InstructionMemory.v and DataMemory.v
+
+
+class WordMemory:
+    """Data memory laid out like DataMemory.v: words indexed by address[11:2],
+    so unaligned and out-of-range byte addresses alias onto the same word"""
+
+    def __init__(self, words: int = MEMORY_WORDS):
+        self.mask = words - 1
+        self.values = {}  # Word index -> Data, words never written are zero
+
+    def read_word(self, address: int) -> int:
+        return self.values.get((address >> 2) & self.mask, 0)
+
+    def write_word(self, address: int, value: int):
+        self.values[(address >> 2) & self.mask] = value & 0xFFFFFFFF
+
+    def words(self) -> Dict[int, int]:
+        """Word index -> Data for every word written so far"""
+        return dict(self.values)
+
+
 class MIPSProcessor:
     """High-level MIPS processor simulator for verification"""
     
-    def __init__(self):
+    def __init__(self, memory: Optional[WordMemory] = None):
         # Initialize registers (32 registers, each 32 bits)
         self.registers = [0] * 32
-        self.memory = {}  # Address -> Data mapping
+        # Address -> Data mapping, or a WordMemory that aliases addresses like the RTL
+        self.memory = {} if memory is None else memory
+        self.word_memory = memory is not None
         self.pc = 0  # Program counter
         self.instructions = []  # List of (address, instruction) tuples
         self.cycle_count = 0
@@ -23,10 +49,12 @@ class MIPSProcessor:
         # Instruction decode cache
         self.current_instruction = None
         self.instruction_type = None
+        self.decoded_program = None  # List of (decoded, type), one per instruction
         
     def load_instructions(self, instructions: List[str]):
         """Load instructions into the processor"""
         self.instructions = []
+        self.decoded_program = None
         for i, instr in enumerate(instructions):
             if instr.strip() and not instr.strip().startswith('//'):
                 # Remove memory initialization syntax and extract hex
@@ -35,6 +63,43 @@ class MIPSProcessor:
                     hex_val = hex_match.group()
                     self.instructions.append((i * 4, int(hex_val, 16)))
     
+    def load_program(self, words: List[int]):
+        """Load an instruction image given as 32-bit words"""
+        self.instructions = [(i * 4, word & 0xFFFFFFFF) for i, word in enumerate(words)]
+        self.decoded_program = None
+    
+    def load_memory(self, data: Dict[int, int]):
+        """Preload data memory in bulk from a byte address -> word mapping"""
+        if self.word_memory:
+            for address, value in data.items():
+                self.memory.write_word(address, value)
+            return
+        self.memory.update((address, value & 0xFFFFFFFF) for address, value in data.items())
+    
+    def load_data_image(self, lines: List[str]):
+        """Preload data memory from $readmemh text (one word per line, @word-address markers)"""
+        data = {}
+        index = 0
+        for line in lines:
+            for token in line.split('//')[0].split():
+                if token.startswith('@'):
+                    index = int(token[1:], 16)
+                else:
+                    data[index * 4] = int(token, 16)
+                    index += 1
+        self.load_memory(data)
+    
+    def decode_program(self) -> List[Tuple[Dict, str]]:
+        """Decode every loaded instruction once and cache the result"""
+        if self.decoded_program is None:
+            with instrumentation.span('decode'):
+                self.decoded_program = []
+                for _, instr in self.instructions:
+                    decoded = self.decode_instruction(instr)
+                    self.decoded_program.append((decoded, self.get_instruction_type(decoded)))
+            instrumentation.count('decode.instructions', len(self.decoded_program))
+        return self.decoded_program
+    
     def decode_instruction(self, instr: int) -> Dict:
         """Decode a 32-bit instruction"""
         opcode = (instr >> 26) & 0x3F
@@ -102,10 +167,16 @@ class MIPSProcessor:
             self.registers[decoded['rt']] = (decoded['immediate'] << 16) & 0xFFFFFFFF
         elif instr_type == "LW":
             addr = (rs_val + decoded['immediate_signed']) & 0xFFFFFFFF
-            self.registers[decoded['rt']] = self.memory.get(addr, 0)
+            if self.word_memory:
+                self.registers[decoded['rt']] = self.memory.read_word(addr)
+            else:
+                self.registers[decoded['rt']] = self.memory.get(addr, 0)
         elif instr_type == "SW":
             addr = (rs_val + decoded['immediate_signed']) & 0xFFFFFFFF
-            self.memory[addr] = rt_val
+            if self.word_memory:
+                self.memory.write_word(addr, rt_val)
+            else:
+                self.memory[addr] = rt_val
         elif instr_type == "BEQ":
             if rs_val == rt_val:
                 self.pc += (decoded['immediate_signed'] << 2)
@@ -124,9 +195,48 @@ class MIPSProcessor:
         self.registers[0] = 0
         return False
     
+    def step(self) -> Optional[Tuple[int, Dict, str]]:
+        """Execute one instruction without tracing. Returns (pc, decoded, type), or None past the program end."""
+        program = self.decoded_program or self.decode_program()
+        index = self.pc // 4
+        if index >= len(program) or index < 0:
+            return None
+        
+        pc = self.pc
+        decoded, instr_type = program[index]
+        if not self.execute_instruction(decoded, instr_type):
+            self.pc += 4
+        self.cycle_count += 1
+        return pc, decoded, instr_type
+    
+    def run(self, max_instructions: int = 1000) -> int:
+        """Execute up to max_instructions without tracing; returns the number executed"""
+        program = self.decode_program()
+        count = len(program)
+        executed = 0
+        with instrumentation.span('execute'):
+            while executed < max_instructions:
+                index = self.pc // 4
+                if index >= count or index < 0:
+                    break
+                decoded, instr_type = program[index]
+                if not self.execute_instruction(decoded, instr_type):
+                    self.pc += 4
+                executed += 1
+        self.cycle_count += executed
+        instrumentation.count('execute.instructions', executed)
+        return executed
+    
     def simulate_cycles(self, max_cycles: int = 1000) -> List[Dict]:
         """Simulate the processor for a given number of cycles"""
+        with instrumentation.span('execute.trace'):
+            trace = self._simulate_cycles(max_cycles)
+        instrumentation.count('execute.instructions', len(trace))
+        return trace
+    
+    def _simulate_cycles(self, max_cycles: int) -> List[Dict]:
         trace = []
+        program = self.decode_program()
         
         for cycle in range(max_cycles):
             if self.pc // 4 >= len(self.instructions):
@@ -135,8 +245,7 @@ class MIPSProcessor:
             # Fetch
             if self.pc // 4 < len(self.instructions):
                 addr, instr = self.instructions[self.pc // 4]
-                decoded = self.decode_instruction(instr)
-                instr_type = self.get_instruction_type(decoded)
+                decoded, instr_type = program[self.pc // 4]
                 
                 # Record state before execution
                 state_record = {
@@ -183,11 +292,13 @@ class MIPSVerifier:
         for filename in required_files:
             filepath = os.path.join(self.base_path, filename)
             if os.path.exists(filepath):
-                with open(filepath, 'r') as f:
-                    self.files[filename] = f.read()
+                with instrumentation.span('file.load', path=filename):
+                    with open(filepath, 'r') as f:
+                        self.files[filename] = f.read()
             else:
                 print(f"❌ Missing file: {filename}")
                 return False
+        instrumentation.count('file.loaded', len(required_files))
         
         print(f"✓ Loaded {len(self.files)} design files")
         return True
@@ -202,7 +313,8 @@ class MIPSVerifier:
         
         # Look for memory initialization assignments
         pattern = r'memory\[\d+\]\s*=\s*32\'h([0-9A-Fa-f]{8})'
-        matches = re.findall(pattern, content)
+        with instrumentation.span('parse.instruction_memory'):
+            matches = re.findall(pattern, content)
         
         for match in matches:
             instructions.append(match)
@@ -266,6 +378,10 @@ class MIPSVerifier:
     
     def analyze_trace(self, trace: List[Dict]):
         """Analyze the execution trace for correctness"""
+        with instrumentation.span('trace.analysis', steps=len(trace)):
+            self._analyze_trace(trace)
+    
+    def _analyze_trace(self, trace: List[Dict]):
         print(f"\n执行轨迹分析:")
         
         instruction_counts = {}
@@ -342,7 +458,8 @@ def main():
     script_dir = os.path.dirname(os.path.abspath(__file__))
     base_path = os.path.dirname(script_dir)
     verifier = MIPSVerifier(base_path)
-    verifier.run_comprehensive_check()
+    with instrumentation.span('verify'):
+        verifier.run_comprehensive_check()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Batch RTL regression for the MIPS multi-cycle processor
+Compiles the RTL with the generic tests/MIPS_Multicycle_Batch_tb.v once, then
+runs many program images on worker processes. Each program is passed as
+$readmemh files (+imem/+dmem) and run for exactly the cycles MIPSProcessor
+needs to execute it; the dumped registers, PC and DataMemory are compared
+with MIPSProcessor's final state.
+
+--simulator replaces the compiled testbench with any executable taking the
+same plusargs. "python3 tools/stub_simulator.py" stands in when iverilog is
+not installed, but its default model computes the expected state itself, so
+its PASS results only check this script's image, dump and compare plumbing.
+
+Usage: python3 batch_runner.py [program ...] [-j N] [--simulator CMD]
+"""
+
+import argparse
+import glob
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+from advanced_mips_verifier import MEMORY_WORDS, MIPSProcessor, WordMemory
+from datapath_model import export_data_image, export_image, load_program
+from mips_assembler import DEFAULT_CYCLES, INSTRUCTION_CYCLES
+
+BATCH_BINARY = 'mips_batch'
+BATCH_SOURCES = ['src/definitions.vh', 'src/ALU.v', 'src/RegisterFile.v', 'src/InstructionMemory.v',
+                 'src/DataMemory.v', 'src/SignExtender.v', 'src/ControlUnit.v', 'src/MIPS_Multicycle.v',
+                 'tests/MIPS_Multicycle_Batch_tb.v']
+MAX_MISMATCHES = 5
+
+
+def format_dump(cycles: int, pc: int, registers: List[int], dmem: Dict[int, int]) -> str:
+    """Final state in the testbench's +dump format (DataMemory words by index, zeros omitted)"""
+    lines = [f"cycles {cycles}", f"pc {pc:08x}"]
+    lines += [f"r{i} {value:08x}" for i, value in enumerate(registers)]
+    lines += [f"m{index} {value:08x}" for index, value in sorted(dmem.items()) if value]
+    return '\n'.join(lines) + '\n'
+
+
+def parse_dump(text: str) -> Dict:
+    """State from a +dump file; words with x/z bits are kept as None"""
+    state = {'cycles': 0, 'pc': None, 'registers': [None] * 32, 'memory': {}}
+    for line in text.splitlines():
+        fields = line.split()
+        if len(fields) != 2:
+            continue
+        key, value = fields
+        try:
+            word = int(value, 16)
+        except ValueError:
+            word = None
+        if key == 'cycles':
+            state['cycles'] = int(value)
+        elif key == 'pc':
+            state['pc'] = word
+        elif key[0] == 'r' and key[1:].isdigit() and int(key[1:]) < 32:
+            state['registers'][int(key[1:])] = word
+        elif key[0] == 'm' and key[1:].isdigit():
+            state['memory'][int(key[1:])] = word
+    return state
+
+
+def show(word: Optional[int]) -> str:
+    return 'x' if word is None else f'{word:08X}'
+
+
+def expected_state(words: List[int], data: Dict[int, int], max_steps: int) -> Dict:
+    """Final MIPSProcessor state and the multi-cycle clock count needed to reach it"""
+    processor = MIPSProcessor(WordMemory())
+    processor.load_program(words)
+    processor.load_memory(data)
+    cycles = 0
+    steps = 0
+    while steps < max_steps:
+        executed = processor.step()
+        if executed is None:
+            break
+        cycles += INSTRUCTION_CYCLES.get(executed[2].lower(), DEFAULT_CYCLES)
+        steps += 1
+    memory = {index: value for index, value in processor.memory.words().items() if value}
+    return {'cycles': cycles, 'steps': steps, 'halted': steps < max_steps, 'pc': processor.pc,
+            'registers': list(processor.registers), 'memory': memory}
+
+
+def compare_states(expected: Dict, actual: Dict) -> List[str]:
+    mismatches = []
+    if actual['cycles'] != expected['cycles']:
+        mismatches.append(f"ran {actual['cycles']} cycles, expected {expected['cycles']}")
+    if actual['pc'] != expected['pc']:
+        mismatches.append(f"pc: expected {expected['pc']:08X}, got {show(actual['pc'])}")
+    for number, (want, got) in enumerate(zip(expected['registers'], actual['registers'])):
+        if want != got:
+            mismatches.append(f"${number}: expected {want:08X}, got {show(got)}")
+    for index in sorted(set(expected['memory']) | set(actual['memory'])):
+        want = expected['memory'].get(index, 0)
+        got = actual['memory'].get(index, 0)
+        if want != got:
+            mismatches.append(f"mem[{index * 4:#x}]: expected {want:08X}, got {show(got)}")
+    return mismatches
+
+
+def run_program(task: Tuple[str, List[str], int, float]) -> Dict:
+    """Worker: expected state, one simulator run and the comparison for one program"""
+    path, command, max_steps, timeout = task
+    start = time.time()
+    result = {'name': path, 'status': 'error', 'detail': '', 'cycles': 0, 'steps': 0, 'sim_seconds': 0.0}
+    try:
+        words, data = load_program(path, os.getcwd())
+    except (OSError, ValueError, IndexError, KeyError) as e:
+        result['detail'] = f"cannot load: {e}"
+        return finish(result, start)
+    if not words or len(words) > MEMORY_WORDS:
+        result['detail'] = f"{len(words)} instruction words (InstructionMemory holds 1..{MEMORY_WORDS})"
+        return finish(result, start)
+
+    expected = expected_state(words, data, max_steps)
+    result['cycles'] = expected['cycles']
+    result['steps'] = expected['steps']
+    if expected['cycles'] == 0:
+        result['detail'] = "program executes no instructions"
+        return finish(result, start)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        imem = os.path.join(tmp, 'imem.hex')
+        dmem = os.path.join(tmp, 'dmem.hex')
+        dump = os.path.join(tmp, 'state.txt')
+        export_image(words, imem)
+        export_data_image(data, dmem)
+        sim_start = time.time()
+        try:
+            process = subprocess.run(command + [f'+imem={imem}', f'+dmem={dmem}',
+                                                f"+cycles={expected['cycles']}", f'+dump={dump}'],
+                                     capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            result['detail'] = f"simulator timed out after {timeout:g}s"
+            return finish(result, start)
+        except OSError as e:
+            result['detail'] = f"cannot run simulator: {e}"
+            return finish(result, start)
+        result['sim_seconds'] = time.time() - sim_start
+        if not os.path.exists(dump):
+            output = (process.stderr or process.stdout).strip()
+            result['detail'] = f"no state dump (exit {process.returncode}): {output[:300]}"
+            return finish(result, start)
+        with open(dump, 'r') as f:
+            actual = parse_dump(f.read())
+
+    mismatches = compare_states(expected, actual)
+    halt = 'halted' if expected['halted'] else 'step limit'
+    if mismatches:
+        result['status'] = 'fail'
+        more = len(mismatches) - MAX_MISMATCHES
+        result['detail'] = '; '.join(mismatches[:MAX_MISMATCHES]) + (f"; {more} more" if more > 0 else '')
+    else:
+        result['status'] = 'pass'
+        result['detail'] = f"{expected['steps']} instructions, {halt}"
+    return finish(result, start)
+
+
+def finish(result: Dict, start: float) -> Dict:
+    result['seconds'] = time.time() - start
+    return result
+
+
+def compile_testbench(base_path: str, output: str) -> Optional[str]:
+    """Build the batch testbench unless it is newer than all sources; returns an error message"""
+    sources = [os.path.join(base_path, name) for name in BATCH_SOURCES]
+    if os.path.exists(output) and os.path.getmtime(output) >= max(os.path.getmtime(s) for s in sources):
+        print(f"Using compiled testbench {output}")
+        return None
+    compiler = shutil.which('iverilog')
+    if not compiler:
+        return ("iverilog not found (--simulator 'python3 tools/stub_simulator.py' checks the batch flow "
+                "itself without the RTL)")
+    print(f"Compiling {output}...")
+    process = subprocess.run([compiler, '-I', os.path.join(base_path, 'src'), '-o', output] + sources,
+                             capture_output=True, text=True)
+    if process.returncode != 0:
+        return (process.stderr or process.stdout).strip()
+    return None
+
+
+def print_result(result: Dict):
+    label = {'pass': 'PASS', 'fail': 'FAIL', 'error': 'ERROR'}[result['status']]
+    print(f"  {label:<5} {result['name']:<36} {result['cycles']:>9} cycles  "
+          f"{result['seconds']:6.2f}s (sim {result['sim_seconds']:.2f}s)  {result['detail']}")
+
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    base_path = os.path.dirname(script_dir)
+    parser = argparse.ArgumentParser(description="Run many programs on one compiled RTL testbench")
+    parser.add_argument('programs', nargs='*', help="defaults to examples/*.asm")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--max-steps', type=int, default=100000)
+    parser.add_argument('--timeout', type=float, default=300.0, help="seconds per simulator run")
+    parser.add_argument('--simulator', help="command run with the plusargs instead of vvp on the compiled testbench")
+    parser.add_argument('--build', default=os.path.join(base_path, BATCH_BINARY),
+                        help="compiled testbench path")
+    args = parser.parse_args()
+
+    programs = args.programs or sorted(glob.glob(os.path.join(base_path, 'examples', '*.asm')))
+    if not programs:
+        print("No programs to run")
+        sys.exit(1)
+
+    if args.simulator:
+        command = shlex.split(args.simulator)
+    else:
+        error = compile_testbench(base_path, args.build)
+        if error:
+            print(f"Error: {error}")
+            sys.exit(1)
+        command = ['vvp', '-n', args.build]
+
+    print(f"Running {len(programs)} programs ({args.jobs} jobs): {' '.join(command)}")
+    start = time.time()
+    tasks = [(path, command, args.max_steps, args.timeout) for path in programs]
+    results = []
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        for future in as_completed([pool.submit(run_program, task) for task in tasks]):
+            result = future.result()
+            print_result(result)
+            results.append(result)
+
+    counts = {status: sum(1 for r in results if r['status'] == status) for status in ['pass', 'fail', 'error']}
+    print(f"{len(results)} programs: {counts['pass']} passed, {counts['fail']} failed, "
+          f"{counts['error']} errors ({time.time() - start:.2f}s)")
+    if counts['pass'] != len(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
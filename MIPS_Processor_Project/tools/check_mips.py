@@ -8,11 +8,14 @@ import re
 import os
 from pathlib import Path
 
+import instrumentation
+
 def read_verilog_file(filename):
     """读取 Verilog 文件内容"""
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            return f.read()
+        with instrumentation.span('file.load', path=filename):
+            with open(filename, 'r', encoding='utf-8') as f:
+                return f.read()
     except FileNotFoundError:
         print(f"错误：文件 {filename} 不存在")
         return None
@@ -95,18 +98,19 @@ def check_mips_design():
         print(f"\n检查模块: {module_name}")
         content = read_verilog_file(filename)
         if content:
-            check_module_ports(content, module_name)
-            check_always_blocks(content)
-            check_signal_declarations(content)
+            with instrumentation.span('check.module', module=module_name):
+                check_module_ports(content, module_name)
+                check_always_blocks(content)
+                check_signal_declarations(content)
         else:
             all_good = False
     
     return all_good
 
-def check_instruction_encoding():
+def check_instruction_encoding(filename='src/definitions.vh'):
     """检查指令编码定义"""
     print("\n检查指令编码定义...")
-    content = read_verilog_file('src/definitions.vh')
+    content = read_verilog_file(filename)
     if content:
         # 检查 opcode 定义
         opcode_pattern = r'`define\s+OPCODE_(\w+)\s+6\'b([01]+)'
@@ -129,7 +133,8 @@ def analyze_test_program():
     if content:
         # 查找指令编码
         instr_pattern = r'memory\[\d+\]\s*=\s*32\'h([0-9A-Fa-f]+);\s*//\s*(.*)'
-        instructions = re.findall(instr_pattern, content)
+        with instrumentation.span('parse.instruction_memory'):
+            instructions = re.findall(instr_pattern, content)
         
         print("  测试程序包含以下指令：")
         for hex_code, comment in instructions:
@@ -144,9 +149,12 @@ if __name__ == "__main__":
     os.chdir(project_root)
     
     # 执行各种检查
-    design_ok = check_mips_design()
-    check_instruction_encoding()
-    analyze_test_program()
+    with instrumentation.span('check.design'):
+        design_ok = check_mips_design()
+    with instrumentation.span('check.encoding'):
+        check_instruction_encoding()
+    with instrumentation.span('check.program'):
+        analyze_test_program()
     
     print("\n" + "=" * 40)
     if design_ok:
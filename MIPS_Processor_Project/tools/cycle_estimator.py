@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Static cycle estimator for programs built by MIPSAssembler
+Splits the program into basic blocks, builds the control-flow graph
+(including JAL/JR call edges) and bounds best- and worst-case cycles
+under the ControlUnit FSM without running a simulation.
+
+Loop bounds come from comments: '# @loop N' on the branch or jump that
+closes a loop (or on any instruction of the loop header) means the
+back edge is taken at most N times.
+"""
+
+import re
+
+from mips_assembler import MIPSAssembler, instruction_cycles
+
+LOOP_BOUND_PATTERN = re.compile(r'@loop\s+(\d+)')
+
+
+class CycleEstimator:
+    """Basic-block cycle analysis of an assembled program"""
+
+    def __init__(self, assembler: MIPSAssembler):
+        self.assembler = assembler
+        self.instructions = assembler.instructions
+        self.labels = assembler.labels
+        self.blocks = {}
+        self.warnings = []
+        self._functions = {}
+        self._active = set()
+        self.build_blocks()
+
+    def target_of(self, parts):
+        """Instruction index named by a branch or jump operand"""
+        operand = parts[-1]
+        if operand in self.labels:
+            return self.labels[operand]
+        return None
+
+    def build_blocks(self):
+        """Find leaders and create basic blocks with their successors"""
+        count = len(self.instructions)
+        leaders = {0} if count else set()
+        leaders.update(pc for pc in self.labels.values() if pc < count)
+
+        for stmt in self.instructions:
+            op = stmt['parts'][0]
+            pc = stmt['pc']
+            if op in ['beq', 'j', 'jal', 'jr']:
+                if pc + 1 < count:
+                    leaders.add(pc + 1)
+                target = self.resolve_target(stmt)
+                if target is not None and target < count:
+                    leaders.add(target)
+
+        starts = sorted(leaders)
+        for i, start in enumerate(starts):
+            end = starts[i + 1] if i + 1 < len(starts) else count
+            body = self.instructions[start:end]
+            last = body[-1]
+            op = last['parts'][0]
+            target = self.resolve_target(last)
+
+            block = {
+                'id': i, 'start': start, 'end': end,
+                'cycles': sum(instruction_cycles(s['parts'][0]) for s in body),
+                'succs': [], 'call': None, 'kind': 'fall'
+            }
+            fall = end if end < count else None
+
+            if op == 'beq':
+                block['kind'] = 'branch'
+                block['succs'] = [s for s in (target, fall) if s is not None]
+            elif op == 'j':
+                # 'end: ... j end' is how programs here stop
+                if target == start:
+                    block['kind'] = 'halt'
+                else:
+                    block['kind'] = 'jump'
+                    block['succs'] = [target] if target is not None else []
+            elif op == 'jal':
+                block['kind'] = 'call'
+                block['call'] = target
+                block['succs'] = [fall] if fall is not None else []
+            elif op == 'jr':
+                block['kind'] = 'return'
+            elif fall is None:
+                block['kind'] = 'exit'
+            else:
+                block['succs'] = [fall]
+
+            if op in ['beq', 'j', 'jal'] and target is None:
+                self.warnings.append(f"0x{last['pc'] * 4:04X}: unresolved target '{last['parts'][-1]}'")
+            # Duplicate successors (branch to the next instruction) collapse
+            block['succs'] = list(dict.fromkeys(block['succs']))
+            self.blocks[start] = block
+
+    def resolve_target(self, stmt):
+        """Absolute instruction index for beq/j/jal, None otherwise"""
+        parts = stmt['parts']
+        op = parts[0]
+        if op not in ['beq', 'j', 'jal']:
+            return None
+        target = self.target_of(parts)
+        if target is None:
+            try:
+                value = self.assembler.parse_immediate(parts[-1])
+            except ValueError:
+                return None
+            target = stmt['pc'] + 1 + value if op == 'beq' else value
+        return target
+
+    def loop_bound(self, tail, header):
+        """Bound from '@loop N' on the back-edge instruction or the header block"""
+        tail_block = self.blocks[tail]
+        candidates = [self.instructions[tail_block['end'] - 1]]
+        header_block = self.blocks[header]
+        candidates += self.instructions[header_block['start']:header_block['end']]
+        for stmt in candidates:
+            match = LOOP_BOUND_PATTERN.search(stmt.get('comment', ''))
+            if match:
+                return int(match.group(1))
+        return None
+
+    def block_cost(self, start, worst):
+        """Cycles of a block including the callee for JAL"""
+        block = self.blocks[start]
+        cycles = block['cycles']
+        if block['call'] is not None:
+            best_callee, worst_callee = self.analyze_function(block['call'])
+            callee = worst_callee if worst else best_callee
+            if callee is None:
+                return None
+            cycles += callee
+        return cycles
+
+    def depth_first(self, entry):
+        """Iterative DFS returning (post-order, back edges)"""
+        state = {entry: 1}
+        order = []
+        back_edges = []
+        stack = [(entry, iter(self.blocks[entry]['succs']))]
+        while stack:
+            node, successors = stack[-1]
+            for succ in successors:
+                if state.get(succ) == 1:
+                    back_edges.append((node, succ))
+                elif succ not in state:
+                    state[succ] = 1
+                    stack.append((succ, iter(self.blocks[succ]['succs'])))
+                    break
+            else:
+                state[node] = 2
+                order.append(node)
+                stack.pop()
+        return order, back_edges
+
+    def path_bounds(self, topo, dag_succs, source, nodes, costs, targets):
+        """Shortest and longest DAG path costs from source to any of targets"""
+        best = {source: costs[source][0]}
+        worst = {source: costs[source][1]}
+        for node in topo:
+            if node not in best or node not in nodes:
+                continue
+            for succ in dag_succs[node]:
+                if succ not in nodes:
+                    continue
+                b = best[node] + costs[succ][0]
+                w = worst[node] + costs[succ][1]
+                if succ not in best or b < best[succ]:
+                    best[succ] = b
+                if succ not in worst or w > worst[succ]:
+                    worst[succ] = w
+        reached = [t for t in targets if t in best]
+        if not reached:
+            return None, None
+        return min(best[t] for t in reached), max(worst[t] for t in reached)
+
+    def analyze_function(self, entry):
+        """(best, worst) cycles from entry until return or halt; worst None if unbounded"""
+        if entry in self._functions:
+            return self._functions[entry]
+        if entry not in self.blocks:
+            self.warnings.append(f"0x{entry * 4:04X}: call target outside program")
+            return 0, None
+        if entry in self._active:
+            self.warnings.append(f"0x{entry * 4:04X}: recursive call, worst case unbounded")
+            return 0, None
+
+        self._active.add(entry)
+        order, back_edges = self.depth_first(entry)
+        topo = list(reversed(order))
+        back = set(back_edges)
+        dag_succs = {n: [s for s in self.blocks[n]['succs'] if (n, s) not in back] for n in order}
+
+        costs = {}
+        unbounded = False
+        for node in order:
+            best = self.block_cost(node, worst=False)
+            worst = self.block_cost(node, worst=True)
+            if worst is None:
+                unbounded = True
+                worst = 0
+            costs[node] = (best or 0, worst)
+
+        exits = [n for n in order if not self.blocks[n]['succs']]
+        best, worst = self.path_bounds(topo, dag_succs, entry, set(order), costs, exits)
+        if best is None:
+            self.warnings.append(f"0x{entry * 4:04X}: no return or halt reachable")
+            best, worst = 0, None
+
+        # Natural loop of each back edge: header plus nodes reaching the tail
+        preds = {n: [] for n in order}
+        for n in order:
+            for s in self.blocks[n]['succs']:
+                preds[s].append(n)
+        loops = []
+        for tail, header in back_edges:
+            body = {header, tail}
+            work = [tail]
+            while work:
+                node = work.pop()
+                for p in preds[node]:
+                    if p not in body:
+                        body.add(p)
+                        work.append(p)
+            bound = self.loop_bound(tail, header)
+            if bound is None:
+                self.warnings.append(
+                    f"0x{header * 4:04X}: loop closed at 0x{(self.blocks[tail]['end'] - 1) * 4:04X} "
+                    f"has no '# @loop N' bound")
+                unbounded = True
+                continue
+            _, body_worst = self.path_bounds(topo, dag_succs, header, body, costs, [tail])
+            loops.append({'body': body, 'bound': bound, 'cycles': body_worst or 0})
+
+        if worst is not None and not unbounded:
+            for loop in loops:
+                factor = 1
+                for outer in loops:
+                    if outer is not loop and loop['body'] < outer['body']:
+                        factor *= outer['bound'] + 1
+                worst += loop['bound'] * loop['cycles'] * factor
+
+        self._active.discard(entry)
+        result = (best, None if unbounded else worst)
+        self._functions[entry] = result
+        return result
+
+    def analyze(self):
+        """Bounds for the whole program, entered at instruction 0"""
+        if not self.blocks:
+            return {'best': 0, 'worst': 0, 'warnings': []}
+        best, worst = self.analyze_function(0)
+        return {'best': best, 'worst': worst, 'warnings': list(dict.fromkeys(self.warnings))}
+
+    def format_listing(self):
+        """Program listing annotated with per-instruction and per-block cycles"""
+        names = {}
+        for name, pc in self.labels.items():
+            if not name.startswith('.L'):
+                names.setdefault(pc, []).append(name)
+        ids = {start: block['id'] for start, block in self.blocks.items()}
+
+        def block_name(pc):
+            return f"B{ids[pc]}" if pc in ids else f"0x{pc * 4:04X}"
+
+        result = self.analyze()
+        output = []
+        for start in sorted(self.blocks):
+            block = self.blocks[start]
+            edges = ', '.join(block_name(s) for s in block['succs']) or block['kind']
+            call = f"  call {block_name(block['call'])}" if block['call'] is not None else ""
+            output.append(f"; B{block['id']}  [0x{start * 4:04X}-0x{(block['end'] - 1) * 4:04X}]"
+                          f"  {block['cycles']} cycles  -> {edges}{call}")
+            for stmt in self.instructions[block['start']:block['end']]:
+                for name in names.get(stmt['pc'], []):
+                    output.append(f"{name}:")
+                comment = f"  # {stmt['comment']}" if stmt.get('comment') else ""
+                output.append(f"    0x{stmt['pc'] * 4:04X}  {stmt['word']:08X}  "
+                              f"{instruction_cycles(stmt['parts'][0]):2d}  {stmt['source']}{comment}")
+
+        worst = result['worst'] if result['worst'] is not None else "unbounded"
+        output.append(f"; cycles: best {result['best']}, worst {worst}")
+        for warning in result['warnings']:
+            output.append(f"; warning: {warning}")
+        return '\n'.join(output)
+
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Cycle-level model of the MIPS_Multicycle datapath
+Follows the ControlUnit FSM clock by clock and reproduces its control-signal
+vector together with the PC, IR, A/B, ALUOut and MDR registers, the ALU,
+RegisterFile and SignExtender. Per-cycle expectations can be exported as a
+$readmemh file checked by tests/MIPS_Multicycle_Signal_tb.v in one pass.
+
+Usage: python3 datapath_model.py [program.asm | memory.v] [--cycles N]
+                                 [--export expected.hex] [--imem program.hex]
+"""
+
+import argparse
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from advanced_mips_verifier import MIPSProcessor, MIPSVerifier
+from mips_assembler import MIPSAssembler, format_data_image
+
+MASK = 0xFFFFFFFF
+
+# Processor states (definitions.vh)
+STATE_FETCH, STATE_DECODE, STATE_EXECUTE, STATE_MEMORY, STATE_WRITEBACK = range(5)
+STATE_NAMES = ['FETCH', 'DECODE', 'EXECUTE', 'MEMORY', 'WRITEBACK']
+
+# ALU operations (definitions.vh)
+ALU_ADD, ALU_SUB, ALU_OR, ALU_SLT, ALU_LUI = range(5)
+
+# Control vector fields in ControlUnit port order, with bit widths
+SIGNALS = [('alu_ctrl', 3), ('alu_src_a', 2), ('alu_src_b', 2), ('mem_read', 1),
+           ('mem_write', 1), ('reg_write', 1), ('reg_dst', 2), ('mem_to_reg', 2),
+           ('pc_src', 2), ('pc_write', 1), ('pc_write_cond', 1), ('ir_write', 1),
+           ('ext_op', 1)]
+(ALU_CTRL, ALU_SRC_A, ALU_SRC_B, MEM_READ, MEM_WRITE, REG_WRITE, REG_DST,
+ MEM_TO_REG, PC_SRC, PC_WRITE, PC_WRITE_COND, IR_WRITE, EXT_OP) = range(len(SIGNALS))
+
+INSTRUCTION_CLASSES = ['ADDU', 'SUBU', 'SLT', 'JR', 'ORI', 'LW', 'SW', 'BEQ',
+                       'LUI', 'ADDI', 'ADDIU', 'J', 'JAL', 'OTHER']
+
+
+def instruction_class(word: int) -> str:
+    """ControlUnit instruction decode of an IR value"""
+    opcode = (word >> 26) & 0x3F
+    funct = word & 0x3F
+    if opcode == 0x00:
+        return {0x21: 'ADDU', 0x23: 'SUBU', 0x2A: 'SLT', 0x08: 'JR'}.get(funct, 'OTHER')
+    return {0x0D: 'ORI', 0x23: 'LW', 0x2B: 'SW', 0x04: 'BEQ', 0x0F: 'LUI',
+            0x08: 'ADDI', 0x09: 'ADDIU', 0x02: 'J', 0x03: 'JAL'}.get(opcode, 'OTHER')
+
+
+def control_signals(state: int, cls: str) -> tuple:
+    """Combinational control outputs of ControlUnit.v for one state and instruction"""
+    s = [ALU_ADD, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+    if state == STATE_FETCH:
+        s[ALU_SRC_A], s[ALU_SRC_B], s[ALU_CTRL] = 0b00, 0b01, ALU_ADD
+        s[PC_WRITE], s[IR_WRITE], s[PC_SRC] = 1, 1, 0b00
+    elif state == STATE_DECODE:
+        s[ALU_SRC_A], s[ALU_SRC_B], s[ALU_CTRL], s[EXT_OP] = 0b00, 0b11, ALU_ADD, 1
+    elif state == STATE_EXECUTE:
+        if cls in ['ADDU', 'SUBU', 'SLT']:
+            s[ALU_SRC_A], s[ALU_SRC_B] = 0b01, 0b00
+            s[ALU_CTRL] = {'ADDU': ALU_ADD, 'SUBU': ALU_SUB, 'SLT': ALU_SLT}[cls]
+            s[REG_WRITE], s[REG_DST], s[MEM_TO_REG] = 1, 0b01, 0b00
+        elif cls in ['ADDI', 'ADDIU']:
+            s[ALU_SRC_A], s[ALU_SRC_B], s[ALU_CTRL], s[EXT_OP] = 0b01, 0b10, ALU_ADD, 1
+            s[REG_WRITE], s[REG_DST], s[MEM_TO_REG] = 1, 0b00, 0b00
+        elif cls == 'ORI':
+            s[ALU_SRC_A], s[ALU_SRC_B], s[ALU_CTRL], s[EXT_OP] = 0b01, 0b10, ALU_OR, 0
+            s[REG_WRITE], s[REG_DST], s[MEM_TO_REG] = 1, 0b00, 0b00
+        elif cls == 'LUI':
+            s[ALU_SRC_B], s[ALU_CTRL], s[EXT_OP] = 0b10, ALU_LUI, 0
+            s[REG_WRITE], s[REG_DST], s[MEM_TO_REG] = 1, 0b00, 0b00
+        elif cls in ['LW', 'SW']:
+            s[ALU_SRC_A], s[ALU_SRC_B], s[ALU_CTRL], s[EXT_OP] = 0b01, 0b10, ALU_ADD, 1
+        elif cls == 'BEQ':
+            s[ALU_SRC_A], s[ALU_SRC_B], s[ALU_CTRL] = 0b01, 0b00, ALU_SUB
+            s[PC_WRITE_COND], s[PC_SRC] = 1, 0b01
+        elif cls in ['J', 'JAL']:
+            s[PC_WRITE], s[PC_SRC] = 1, 0b10
+            if cls == 'JAL':
+                s[REG_WRITE], s[REG_DST], s[MEM_TO_REG] = 1, 0b10, 0b10
+        elif cls == 'JR':
+            s[PC_WRITE], s[PC_SRC] = 1, 0b11
+    elif state == STATE_MEMORY:
+        if cls == 'LW':
+            s[MEM_READ] = 1
+        elif cls == 'SW':
+            s[MEM_WRITE] = 1
+    elif state == STATE_WRITEBACK:
+        if cls == 'LW':
+            s[REG_WRITE], s[REG_DST], s[MEM_TO_REG] = 1, 0b00, 0b01
+    return tuple(s)
+
+
+def next_state(state: int, cls: str) -> int:
+    """ControlUnit next-state logic"""
+    if state == STATE_FETCH:
+        return STATE_DECODE
+    if state == STATE_DECODE:
+        return STATE_EXECUTE
+    if state == STATE_EXECUTE:
+        return STATE_MEMORY if cls in ['LW', 'SW'] else STATE_FETCH
+    if state == STATE_MEMORY:
+        return STATE_WRITEBACK if cls == 'LW' else STATE_FETCH
+    return STATE_FETCH
+
+
+def pack_signals(signals: tuple) -> int:
+    """Concatenate control fields MSB-first in SIGNALS order"""
+    value = 0
+    for (_, width), field in zip(SIGNALS, signals):
+        value = (value << width) | field
+    return value
+
+
+def alu(a: int, b: int, ctrl: int) -> int:
+    """ALU.v"""
+    if ctrl == ALU_ADD:
+        return (a + b) & MASK
+    if ctrl == ALU_SUB:
+        return (a - b) & MASK
+    if ctrl == ALU_OR:
+        return a | b
+    if ctrl == ALU_SLT:
+        sa = a - 0x100000000 if a & 0x80000000 else a
+        sb = b - 0x100000000 if b & 0x80000000 else b
+        return 1 if sa < sb else 0
+    if ctrl == ALU_LUI:
+        return (b & 0xFFFF) << 16
+    return 0
+
+
+# Control table and packed vectors for every (state, class) pair
+CONTROL = {(state, cls): control_signals(state, cls)
+           for state in range(5) for cls in INSTRUCTION_CLASSES}
+NEXT_STATE = {(state, cls): next_state(state, cls)
+              for state in range(5) for cls in INSTRUCTION_CLASSES}
+PACKED = {key: (key[0] << 20) | pack_signals(signals) for key, signals in CONTROL.items()}
+
+
+class MulticycleDatapath:
+    """Clock-by-clock model of MIPS_Multicycle with its architectural registers"""
+
+    def __init__(self, program: List[int], data: Optional[Dict[int, int]] = None):
+        self.imem = [0] * 1024
+        for i, word in enumerate(program[:1024]):
+            self.imem[i] = word & MASK
+        self.dmem = [0] * 1024
+        for address, value in (data or {}).items():
+            self.dmem[(address >> 2) & 0x3FF] = value & MASK
+        self._decode_cache = {}
+        self.reset()
+
+    def reset(self):
+        self.state = STATE_FETCH
+        self.pc = 0
+        self.ir = 0
+        self.a = 0
+        self.b = 0
+        self.alu_out = 0
+        self.mdr = 0
+        self.registers = [0] * 32
+        self.cycle = 0
+        self.retired = 0
+
+    def decode(self, ir: int) -> tuple:
+        """IR fields used by the datapath, cached per instruction word"""
+        fields = self._decode_cache.get(ir)
+        if fields is None:
+            imm = ir & 0xFFFF
+            fields = (instruction_class(ir), (ir >> 21) & 0x1F, (ir >> 16) & 0x1F,
+                      (ir >> 11) & 0x1F, imm, (imm | 0xFFFF0000) if imm & 0x8000 else imm,
+                      (ir & 0x3FFFFFF) << 2)
+            self._decode_cache[ir] = fields
+        return fields
+
+    def clock(self) -> int:
+        """Advance one clock edge; returns the packed state/control vector of the cycle"""
+        state = self.state
+        cls, rs, rt, rd, imm_zero, imm_sign, jump_low = self.decode(self.ir)
+        key = (state, cls)
+        s = CONTROL[key]
+
+        # Combinational datapath for the current cycle
+        imm = imm_sign if s[EXT_OP] else imm_zero
+        alu_a = self.a if s[ALU_SRC_A] == 0b01 else self.pc
+        src_b = s[ALU_SRC_B]
+        alu_b = self.b if src_b == 0 else 4 if src_b == 1 else imm if src_b == 2 else (imm << 2) & MASK
+        result = alu(alu_a, alu_b, s[ALU_CTRL])
+
+        # Register updates at the clock edge, all from pre-edge values
+        if s[PC_WRITE] or (s[PC_WRITE_COND] and result == 0):
+            pc_src = s[PC_SRC]
+            if pc_src == 0:
+                next_pc = result
+            elif pc_src == 1:
+                next_pc = self.alu_out
+            elif pc_src == 2:
+                next_pc = (((self.pc + 4) & 0xF0000000) | jump_low) & MASK
+            else:
+                next_pc = self.a
+        else:
+            next_pc = self.pc
+
+        if s[REG_WRITE]:
+            dst = s[REG_DST]
+            write_reg = rt if dst == 0 else rd if dst == 1 else 31
+            to_reg = s[MEM_TO_REG]
+            write_data = self.alu_out if to_reg == 0 else self.mdr if to_reg == 1 else (self.pc + 4) & MASK
+            if write_reg:
+                pending_write = (write_reg, write_data)
+            else:
+                pending_write = None
+        else:
+            pending_write = None
+
+        if s[MEM_WRITE]:
+            self.dmem[(self.alu_out >> 2) & 0x3FF] = self.b
+        if state == STATE_MEMORY:
+            self.mdr = self.dmem[(self.alu_out >> 2) & 0x3FF] if s[MEM_READ] else 0
+        if state == STATE_DECODE:
+            self.a = self.registers[rs] if rs else 0
+            self.b = self.registers[rt] if rt else 0
+        if s[IR_WRITE]:
+            self.ir = self.imem[(self.pc >> 2) & 0x3FF]
+        if pending_write:
+            self.registers[pending_write[0]] = pending_write[1]
+        self.alu_out = result
+        self.pc = next_pc
+        self.state = NEXT_STATE[key]
+        if self.state == STATE_FETCH:
+            self.retired += 1
+        self.cycle += 1
+        return PACKED[key]
+
+    def run(self, cycles: int) -> List[int]:
+        """Clock for a number of cycles; returns (vector << 32 | pc) per cycle"""
+        vectors = []
+        for _ in range(cycles):
+            pc = self.pc
+            vectors.append((self.clock() << 32) | pc)
+        return vectors
+
+    def run_instructions(self, count: int, max_cycles: int = 1 << 62) -> int:
+        """Clock until count instructions have returned to FETCH; returns cycles used"""
+        start = self.cycle
+        target = self.retired + count
+        while self.retired < target and self.cycle - start < max_cycles:
+            self.clock()
+        return self.cycle - start
+
+    def describe(self, vector: int) -> str:
+        """Human-readable form of one exported vector"""
+        pc = vector & MASK
+        packed = vector >> 32
+        state = packed >> 20
+        fields = []
+        shift = 20
+        for name, width in SIGNALS:
+            shift -= width
+            fields.append(f"{name}={(packed >> shift) & ((1 << width) - 1)}")
+        return f"pc={pc:08X} {STATE_NAMES[state]:9} " + ' '.join(fields)
+
+
+def export_expectations(vectors: List[int], path: str):
+    """One 64-bit hex word per cycle: {9'b0, state, control, pc}"""
+    with open(path, 'w') as f:
+        f.write(f"// {len(vectors)} cycles: {{state[2:0], "
+                f"{', '.join(name for name, _ in SIGNALS)}, pc[31:0]}}\n")
+        for vector in vectors:
+            f.write(f"{vector:016X}\n")
+
+
+def export_image(words: List[int], path: str):
+    with open(path, 'w') as f:
+        for word in words:
+            f.write(f"{word:08X}\n")
+
+
+def export_data_image(data: Dict[int, int], path: str):
+    """$readmemh data image for DataMemory (+dmem=FILE)"""
+    with open(path, 'w') as f:
+        f.write(format_data_image(data))
+
+
+def load_program(path: Optional[str], base_path: str) -> Tuple[List[int], Dict[int, int]]:
+    """Instruction words and preloaded data from an .asm file, a memory file or InstructionMemory.v"""
+    if path and os.path.splitext(path)[1] == '.asm':
+        assembler = MIPSAssembler()
+        with open(path, 'r') as f:
+            words = assembler.assemble(f.read())
+        return words, assembler.data
+    processor = MIPSProcessor()
+    if path:
+        with open(path, 'r') as f:
+            processor.load_instructions(f.read().splitlines())
+    else:
+        verifier = MIPSVerifier(base_path)
+        with open(os.path.join(base_path, 'src/InstructionMemory.v'), 'r') as f:
+            verifier.files['src/InstructionMemory.v'] = f.read()
+        processor.load_instructions(verifier.extract_test_instructions())
+    return [word for _, word in processor.instructions], {}
+
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Cycle-level MIPS_Multicycle datapath model")
+    parser.add_argument('program', nargs='?', help="defaults to the program in InstructionMemory.v")
+    parser.add_argument('--cycles', type=int, default=200)
+    parser.add_argument('--export', help="write per-cycle expectations for the signal testbench")
+    parser.add_argument('--imem', help="write the instruction image for $readmemh")
+    parser.add_argument('--dmem', help="write the preloaded data image for $readmemh")
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args()
+
+    try:
+        words, data = load_program(args.program, os.path.dirname(script_dir))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    model = MulticycleDatapath(words, data)
+    vectors = model.run(args.cycles)
+
+    if not args.quiet:
+        for cycle, vector in enumerate(vectors):
+            print(f"{cycle:5d} {model.describe(vector)}")
+        print("\nRegister file:")
+        for i, value in enumerate(model.registers):
+            if value:
+                print(f"  R{i:2d} = {value:08X}")
+    print(f"{args.cycles} cycles, {model.retired} instructions completed")
+
+    if args.export:
+        export_expectations(vectors, args.export)
+        print(f"Expected signals written to: {args.export}")
+    if args.imem:
+        export_image(words, args.imem)
+        print(f"Instruction image written to: {args.imem}")
+    if args.dmem:
+        export_data_image(data, args.dmem)
+        print(f"Data image written to: {args.dmem}")
+
+
+if __name__ == "__main__":
+    main()
@@ -34,13 +34,17 @@ def test_assembler():
     for test_file in test_files:
         if os.path.exists(test_file):
             print(f"  编译 {test_file}...")
-            result = subprocess.run([sys.executable, "tools/mips_assembler.py", test_file], 
+            result = subprocess.run([sys.executable, "tools/mips_assembler.py", "-O", test_file], 
                                   capture_output=True, text=True)
             if result.returncode != 0:
                 print(f"    ❌ 编译失败: {result.stdout}")
                 success = False
             else:
                 print(f"    ✓ 编译成功")
+                # Report line with pseudo-instruction expansion and peephole savings
+                report = [line for line in result.stdout.splitlines() if line.startswith(f"{test_file}: ")]
+                if report:
+                    print(f"    {report[0]}")
         else:
             print(f"  ⚠️  测试文件 {test_file} 不存在")
     
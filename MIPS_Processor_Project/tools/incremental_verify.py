@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+Incremental verification for the MIPS multi-cycle processor
+Builds a job graph from the project files, caches every job result on disk
+keyed by the content hash of its inputs and dependency results, and only
+re-runs the jobs a change can affect. With --watch it polls the tree and
+re-verifies on every save.
+
+Jobs:
+  static:<module>     port/always/signal checks for one src/*.v file
+  encoding            opcode and ALU definitions in definitions.vh
+  image:<program>     assembled image of an .asm file (or InstructionMemory.v)
+  simulate:<program>  MIPSProcessor run of the image
+  compile:signal      iverilog build of the control-signal testbench
+  cosim:<program>     per-cycle comparison of the RTL against datapath_model.py
+
+Tool-dependent jobs list the local-import closure of their tool as inputs.
+Job actions run in this process, so in --watch mode an edit to any tool it
+imports restarts the process before re-running the affected jobs.
+
+Usage: python3 incremental_verify.py [--watch] [--max-steps N] [pattern ...]
+"""
+
+import argparse
+import ast
+import contextlib
+import fnmatch
+import glob
+import hashlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+import check_mips
+from advanced_mips_verifier import MIPSProcessor, MIPSVerifier
+from datapath_model import MulticycleDatapath, export_data_image, export_expectations, export_image
+from mips_assembler import MIPSAssembler
+
+CACHE_DIR = '.verify_cache'
+WATCHED_DIRS = ['src', 'tests', 'examples', 'tools']
+SIGNAL_SOURCES = ['src/definitions.vh', 'src/ALU.v', 'src/RegisterFile.v', 'src/InstructionMemory.v',
+                  'src/DataMemory.v', 'src/SignExtender.v', 'src/ControlUnit.v', 'src/MIPS_Multicycle.v',
+                  'tests/MIPS_Multicycle_Signal_tb.v']
+COSIM_CYCLES = 500
+
+
+class Job:
+    """A named action over input files and the results of other jobs"""
+
+    def __init__(self, name: str, inputs: List[str], action: Callable, deps: List[str] = ()):
+        self.name = name
+        self.inputs = list(inputs)
+        self.action = action
+        self.deps = list(deps)
+
+
+class BuildGraph:
+    """Job graph with a content-addressed result cache"""
+
+    def __init__(self, base_path: str, cache_dir: Optional[str] = CACHE_DIR, max_steps: int = 100000):
+        self.base_path = base_path
+        self.cache_dir = os.path.join(base_path, cache_dir) if cache_dir else None
+        self.max_steps = max_steps
+        self.simulator = shutil.which('iverilog')
+        self.jobs = {}
+        self.hashes = {}
+        self.results = {}
+        self.closures = {}
+        self.discover()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.base_path, name)
+
+    def add(self, job: Job):
+        self.jobs[job.name] = job
+
+    def tool_inputs(self, tool: str) -> List[str]:
+        """A tool and every tools/*.py module it imports, directly or indirectly"""
+        if tool not in self.closures:
+            self.closures[tool] = local_imports(self.base_path, tool)
+        return self.closures[tool]
+
+    def discover(self):
+        """Rebuild the job list from the files currently in the tree"""
+        self.jobs = {}
+        self.closures = {}
+        checker = self.tool_inputs('tools/check_mips.py')
+        for filename in sorted(glob.glob(self.path('src/*.v'))):
+            module = os.path.splitext(os.path.basename(filename))[0]
+            self.add(Job(f'static:{module}', [f'src/{module}.v'] + checker, self.static_check))
+        self.add(Job('encoding', ['src/definitions.vh'] + checker, self.encoding_check))
+
+        programs = [('InstructionMemory', 'src/InstructionMemory.v')]
+        programs += [(os.path.splitext(os.path.basename(f))[0], os.path.relpath(f, self.base_path))
+                     for f in sorted(glob.glob(self.path('examples/*.asm')))]
+        self.add(Job('compile:signal', SIGNAL_SOURCES, self.compile_signal))
+        for program, source in programs:
+            tool = 'tools/mips_assembler.py' if source.endswith('.asm') else 'tools/advanced_mips_verifier.py'
+            self.add(Job(f'image:{program}', [source] + self.tool_inputs(tool), self.build_image))
+            self.add(Job(f'simulate:{program}', self.tool_inputs('tools/advanced_mips_verifier.py'),
+                         self.simulate, [f'image:{program}']))
+            self.add(Job(f'cosim:{program}', self.tool_inputs('tools/datapath_model.py'),
+                         self.cosimulate, [f'image:{program}', 'compile:signal']))
+
+    # ------------------------------------------------------------------
+    # Hashing and cache
+
+    def file_hash(self, name: str) -> str:
+        """SHA-256 of a file, re-read only when its size or mtime changes"""
+        try:
+            stat = os.stat(self.path(name))
+        except OSError:
+            return 'missing'
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = self.hashes.get(name)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        with open(self.path(name), 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        self.hashes[name] = (stamp, digest)
+        return digest
+
+    def job_key(self, job: Job) -> str:
+        """Depends on input contents and dependency *results*, so a change that
+        leaves a dependency's output unchanged stops propagating there"""
+        h = hashlib.sha256(job.name.encode())
+        # The job actions themselves live in this file
+        h.update(self.file_hash('tools/incremental_verify.py').encode())
+        for name in job.inputs:
+            h.update(f'\0{name}\0{self.file_hash(name)}'.encode())
+        for dep in job.deps:
+            h.update(f'\0{dep}\0{self.results[dep]["digest"]}'.encode())
+        if job.name.startswith(('compile:', 'cosim:')):
+            h.update(f'\0{self.simulator}'.encode())
+        if job.name.startswith('simulate:'):
+            h.update(f'\0{self.max_steps}'.encode())
+        return h.hexdigest()
+
+    def cache_load(self, key: str) -> Optional[Dict]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(os.path.join(self.cache_dir, key + '.json'), 'r') as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+        artifact = result.get('artifact')
+        if artifact and not os.path.exists(artifact):
+            return None
+        return result
+
+    def cache_store(self, key: str, result: Dict):
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, key + '.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(result, f)
+        os.replace(path + '.tmp', path)
+
+    # ------------------------------------------------------------------
+    # Scheduling
+
+    def order(self, names: List[str]) -> List[str]:
+        """The named jobs and everything they depend on, dependencies first"""
+        ordered, seen = [], set()
+
+        def visit(name):
+            if name in seen:
+                return
+            seen.add(name)
+            for dep in self.jobs[name].deps:
+                visit(dep)
+            ordered.append(name)
+
+        for name in names:
+            visit(name)
+        return ordered
+
+    def affected(self, changed: List[str]) -> List[str]:
+        """Jobs whose inputs changed, plus everything downstream of them"""
+        changed = set(changed)
+        dirty = set()
+        for name in self.order(list(self.jobs)):
+            job = self.jobs[name]
+            if changed.intersection(job.inputs) or dirty.intersection(job.deps):
+                dirty.add(name)
+        return [name for name in self.jobs if name in dirty]
+
+    def select(self, patterns: List[str]) -> List[str]:
+        if not patterns:
+            return list(self.jobs)
+        return [name for name in self.jobs if any(fnmatch.fnmatch(name, p) for p in patterns)]
+
+    def run(self, names: List[str], report: Callable = None) -> List[Dict]:
+        """Evaluate jobs in dependency order; returns the results of `names`"""
+        for name in self.order(names):
+            job = self.jobs[name]
+            key = self.job_key(job)
+            result = self.cache_load(key)
+            cached = result is not None
+            if not cached:
+                start = time.time()
+                try:
+                    result = job.action(job, [self.results[dep] for dep in job.deps])
+                except Exception as e:
+                    result = {'status': 'fail', 'summary': f'{type(e).__name__}: {e}'}
+                result.setdefault('data', None)
+                result['digest'] = hashlib.sha256(
+                    json.dumps([result['status'], result['data']], sort_keys=True).encode()).hexdigest()
+                result['seconds'] = round(time.time() - start, 4)
+                self.cache_store(key, result)
+            result = dict(result, name=name, cached=cached)
+            self.results[name] = result
+            if report and name in names:
+                report(result)
+        return [self.results[name] for name in names]
+
+    # ------------------------------------------------------------------
+    # Job actions
+
+    def static_check(self, job: Job, deps: List[Dict]) -> Dict:
+        module = job.name.split(':', 1)[1]
+        with open(self.path(job.inputs[0]), 'r', encoding='utf-8') as f:
+            content = f.read()
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            # As in check_mips.py, only the port check is fatal; the counts are informational
+            ok = check_mips.check_module_ports(content, module)
+            check_mips.check_always_blocks(content)
+            check_mips.check_signal_declarations(content)
+        lines = output.getvalue().strip().splitlines()
+        return {'status': 'pass' if ok else 'fail', 'summary': lines[0].lstrip('✓✗ '),
+                'data': output.getvalue()}
+
+    def encoding_check(self, job: Job, deps: List[Dict]) -> Dict:
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            check_mips.check_instruction_encoding(self.path(job.inputs[0]))
+        lines = [line.strip().rstrip('：') for line in output.getvalue().splitlines() if '定义了' in line]
+        return {'status': 'pass' if len(lines) == 2 else 'fail', 'summary': ', '.join(lines),
+                'data': output.getvalue()}
+
+    def build_image(self, job: Job, deps: List[Dict]) -> Dict:
+        source = job.inputs[0]
+        with open(self.path(source), 'r') as f:
+            text = f.read()
+        data = {}
+        if source.endswith('.asm'):
+            assembler = MIPSAssembler()
+            words = assembler.assemble(text)
+            data = {f'{address:X}': f'{word:08X}' for address, word in sorted(assembler.data.items())}
+        else:
+            verifier = MIPSVerifier(self.base_path)
+            verifier.files[source] = text
+            processor = MIPSProcessor()
+            processor.load_instructions(verifier.extract_test_instructions())
+            words = [word for _, word in processor.instructions]
+        if not words:
+            return {'status': 'fail', 'summary': 'no instructions'}
+        summary = f'{len(words)} words' + (f', {len(data)} data words' if data else '')
+        return {'status': 'pass', 'summary': summary,
+                'data': {'words': [f'{word:08X}' for word in words], 'dmem': data}}
+
+    def simulate(self, job: Job, deps: List[Dict]) -> Dict:
+        image = deps[0]
+        if image['status'] != 'pass':
+            return {'status': 'skip', 'summary': 'image failed'}
+        processor = MIPSProcessor()
+        words, data = image_contents(image)
+        processor.load_program(words)
+        processor.load_memory(data)
+        steps = processor.run(self.max_steps)
+        halted = steps < self.max_steps
+        registers = {f'${i}': f'{value:08X}' for i, value in enumerate(processor.registers) if value}
+        memory = {f'{address:X}': f'{value:08X}' for address, value in sorted(processor.memory.items())}
+        return {'status': 'pass',
+                'summary': f'{steps} instructions, ' + ('halted' if halted else 'step limit reached'),
+                'data': {'steps': steps, 'pc': processor.pc, 'registers': registers, 'memory': memory}}
+
+    def compile_signal(self, job: Job, deps: List[Dict]) -> Dict:
+        if not self.simulator:
+            return {'status': 'skip', 'summary': 'iverilog not found'}
+        os.makedirs(self.cache_dir or tempfile.gettempdir(), exist_ok=True)
+        binary = os.path.join(self.cache_dir or tempfile.gettempdir(),
+                              'mips_signal-' + self.job_key(job)[:12])
+        process = subprocess.run([self.simulator, '-I', self.path('src'), '-o', binary]
+                                 + [self.path(name) for name in SIGNAL_SOURCES],
+                                 capture_output=True, text=True)
+        if process.returncode != 0:
+            return {'status': 'fail', 'summary': (process.stderr or process.stdout).strip()[:500]}
+        with open(binary, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        return {'status': 'pass', 'summary': 'compiled', 'data': digest, 'artifact': binary}
+
+    def cosimulate(self, job: Job, deps: List[Dict]) -> Dict:
+        image, compiled = deps
+        if compiled['status'] != 'pass' or image['status'] != 'pass':
+            return {'status': 'skip', 'summary': compiled['summary'] if compiled['status'] != 'pass'
+                    else 'image failed'}
+        words, data = image_contents(image)
+        with tempfile.TemporaryDirectory() as tmp:
+            imem = os.path.join(tmp, 'imem.hex')
+            dmem = os.path.join(tmp, 'dmem.hex')
+            expected = os.path.join(tmp, 'expected.hex')
+            export_image(words, imem)
+            export_data_image(data, dmem)
+            export_expectations(MulticycleDatapath(words, data).run(COSIM_CYCLES), expected)
+            process = subprocess.run(['vvp', compiled['artifact'], f'+imem={imem}', f'+dmem={dmem}',
+                                      f'+expected={expected}', f'+cycles={COSIM_CYCLES}'],
+                                     capture_output=True, text=True)
+        lines = [line for line in process.stdout.splitlines() if line.startswith(('PASS', 'FAIL'))]
+        summary = lines[-1] if lines else (process.stderr or process.stdout).strip()[:500]
+        return {'status': 'pass' if summary.startswith('PASS') else 'fail', 'summary': summary}
+
+
+def local_imports(base_path: str, tool: str) -> List[str]:
+    """Sorted tools/*.py paths reachable from a tool through import statements"""
+    closure = set()
+    pending = [tool]
+    while pending:
+        name = pending.pop()
+        if name in closure:
+            continue
+        closure.add(name)
+        try:
+            with open(os.path.join(base_path, name), 'r', encoding='utf-8') as f:
+                tree = ast.parse(f.read())
+        except (OSError, SyntaxError, ValueError):
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom):
+                modules = [node.module] if node.module else [alias.name for alias in node.names]
+            else:
+                continue
+            for module in modules:
+                candidate = f"tools/{module.split('.')[-1]}.py"
+                if os.path.exists(os.path.join(base_path, candidate)):
+                    pending.append(candidate)
+    return sorted(closure)
+
+
+def image_contents(image: Dict):
+    """Instruction words and data (byte address -> word) of an image job result"""
+    contents = image['data']
+    return ([int(word, 16) for word in contents['words']],
+            {int(address, 16): int(word, 16) for address, word in contents['dmem'].items()})
+
+
+def snapshot(base_path: str) -> Dict[str, tuple]:
+    """(mtime, size) of every file under the watched directories"""
+    files = {}
+    for directory in WATCHED_DIRS:
+        for root, dirs, names in os.walk(os.path.join(base_path, directory)):
+            dirs[:] = [d for d in dirs if d != '__pycache__']
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files[os.path.relpath(path, base_path)] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def print_result(result: Dict):
+    icon = {'pass': '✓', 'fail': '✗', 'skip': '-'}[result['status']]
+    origin = 'cached' if result['cached'] else f"{result['seconds']:.3f}s"
+    print(f"  {icon} {result['name']:<28} {result['summary']}  ({origin})")
+
+
+def print_summary(results: List[Dict], elapsed: float) -> bool:
+    failed = sum(1 for r in results if r['status'] == 'fail')
+    ran = sum(1 for r in results if not r['cached'])
+    skipped = sum(1 for r in results if r['status'] == 'skip')
+    print(f"{len(results)} jobs: {ran} run, {len(results) - ran} cached, "
+          f"{failed} failed, {skipped} skipped ({elapsed:.2f}s)")
+    return failed == 0
+
+
+def restart(changed: List[str]):
+    """Re-exec with the same arguments so edited tool modules are imported afresh"""
+    print(f"\n[{time.strftime('%H:%M:%S')}] changed: {', '.join(changed)}; restarting")
+    sys.stdout.flush()
+    os.execv(sys.executable, [sys.executable] + sys.argv)
+
+
+def watch(graph: BuildGraph, patterns: List[str], interval: float):
+    """Poll the tree and re-run the jobs affected by each change"""
+    print(f"Watching {', '.join(WATCHED_DIRS)} (Ctrl-C to stop)")
+    # Job actions call into these modules, which are imported only once
+    loaded = set(local_imports(graph.base_path, 'tools/incremental_verify.py'))
+    previous = snapshot(graph.base_path)
+    while True:
+        time.sleep(interval)
+        current = snapshot(graph.base_path)
+        if current == previous:
+            continue
+        changed = sorted(name for name in set(current) | set(previous)
+                         if current.get(name) != previous.get(name))
+        if loaded.intersection(changed):
+            restart(changed)
+        if set(current) != set(previous):
+            graph.discover()
+        previous = current
+        selected = set(graph.select(patterns))
+        names = [name for name in graph.affected(changed) if name in selected]
+        print(f"\n[{time.strftime('%H:%M:%S')}] changed: {', '.join(changed)}")
+        if not names:
+            print("  no affected jobs")
+            continue
+        start = time.time()
+        results = graph.run(names, print_result)
+        print_summary(results, time.time() - start)
+
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Incremental MIPS verification with a result cache")
+    parser.add_argument('patterns', nargs='*', help="job name patterns, e.g. 'simulate:*'")
+    parser.add_argument('--watch', action='store_true', help="re-run affected jobs when files change")
+    parser.add_argument('--interval', type=float, default=0.2, help="watch polling interval in seconds")
+    parser.add_argument('--max-steps', type=int, default=100000)
+    parser.add_argument('--no-cache', action='store_true', help="ignore and do not write the disk cache")
+    parser.add_argument('--list', action='store_true', help="print the job graph and exit")
+    args = parser.parse_args()
+
+    graph = BuildGraph(os.path.dirname(script_dir), None if args.no_cache else CACHE_DIR, args.max_steps)
+    names = graph.select(args.patterns)
+    if not names:
+        print(f"No jobs match: {' '.join(args.patterns)}")
+        sys.exit(1)
+
+    if args.list:
+        for name in names:
+            job = graph.jobs[name]
+            print(f"{name:<28} inputs: {', '.join(job.inputs)}"
+                  + (f"  deps: {', '.join(job.deps)}" if job.deps else ""))
+        return
+
+    start = time.time()
+    results = graph.run(names, print_result)
+    ok = print_summary(results, time.time() - start)
+
+    if args.watch:
+        try:
+            watch(graph, args.patterns, args.interval)
+        except KeyboardInterrupt:
+            print()
+    elif not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
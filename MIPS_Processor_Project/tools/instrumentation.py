@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Timing instrumentation for the MIPS tools
+Named spans (timed with perf_counter_ns, nestable) and counters, exported as a
+JSON summary or in Chrome trace-event format (chrome://tracing, Perfetto).
+
+Disabled by default. While disabled span() returns a shared no-op context
+manager and count() returns immediately; hot loops are never instrumented
+per iteration, their totals are counted once after the loop.
+
+Enable from the environment, e.g. for nightly runs:
+  MIPS_INSTRUMENT=summary.json             JSON summary at exit
+  MIPS_INSTRUMENT=chrome:trace.json        Chrome trace events at exit
+  MIPS_INSTRUMENT=-                        summary table on stderr
+  MIPS_INSTRUMENT=summary.json,chrome:t.json
+
+or from code with enable() / export_json() / export_chrome_trace().
+
+Usage: python3 instrumentation.py summary.json [...]   (print saved summaries)
+"""
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+ENV_VARIABLE = 'MIPS_INSTRUMENT'
+
+enabled = False
+_origin_ns = time.perf_counter_ns()
+_spans = []     # (name, start_ns, duration_ns, thread id, args)
+_counters = {}  # name -> total
+_samples = []   # (name, time_ns, running total) for trace-event counters
+
+
+class _NullSpan:
+    """Context manager used while instrumentation is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('name', 'args', 'start')
+
+    def __init__(self, name: str, args: Dict):
+        self.name = name
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        _spans.append((self.name, self.start, end - self.start, threading.get_ident(), self.args))
+        return False
+
+
+def span(name: str, **args):
+    """Time a block: with span('execute', program=path): ..."""
+    if not enabled:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def count(name: str, value: int = 1):
+    """Add to a named counter"""
+    if not enabled:
+        return
+    total = _counters.get(name, 0) + value
+    _counters[name] = total
+    _samples.append((name, time.perf_counter_ns(), total))
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    """Drop everything recorded so far"""
+    global _origin_ns
+    _origin_ns = time.perf_counter_ns()
+    _spans.clear()
+    _counters.clear()
+    _samples.clear()
+
+
+def summary() -> Dict:
+    """Per-span call count and time statistics plus counter totals"""
+    stats = {}
+    for name, _, duration, _, _ in _spans:
+        entry = stats.get(name)
+        if entry is None:
+            stats[name] = entry = {'count': 0, 'total_ns': 0, 'min_ns': duration, 'max_ns': duration}
+        entry['count'] += 1
+        entry['total_ns'] += duration
+        entry['min_ns'] = min(entry['min_ns'], duration)
+        entry['max_ns'] = max(entry['max_ns'], duration)
+    spans = {}
+    for name, entry in sorted(stats.items()):
+        spans[name] = {'count': entry['count'],
+                       'total_ms': entry['total_ns'] / 1e6,
+                       'mean_ms': entry['total_ns'] / entry['count'] / 1e6,
+                       'min_ms': entry['min_ns'] / 1e6,
+                       'max_ms': entry['max_ns'] / 1e6}
+    return {'command': ' '.join(sys.argv), 'pid': os.getpid(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'spans': spans, 'counters': dict(sorted(_counters.items()))}
+
+
+def trace_events() -> List[Dict]:
+    """Chrome trace events: one complete ('X') event per span, counter ('C') samples"""
+    pid = os.getpid()
+    threads = {}
+    events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+               'args': {'name': os.path.basename(sys.argv[0]) or 'python'}}]
+    for name, start, duration, thread, args in _spans:
+        event = {'name': name, 'cat': name.split('.')[0], 'ph': 'X', 'pid': pid,
+                 'tid': threads.setdefault(thread, len(threads)),
+                 'ts': (start - _origin_ns) / 1e3, 'dur': duration / 1e3}
+        if args:
+            event['args'] = args
+        events.append(event)
+    for name, at, total in _samples:
+        events.append({'name': name, 'ph': 'C', 'pid': pid, 'tid': 0,
+                       'ts': (at - _origin_ns) / 1e3, 'args': {'value': total}})
+    return events
+
+
+def export_json(path: str):
+    with open(path, 'w') as f:
+        json.dump(summary(), f, indent=2)
+
+
+def export_chrome_trace(path: str):
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': trace_events(), 'displayTimeUnit': 'ms'}, f, default=str)
+
+
+def format_summary(data: Optional[Dict] = None) -> str:
+    data = data or summary()
+    lines = [f"Instrumentation: {data['command']}",
+             f"  {'span':<28} {'calls':>7} {'total ms':>10} {'mean ms':>10} {'max ms':>10}"]
+    for name, entry in sorted(data['spans'].items(), key=lambda item: -item[1]['total_ms']):
+        lines.append(f"  {name:<28} {entry['count']:>7} {entry['total_ms']:>10.3f} "
+                     f"{entry['mean_ms']:>10.3f} {entry['max_ms']:>10.3f}")
+    if data['counters']:
+        lines.append(f"  {'counter':<28} {'total':>7}")
+        for name, total in data['counters'].items():
+            lines.append(f"  {name:<28} {total:>7}")
+    return '\n'.join(lines)
+
+
+def write_outputs(targets: List[str]):
+    """Write each configured output: '-', 'chrome:PATH' or a JSON summary PATH (absolute paths)"""
+    for target in targets:
+        try:
+            if target == '-':
+                print(format_summary(), file=sys.stderr)
+            elif target.startswith('chrome:'):
+                export_chrome_trace(target[len('chrome:'):])
+            else:
+                export_json(target)
+        except OSError as e:
+            print(f"Instrumentation: cannot write {target}: {e}", file=sys.stderr)
+
+
+def configure_from_environment():
+    targets = []
+    for target in os.environ.get(ENV_VARIABLE, '').split(','):
+        target = target.strip()
+        # Resolve now: tools such as check_mips.py change directory before exiting
+        if target.startswith('chrome:'):
+            targets.append('chrome:' + os.path.abspath(target[len('chrome:'):]))
+        elif target and target != '-':
+            targets.append(os.path.abspath(target))
+        elif target:
+            targets.append(target)
+    if targets:
+        enable()
+        atexit.register(write_outputs, targets)
+
+
+configure_from_environment()
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(f"Usage: {ENV_VARIABLE}=summary.json python3 <tool> ...; "
+              f"python3 instrumentation.py summary.json [...]")
+        sys.exit(1)
+    for path in sys.argv[1:]:
+        try:
+            with open(path, 'r') as f:
+                print(format_summary(json.load(f)))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error: {path}: {e}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
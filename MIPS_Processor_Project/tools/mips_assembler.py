@@ -1,24 +1,71 @@
 #!/usr/bin/env python3
 """
 Simple MIPS Assembler for the multi-cycle processor
-Supports the 13 instructions implemented in the processor
+Supports the 13 instructions implemented in the processor, a set of
+pseudo-instructions, .text/.data sections with a preloaded data image
+and an optional peephole optimizer
 """
 
+import argparse
 import re
 import sys
 
+import instrumentation
+
+# Clock cycles spent per instruction by the ControlUnit FSM:
+# FETCH -> DECODE -> EXECUTE for most instructions, SW adds MEMORY,
+# LW adds MEMORY and WRITEBACK
+INSTRUCTION_CYCLES = {'lw': 5, 'sw': 4}
+DEFAULT_CYCLES = 3
+
+# Real instructions that only write a register and have no other effect
+PURE_WRITE_OPS = ['addu', 'subu', 'slt', 'addi', 'addiu', 'ori', 'lui', 'lw']
+
+PSEUDO_INSTRUCTIONS = ['nop', 'move', 'li', 'la', 'b', 'beqz', 'bnez',
+                       'bne', 'blt', 'bge', 'bgt', 'ble']
+
+# Section directives; data is laid out from byte address 0 of DataMemory
+DIRECTIVES = ['.text', '.data', '.word', '.space', '.align']
+DATA_MEMORY_BYTES = 4096
+
+
+def format_parts(parts):
+    """Render instruction parts back into assembly syntax"""
+    if len(parts) == 1:
+        return parts[0]
+    return f"{parts[0]} {', '.join(parts[1:])}"
+
+
+def format_data_image(data):
+    """$readmemh text for a byte address -> word mapping, @word-address markers between runs"""
+    output = [f"// Data image: {len(data)} words"]
+    next_index = None
+    for address in sorted(data):
+        index = address >> 2
+        if index != next_index:
+            output.append(f"@{index:X}")
+        output.append(f"{data[address]:08X}")
+        next_index = index + 1
+    return '\n'.join(output) + '\n'
+
+
+def instruction_cycles(op):
+    """Return the number of clock cycles the FSM spends on an instruction"""
+    return INSTRUCTION_CYCLES.get(op, DEFAULT_CYCLES)
+
+
 class MIPSAssembler:
-    def __init__(self):
+    def __init__(self, optimize=False):
         # Instruction encodings
         self.opcodes = {
             'addi': 0x08, 'addiu': 0x09, 'ori': 0x0D, 'lui': 0x0F,
             'lw': 0x23, 'sw': 0x2B, 'beq': 0x04, 'j': 0x02, 'jal': 0x03
         }
-        
+
         self.r_type_funcs = {
             'addu': 0x21, 'subu': 0x23, 'slt': 0x2A, 'jr': 0x08
         }
-        
+
         # Register mappings
         self.registers = {
             '$zero': 0, '$0': 0, '$at': 1, '$1': 1,
@@ -38,10 +85,16 @@ class MIPSAssembler:
             '$gp': 28, '$28': 28, '$sp': 29, '$29': 29,
             '$fp': 30, '$30': 30, '$ra': 31, '$31': 31
         }
-        
+
+        self.optimize = optimize
         self.labels = {}
+        self.data_labels = {}  # Data label -> byte address
+        self.data = {}  # Byte address -> word of the data image
+        self.data_items = []
         self.instructions = []
-    
+        self.stats = {}
+        self._label_counter = 0
+
     def parse_register(self, reg_str):
         """Parse register string and return register number"""
         reg_str = reg_str.strip().rstrip(',')
@@ -49,47 +102,355 @@ class MIPSAssembler:
             return self.registers[reg_str]
         else:
             raise ValueError(f"Unknown register: {reg_str}")
-    
+
     def parse_immediate(self, imm_str):
         """Parse immediate value"""
         imm_str = imm_str.strip().rstrip(',')
-        if imm_str.startswith('0x'):
+        if imm_str.lstrip('-').startswith('0x'):
             return int(imm_str, 16)
         elif imm_str in self.labels:
             return self.labels[imm_str]
+        elif imm_str in self.data_labels:
+            return self.data_labels[imm_str]
         else:
             return int(imm_str)
-    
+
+    def symbol_value(self, text):
+        """Byte address of a data or code label with an optional +/- offset, or a number"""
+        match = re.fullmatch(r'([A-Za-z_.][\w.]*)([+-](?:0x[0-9A-Fa-f]+|\d+))?', text.strip())
+        if match and (match.group(1) in self.data_labels or match.group(1) in self.labels):
+            name, offset = match.groups()
+            base = self.data_labels[name] if name in self.data_labels else self.labels[name] * 4
+            return base + (int(offset, 0) if offset else 0)
+        return self.parse_immediate(text)
+
     def parse_offset(self, offset_str):
-        """Parse offset(register) format"""
-        match = re.match(r'(-?\d+)\((\$\w+)\)', offset_str.strip())
+        """Parse offset(register) format; the offset may be a label, label+N or a number"""
+        match = re.match(r'(-?(?:0x[0-9A-Fa-f]+|\d+)|[A-Za-z_.][\w.]*(?:[+-](?:0x[0-9A-Fa-f]+|\d+))?)'
+                         r'\((\$\w+)\)', offset_str.strip())
         if match:
-            offset = int(match.group(1))
+            offset = self.symbol_value(match.group(1))
             reg = self.parse_register(match.group(2))
             return offset, reg
         else:
             raise ValueError(f"Invalid offset format: {offset_str}")
-    
-    def first_pass(self, lines):
-        """First pass: collect labels"""
-        pc = 0
-        for line in lines:
+
+    def parse_source(self, lines):
+        """Split source lines into a stream of label and instruction statements"""
+        statements = []
+        for line_no, raw in enumerate(lines, 1):
+            line, _, comment = raw.partition('#')
             line = line.strip()
-            if not line or line.startswith('#'):
+
+            # Leading labels, possibly several on one line
+            while True:
+                match = re.match(r'([A-Za-z_.][\w.]*)\s*:', line)
+                if not match:
+                    break
+                statements.append({'kind': 'label', 'name': match.group(1), 'line': line_no})
+                line = line[match.end():].strip()
+
+            if not line:
                 continue
-            
-            if ':' in line:
-                label = line.split(':')[0].strip()
-                self.labels[label] = pc
-                line = line.split(':', 1)[1].strip()
-            
-            if line and not line.startswith('#'):
+
+            parts = re.split(r'[,\s]+', line)
+            parts = [p.strip() for p in parts if p.strip()]
+            parts[0] = parts[0].lower()
+            statements.append({
+                'kind': 'instr', 'parts': parts, 'line': line_no,
+                'source': line, 'comment': comment.strip()
+            })
+        return statements
+
+    def new_label(self, prefix):
+        """Create a unique assembler-internal label"""
+        self._label_counter += 1
+        return f".L{prefix}{self._label_counter}"
+
+    def expand_li(self, reg, value):
+        """Cheapest real-instruction sequence loading a 32-bit constant"""
+        value &= 0xFFFFFFFF
+        signed = value - 0x100000000 if value & 0x80000000 else value
+        if -0x8000 <= signed <= 0x7FFF:
+            return [['addiu', reg, '$zero', str(signed)]]
+        if value <= 0xFFFF:
+            return [['ori', reg, '$zero', hex(value)]]
+        if value & 0xFFFF == 0:
+            return [['lui', reg, hex(value >> 16)]]
+        return [['lui', reg, hex(value >> 16)], ['ori', reg, reg, hex(value & 0xFFFF)]]
+
+    def expand_pseudo(self, parts):
+        """Expand one pseudo-instruction; returns statements without line info"""
+        op = parts[0]
+        result = []
+
+        def instr(*p):
+            result.append({'kind': 'instr', 'parts': list(p)})
+
+        def branch_if_nonzero(reg, target):
+            # No BNE in this ISA: skip over an unconditional jump when zero
+            skip = self.new_label('skip')
+            instr('beq', reg, '$zero', skip)
+            instr('j', target)
+            result.append({'kind': 'label', 'name': skip})
+
+        if op == 'nop':
+            instr('nop')
+        elif op == 'move':
+            instr('addu', parts[1], parts[2], '$zero')
+        elif op == 'li':
+            try:
+                value = self.parse_immediate(parts[2])
+            except ValueError:
+                value = None
+            if value is None:
+                instr('la', parts[1], parts[2])
+            else:
+                for p in self.expand_li(parts[1], value):
+                    instr(*p)
+        elif op == 'la':
+            instr('la', parts[1], parts[2])
+        elif op == 'b':
+            instr('beq', '$zero', '$zero', parts[1])
+        elif op == 'beqz':
+            instr('beq', parts[1], '$zero', parts[2])
+        elif op == 'bnez':
+            branch_if_nonzero(parts[1], parts[2])
+        elif op == 'bne':
+            skip = self.new_label('skip')
+            instr('beq', parts[1], parts[2], skip)
+            instr('j', parts[3])
+            result.append({'kind': 'label', 'name': skip})
+        elif op in ['blt', 'bgt']:
+            rs, rt = (parts[1], parts[2]) if op == 'blt' else (parts[2], parts[1])
+            instr('slt', '$at', rs, rt)
+            branch_if_nonzero('$at', parts[3])
+        elif op in ['bge', 'ble']:
+            rs, rt = (parts[1], parts[2]) if op == 'bge' else (parts[2], parts[1])
+            instr('slt', '$at', rs, rt)
+            instr('beq', '$at', '$zero', parts[3])
+        return result
+
+    def expand_program(self, statements):
+        """Replace pseudo-instructions with real instruction sequences"""
+        expanded = []
+        pseudo_count = 0
+        for stmt in statements:
+            if stmt['kind'] != 'instr' or stmt['parts'][0] not in PSEUDO_INSTRUCTIONS:
+                expanded.append(stmt)
+                continue
+
+            pseudo_count += 1
+            for new in self.expand_pseudo(stmt['parts']):
+                new['line'] = stmt['line']
+                if new['kind'] == 'instr':
+                    new['source'] = format_parts(new['parts'])
+                    new['comment'] = stmt['comment']
+                    new['pseudo'] = stmt['source']
+                expanded.append(new)
+
+        self.stats['pseudo_expanded'] = pseudo_count
+        return expanded
+
+    def layout_data(self, statements):
+        """Lay out .data sections; returns the text statements and records data labels"""
+        self.data_labels = {}
+        self.data_items = []  # (address, value expression, line)
+        text = []
+        section = 'text'
+        address = 0
+        pending = []  # Data labels waiting for the next (aligned) allocation
+
+        def place_labels():
+            for stmt in pending:
+                if stmt['name'] in self.data_labels:
+                    raise ValueError(f"Line {stmt['line']}: duplicate label {stmt['name']}")
+                self.data_labels[stmt['name']] = address
+            pending.clear()
+
+        def number(directive, args, line):
+            """The single integer argument of a directive"""
+            if len(args) != 1:
+                raise ValueError(f"Line {line}: {directive} takes one argument")
+            try:
+                return int(args[0], 0)
+            except ValueError:
+                raise ValueError(f"Line {line}: invalid {directive} argument: {args[0]}") from None
+
+        for stmt in statements:
+            if stmt['kind'] == 'instr' and stmt['parts'][0].startswith('.'):
+                directive, args, line = stmt['parts'][0], stmt['parts'][1:], stmt['line']
+                if directive not in DIRECTIVES:
+                    raise ValueError(f"Line {line}: unknown directive {directive}")
+                if directive == '.text':
+                    place_labels()
+                    section = 'text'
+                    continue
+                if directive == '.data':
+                    place_labels()
+                    section = 'data'
+                    if args:
+                        address = number(directive, args, line)
+                    continue
+                if section != 'data':
+                    raise ValueError(f"Line {line}: {directive} is only allowed in .data")
+                if directive == '.word':
+                    address = (address + 3) & ~3
+                    place_labels()
+                    for arg in args:
+                        self.data_items.append((address, arg, line))
+                        address += 4
+                elif directive == '.space':
+                    place_labels()
+                    address += number(directive, args, line)
+                else:  # .align n: next allocation on a 2**n byte boundary
+                    alignment = 1 << number(directive, args, line)
+                    address = (address + alignment - 1) & -alignment
+                if address > DATA_MEMORY_BYTES:
+                    raise ValueError(f"Line {line}: data exceeds the {DATA_MEMORY_BYTES}-byte DataMemory")
+            elif section == 'data':
+                if stmt['kind'] != 'label':
+                    raise ValueError(f"Line {stmt['line']}: instruction in .data section")
+                pending.append(stmt)
+            else:
+                text.append(stmt)
+        place_labels()
+        return text
+
+    def resolve_data(self):
+        """Evaluate .word values once code labels are final"""
+        self.data = {}
+        for address, expression, line in self.data_items:
+            try:
+                self.data[address] = self.symbol_value(expression) & 0xFFFFFFFF
+            except ValueError as e:
+                raise ValueError(f"Line {line}: {e}") from e
+        return self.data
+
+    def layout(self, statements):
+        """Assign instruction indices and collect labels"""
+        self.labels = {}
+        pc = 0
+        for stmt in statements:
+            if stmt['kind'] == 'label':
+                if stmt['name'] in self.labels or stmt['name'] in self.data_labels:
+                    raise ValueError(f"Line {stmt['line']}: duplicate label {stmt['name']}")
+                self.labels[stmt['name']] = pc
+            else:
+                stmt['pc'] = pc
                 pc += 1
-    
+        return pc
+
+    def first_pass(self, lines):
+        """First pass: lay out data, collect labels"""
+        with instrumentation.span('assemble.parse'):
+            statements = self.parse_source(lines)
+        with instrumentation.span('assemble.data'):
+            statements = self.layout_data(statements)
+        with instrumentation.span('assemble.expand'):
+            statements = self.expand_program(statements)
+        with instrumentation.span('assemble.labels'):
+            self.layout(statements)
+        return statements
+
+    def control_targets_are_symbolic(self, statements):
+        """True if every branch and jump names its target by label"""
+        for stmt in statements:
+            if stmt['kind'] != 'instr':
+                continue
+            op = stmt['parts'][0]
+            if op == 'beq' and stmt['parts'][3] not in self.labels:
+                return False
+            if op in ['j', 'jal'] and stmt['parts'][1] not in self.labels:
+                return False
+        return True
+
+    def is_redundant(self, stmt, prev, next_labels):
+        """Peephole rules: does this instruction have no architectural effect?
+
+        next_labels holds the labels between this instruction and the next one.
+        """
+        parts = stmt['parts']
+        op = parts[0]
+
+        if op == 'nop':
+            return True
+        # Control flow that lands on the next instruction anyway
+        if op == 'beq' and parts[3] in next_labels:
+            return True
+        if op == 'j' and parts[1] in next_labels:
+            return True
+        if op not in PURE_WRITE_OPS:
+            return False
+
+        dest = self.parse_register(parts[1])
+        if dest == 0:
+            return True
+
+        # Identity operations: x = x + 0, x = x | 0, x = x - 0
+        if op in ['addi', 'addiu', 'ori'] and self.parse_register(parts[2]) == dest \
+                and self.parse_immediate(parts[3]) == 0:
+            return True
+        if op in ['addu', 'subu']:
+            rs, rt = self.parse_register(parts[2]), self.parse_register(parts[3])
+            if (rs, rt) == (dest, 0) or (op == 'addu' and (rs, rt) == (0, dest)):
+                return True
+
+        if prev is None:
+            return False
+        # Reload of a value that was just stored from the same register
+        if op == 'lw' and prev['parts'][0] == 'sw' and prev['parts'][1:] == parts[1:]:
+            return True
+        # Repeating an instruction whose result does not feed its own inputs
+        if prev['parts'] == parts and op != 'lw':
+            sources = [self.parse_register(p) for p in parts[2:] if p.startswith('$')]
+            if dest not in sources:
+                return True
+        return False
+
+    def peephole(self, statements):
+        """Remove redundant instructions in one forward pass over a worklist
+
+        Removing an instruction can only change the verdict for the instruction
+        kept just before it (its fall-through target or its successor moved), so
+        that one is pushed back onto the worklist and examined again.
+        """
+        removed = []
+        if not self.control_targets_are_symbolic(statements):
+            self.stats['peephole_skipped'] = "numeric branch/jump targets"
+            return statements, removed
+
+        pending = statements[::-1]
+        kept = []
+        while pending:
+            stmt = pending.pop()
+            if stmt['kind'] == 'label':
+                kept.append(stmt)
+                continue
+            # Another path may enter at a label, so only an adjacent instruction counts as prev
+            prev = kept[-1] if kept and kept[-1]['kind'] == 'instr' else None
+            next_labels = set()
+            for following in reversed(pending):
+                if following['kind'] != 'label':
+                    break
+                next_labels.add(following['name'])
+            if not self.is_redundant(stmt, prev, next_labels):
+                kept.append(stmt)
+                continue
+            removed.append(stmt)
+            # Re-examine the last kept instruction together with any labels after it
+            while kept and kept[-1]['kind'] == 'label':
+                pending.append(kept.pop())
+            if kept:
+                pending.append(kept.pop())
+
+        self.layout(kept)
+        return kept, removed
+
     def assemble_r_type(self, parts):
         """Assemble R-type instruction"""
         op = parts[0]
-        
+
         if op == 'jr':
             rs = self.parse_register(parts[1])
             return (0 << 26) | (rs << 21) | (0 << 16) | (0 << 11) | (0 << 6) | self.r_type_funcs[op]
@@ -98,15 +459,21 @@ class MIPSAssembler:
             rs = self.parse_register(parts[2])
             rt = self.parse_register(parts[3])
             return (0 << 26) | (rs << 21) | (rt << 16) | (rd << 11) | (0 << 6) | self.r_type_funcs[op]
-    
+
     def assemble_i_type(self, parts, pc):
         """Assemble I-type instruction"""
         op = parts[0]
         opcode = self.opcodes[op]
-        
+
         if op in ['lw', 'sw']:
             rt = self.parse_register(parts[1])
-            offset, rs = self.parse_offset(parts[2])
+            if '(' in parts[2]:
+                offset, rs = self.parse_offset(parts[2])
+            else:
+                # Bare label: absolute address relative to $zero
+                offset, rs = self.symbol_value(parts[2]), 0
+            if not -0x8000 <= offset <= 0x7FFF:
+                raise ValueError(f"Offset {offset} does not fit in 16 signed bits")
             return (opcode << 26) | (rs << 21) | (rt << 16) | (offset & 0xFFFF)
         elif op == 'beq':
             rs = self.parse_register(parts[1])
@@ -128,44 +495,39 @@ class MIPSAssembler:
             else:
                 imm = self.parse_immediate(parts[3])
             return (opcode << 26) | (rs << 21) | (rt << 16) | (imm & 0xFFFF)
-    
+
     def assemble_j_type(self, parts):
         """Assemble J-type instruction"""
         op = parts[0]
         opcode = self.opcodes[op]
-        
+
         if parts[1] in self.labels:
             target = self.labels[parts[1]]
         else:
             target = self.parse_immediate(parts[1])
-        
+
         return (opcode << 26) | (target & 0x3FFFFFF)
-    
-    def assemble_line(self, line, pc):
-        """Assemble a single line"""
-        line = line.strip()
-        if not line or line.startswith('#'):
-            return None
-        
-        # Remove label if present
-        if ':' in line:
-            line = line.split(':', 1)[1].strip()
-        
-        if not line or line.startswith('#'):
-            return None
-        
-        # Remove comments
-        if '#' in line:
-            line = line.split('#')[0].strip()
-        
-        # Split instruction
-        parts = re.split(r'[,\s]+', line)
-        parts = [p.strip() for p in parts if p.strip()]
-        
-        op = parts[0].lower()
-        
+
+    def assemble_la(self, parts, pc):
+        """Assemble la as ori from $zero with the byte address of a label"""
+        try:
+            address = self.symbol_value(parts[2])
+        except ValueError:
+            raise ValueError(f"Unknown label: {parts[2]}") from None
+        if address > 0xFFFF:
+            raise ValueError(f"Address of {parts[2]} does not fit in 16 bits")
+        return self.assemble_i_type(['ori', parts[1], '$zero', str(address)], pc)
+
+    def assemble_parts(self, parts, pc):
+        """Encode one real instruction"""
+        op = parts[0]
+
         # Determine instruction type and assemble
-        if op in self.r_type_funcs:
+        if op == 'nop':
+            return 0x00000000
+        elif op == 'la':
+            return self.assemble_la(parts, pc)
+        elif op in self.r_type_funcs:
             return self.assemble_r_type(parts)
         elif op in ['addi', 'addiu', 'ori', 'lui', 'lw', 'sw', 'beq']:
             return self.assemble_i_type(parts, pc)
@@ -173,82 +535,181 @@ class MIPSAssembler:
             return self.assemble_j_type(parts)
         else:
             raise ValueError(f"Unknown instruction: {op}")
-    
+
+    def assemble_line(self, line, pc):
+        """Assemble a single line containing one real instruction"""
+        statements = [s for s in self.parse_source([line]) if s['kind'] == 'instr']
+        if not statements:
+            return None
+        return self.assemble_parts(statements[0]['parts'], pc)
+
     def assemble(self, assembly_code):
         """Assemble the complete program"""
         lines = assembly_code.strip().split('\n')
-        
-        # First pass: collect labels
-        self.first_pass(lines)
-        
+        self.labels = {}
+        self.data_labels = {}
+        self.stats = {}
+        instrumentation.count('assemble.lines', len(lines))
+
+        # First pass: expand pseudo-instructions and collect labels
+        statements = self.first_pass(lines)
+        self.stats['instructions_before'] = sum(1 for s in statements if s['kind'] == 'instr')
+
+        removed = []
+        if self.optimize:
+            with instrumentation.span('assemble.peephole'):
+                statements, removed = self.peephole(statements)
+        self.stats['removed'] = len(removed)
+        self.stats['cycles_saved'] = sum(instruction_cycles(s['parts'][0]) for s in removed)
+        with instrumentation.span('assemble.data'):
+            self.resolve_data()
+        self.stats['data_words'] = len(self.data)
+
         # Second pass: assemble instructions
         machine_code = []
-        pc = 0
-        
-        for line in lines:
-            instruction = self.assemble_line(line, pc)
-            if instruction is not None:
-                machine_code.append(instruction)
-                pc += 1
-        
+        self.instructions = []
+        with instrumentation.span('assemble.encode'):
+            for stmt in statements:
+                if stmt['kind'] != 'instr':
+                    continue
+                try:
+                    stmt['word'] = self.assemble_parts(stmt['parts'], stmt['pc'])
+                except (ValueError, IndexError, KeyError) as e:
+                    raise ValueError(f"Line {stmt['line']}: {e}") from e
+                machine_code.append(stmt['word'])
+                self.instructions.append(stmt)
+
+        self.stats['instructions'] = len(machine_code)
+        instrumentation.count('assemble.instructions', len(machine_code))
+        self.stats['static_cycles'] = sum(instruction_cycles(s['parts'][0]) for s in self.instructions)
         return machine_code
-    
+
     def generate_verilog_memory(self, machine_code, output_file=None):
         """Generate Verilog memory initialization"""
         output = []
         output.append("// Generated machine code")
         output.append("initial begin")
-        
+
         for i, instruction in enumerate(machine_code):
             output.append(f"    memory[{i}] = 32'h{instruction:08X};  // {instruction:08X}")
-        
+
         # Fill rest with NOPs
         output.append(f"    // Fill rest with NOPs")
         output.append(f"    for (integer i = {len(machine_code)}; i < 1024; i = i + 1) begin")
         output.append(f"        memory[i] = 32'h00000000;")
         output.append(f"    end")
         output.append("end")
-        
+
         result = '\n'.join(output)
-        
+
+        if output_file:
+            with open(output_file, 'w') as f:
+                f.write(result)
+
+        return result
+
+    def generate_data_memory(self, output_file=None):
+        """$readmemh image of the data segment for DataMemory"""
+        result = format_data_image(self.data)
+
         if output_file:
             with open(output_file, 'w') as f:
                 f.write(result)
-        
+
         return result
 
+    def estimate_cycles(self):
+        """Static best/worst cycle bounds of the last assembled program"""
+        from cycle_estimator import CycleEstimator
+        return CycleEstimator(self).analyze()
+
+    def generate_listing(self, output_file=None):
+        """Listing of the last assembled program annotated with cycle costs"""
+        from cycle_estimator import CycleEstimator
+        result = CycleEstimator(self).format_listing()
+
+        if output_file:
+            with open(output_file, 'w') as f:
+                f.write(result)
+
+        return result
+
+    def optimization_report(self, name):
+        """One-line summary of pseudo-instruction expansion and peephole savings"""
+        report = f"{name}: {self.stats['instructions']} instructions, " \
+                 f"{self.stats['static_cycles']} cycles (straight-line)"
+        if self.stats.get('data_words'):
+            report += f"; {self.stats['data_words']} data words preloaded"
+        if self.stats.get('pseudo_expanded'):
+            report += f"; {self.stats['pseudo_expanded']} pseudo-instructions expanded"
+        if 'peephole_skipped' in self.stats:
+            report += f"; peephole skipped ({self.stats['peephole_skipped']})"
+        elif self.optimize:
+            report += f"; peephole removed {self.stats['removed']} instructions" \
+                      f" (-{self.stats['cycles_saved']} cycles)"
+        return report
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python3 mips_assembler.py <assembly_file> [output_file]")
-        sys.exit(1)
-    
-    assembler = MIPSAssembler()
-    
+    parser = argparse.ArgumentParser(description="MIPS assembler for the multi-cycle processor")
+    parser.add_argument('assembly_file')
+    parser.add_argument('output_file', nargs='?')
+    parser.add_argument('-O', '--optimize', action='store_true',
+                        help="run the peephole optimizer")
+    parser.add_argument('-l', '--listing', action='store_true',
+                        help="print a listing annotated with cycle costs")
+    parser.add_argument('--budget', type=int,
+                        help="fail if the static worst-case cycle bound exceeds this")
+    parser.add_argument('--data', metavar='FILE',
+                        help="write the .data image for DataMemory ($readmemh / +dmem=FILE)")
+    args = parser.parse_args()
+
+    assembler = MIPSAssembler(optimize=args.optimize)
+
     try:
-        with open(sys.argv[1], 'r') as f:
-            assembly_code = f.read()
-        
-        machine_code = assembler.assemble(assembly_code)
-        
+        with instrumentation.span('file.load', path=args.assembly_file):
+            with open(args.assembly_file, 'r') as f:
+                assembly_code = f.read()
+
+        with instrumentation.span('assemble', path=args.assembly_file):
+            machine_code = assembler.assemble(assembly_code)
+
         print("Assembly successful!")
         print(f"Generated {len(machine_code)} instructions")
-        
+        print(assembler.optimization_report(args.assembly_file))
+
+        if args.listing:
+            print("\n" + assembler.generate_listing())
+
+        if args.budget is not None:
+            bounds = assembler.estimate_cycles()
+            if bounds['worst'] is None or bounds['worst'] > args.budget:
+                worst = bounds['worst'] if bounds['worst'] is not None else "unbounded"
+                print(f"Error: worst-case {worst} cycles exceeds budget of {args.budget}")
+                sys.exit(2)
+            print(f"Worst-case {bounds['worst']} cycles within budget of {args.budget}")
+
         # Generate Verilog output
         verilog_output = assembler.generate_verilog_memory(machine_code)
-        
-        if len(sys.argv) > 2:
-            with open(sys.argv[2], 'w') as f:
+
+        if args.output_file:
+            with open(args.output_file, 'w') as f:
                 f.write(verilog_output)
-            print(f"Verilog memory file written to: {sys.argv[2]}")
+            print(f"Verilog memory file written to: {args.output_file}")
         else:
             print("\nVerilog memory initialization:")
             print(verilog_output)
-        
+
+        if args.data:
+            assembler.generate_data_memory(args.data)
+            print(f"Data image ({len(assembler.data)} words) written to: {args.data}")
+        elif assembler.data:
+            print(f"Note: {len(assembler.data)} data words not written, use --data FILE")
+
         # Print machine code
         print("\nMachine code:")
         for i, instruction in enumerate(machine_code):
             print(f"  [{i:2d}] 0x{instruction:08X}")
-    
+
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
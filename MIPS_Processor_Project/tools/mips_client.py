@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Thin client for mips_server.py
+Usage: python3 mips_client.py [--socket PATH] <method> [key=value ...]
+
+Values are parsed as JSON when possible, otherwise passed as strings;
+'path' values are made absolute so the server resolves them correctly.
+Example: python3 tools/mips_client.py run path=examples/test_program.asm max_steps=200
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+
+DEFAULT_SOCKET = '/tmp/mips_server.sock'
+
+
+def parse_params(pairs):
+    """Turn key=value arguments into a params object"""
+    params = {}
+    for pair in pairs:
+        key, sep, value = pair.partition('=')
+        if not sep:
+            raise ValueError(f"Expected key=value, got: {pair}")
+        try:
+            params[key] = json.loads(value)
+        except json.JSONDecodeError:
+            params[key] = value
+        if key == 'path':
+            params[key] = os.path.abspath(params[key])
+    return params
+
+
+def call(method, params, socket_path=DEFAULT_SOCKET, request_id=1):
+    """Send one request and return the decoded response"""
+    request = {'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall((json.dumps(request) + '\n').encode('utf-8'))
+        reader = sock.makefile('r', encoding='utf-8')
+        return json.loads(reader.readline())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send a request to the MIPS tool server")
+    parser.add_argument('--socket', default=DEFAULT_SOCKET)
+    parser.add_argument('method')
+    parser.add_argument('params', nargs='*', help="key=value pairs")
+    args = parser.parse_args()
+
+    try:
+        response = call(args.method, parse_params(args.params), args.socket)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if 'error' in response:
+        print(f"Error {response['error']['code']}: {response['error']['message']}")
+        sys.exit(1)
+
+    result = response['result']
+    if 'listing' in result:
+        print(result.pop('listing'))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Coverage collection for the MIPS processor model
+Fixed-size counters and byte flag arrays (one byte per entry) for opcodes,
+functs, BEQ directions, ControlUnit FSM transitions, register usage and LW/SW addresses.
+Databases from parallel runs merge by adding counters and OR-ing flags.
+
+Usage:
+  python3 mips_coverage.py run -o cov.db [-j N] [--max-steps N] prog.asm ...
+  python3 mips_coverage.py merge -o all.db a.db b.db ...
+  python3 mips_coverage.py report all.db
+"""
+
+import argparse
+import os
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+from advanced_mips_verifier import MIPSProcessor
+from mips_assembler import MIPSAssembler
+
+MAGIC = b'MIPSCOV1'
+MEMORY_WORDS = 1024  # Instruction and data memories both hold 1024 words
+
+STATES = ['FETCH', 'DECODE', 'EXECUTE', 'MEMORY', 'WRITEBACK']
+FETCH, DECODE, EXECUTE, MEMORY, WRITEBACK = range(5)
+
+# State path per instruction under ControlUnit.v
+PATH_DEFAULT = [FETCH, DECODE, EXECUTE, FETCH]
+PATH_SW = [FETCH, DECODE, EXECUTE, MEMORY, FETCH]
+PATH_LW = [FETCH, DECODE, EXECUTE, MEMORY, WRITEBACK, FETCH]
+
+EXPECTED_TRANSITIONS = [(FETCH, DECODE), (DECODE, EXECUTE), (EXECUTE, FETCH),
+                        (EXECUTE, MEMORY), (MEMORY, FETCH), (MEMORY, WRITEBACK),
+                        (WRITEBACK, FETCH)]
+
+# Per-instruction kinds checked in the collection loop
+KIND_OTHER, KIND_BEQ, KIND_LW, KIND_SW = range(4)
+
+# Fixed section layout: (name, array typecode or 'flags', element count)
+# 'flags' sections hold one byte per entry so the collection loop can index them directly
+SECTIONS = [
+    ('totals', 'Q', 2),                # runs, instructions
+    ('opcodes', 'Q', 64),
+    ('functs', 'Q', 64),
+    ('transitions', 'Q', 25),          # from * 5 + to
+    ('reg_reads', 'Q', 32),
+    ('reg_writes', 'Q', 32),
+    ('out_of_range', 'Q', 2),          # loads, stores beyond the 4KB data memory
+    ('beq_taken', 'Q', 2),             # executions taken, not taken
+    ('beq_sites', 'flags', MEMORY_WORDS),       # every BEQ in a loaded program, executed or not
+    ('beq_directions', 'flags', MEMORY_WORDS),  # bit 0 taken, bit 1 not taken
+    ('loads', 'flags', MEMORY_WORDS),
+    ('stores', 'flags', MEMORY_WORDS),
+]
+
+
+class CoverageDB:
+    """Counters and flag arrays with a fixed binary layout"""
+
+    def __init__(self):
+        for name, kind, size in SECTIONS:
+            if kind == 'flags':
+                setattr(self, name, bytearray(size))
+            else:
+                setattr(self, name, array(kind, bytes(8 * size)))
+
+    def to_bytes(self) -> bytes:
+        chunks = [MAGIC]
+        for name, kind, _ in SECTIONS:
+            section = getattr(self, name)
+            chunks.append(bytes(section) if kind == 'flags' else section.tobytes())
+        return b''.join(chunks)
+
+    @classmethod
+    def encoded_size(cls) -> int:
+        """Length in bytes of a serialized database"""
+        return len(MAGIC) + sum(size if kind == 'flags' else 8 * size for _, kind, size in SECTIONS)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, name: str = '<data>') -> 'CoverageDB':
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{name}: not a coverage database")
+        if len(data) != cls.encoded_size():
+            raise ValueError(f"{name}: truncated or corrupt coverage database "
+                             f"({len(data)} bytes, expected {cls.encoded_size()})")
+        db = cls()
+        offset = len(MAGIC)
+        for name, kind, size in SECTIONS:
+            length = size if kind == 'flags' else 8 * size
+            chunk = data[offset:offset + length]
+            if kind == 'flags':
+                setattr(db, name, bytearray(chunk))
+            else:
+                section = array(kind)
+                section.frombytes(chunk)
+                setattr(db, name, section)
+            offset += length
+        return db
+
+    def save(self, path: str):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> 'CoverageDB':
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read(), path)
+
+    def merge(self, other: 'CoverageDB'):
+        """Add counters and OR flags of another database into this one"""
+        for name, kind, size in SECTIONS:
+            mine, theirs = getattr(self, name), getattr(other, name)
+            if kind == 'flags':
+                merged = int.from_bytes(mine, 'little') | int.from_bytes(theirs, 'little')
+                setattr(self, name, bytearray(merged.to_bytes(size, 'little')))
+            else:
+                for i in range(size):
+                    mine[i] += theirs[i]
+        return self
+
+
+class CoverageCollector:
+    """Runs a program on MIPSProcessor while filling a CoverageDB"""
+
+    def __init__(self, db: CoverageDB = None):
+        self.db = db or CoverageDB()
+
+    def run(self, processor: MIPSProcessor, max_instructions: int = 100000) -> int:
+        program = processor.decode_program()
+        count = len(program)
+        kinds = array('B', bytes(count))
+        operands = []
+        for i, (decoded, instr_type) in enumerate(program):
+            kinds[i] = {'BEQ': KIND_BEQ, 'LW': KIND_LW, 'SW': KIND_SW}.get(instr_type, KIND_OTHER)
+            operands.append((decoded['rs'], decoded['rt'], decoded['immediate_signed']))
+            # Static sites, so a BEQ that never runs shows up with both directions missing
+            if instr_type == 'BEQ' and i < MEMORY_WORDS:
+                self.db.beq_sites[i] = 1
+
+        # The loop only touches per-PC counters and the branch/address flags;
+        # everything else is derived from the counters afterwards
+        executed = array('Q', bytes(8 * count))
+        directions = self.db.beq_directions
+        loads, stores = self.db.loads, self.db.stores
+        out_of_range = [0, 0]
+        branches = [0, 0]
+        registers = processor.registers
+        execute = processor.execute_instruction
+        steps = 0
+        while steps < max_instructions:
+            pc = processor.pc
+            index = pc >> 2
+            if index >= count or pc < 0:
+                break
+            executed[index] += 1
+            kind = kinds[index]
+            if kind:
+                rs, rt, imm = operands[index]
+                if kind == KIND_BEQ:
+                    taken = registers[rs] == registers[rt]
+                    branches[not taken] += 1
+                    if index < MEMORY_WORDS:
+                        directions[index] |= 1 if taken else 2
+                else:
+                    address = (registers[rs] + imm) & 0xFFFFFFFF
+                    if address > 0xFFF:
+                        out_of_range[kind - KIND_LW] += 1
+                    (loads if kind == KIND_LW else stores)[(address >> 2) & 0x3FF] = 1
+            decoded, instr_type = program[index]
+            if not execute(decoded, instr_type):
+                processor.pc += 4
+            steps += 1
+
+        processor.cycle_count += steps
+        self.fold(program, executed, out_of_range, branches, steps)
+        return steps
+
+    def fold(self, program, executed, out_of_range, branches, steps):
+        """Derive opcode, funct, register and FSM counts from per-PC execution counts"""
+        db = self.db
+        db.totals[0] += 1
+        db.totals[1] += steps
+        for i in range(2):
+            db.out_of_range[i] += out_of_range[i]
+            db.beq_taken[i] += branches[i]
+
+        for index, n in enumerate(executed):
+            if not n:
+                continue
+            decoded, instr_type = program[index]
+            db.opcodes[decoded['opcode']] += n
+            if decoded['opcode'] == 0:
+                db.functs[decoded['funct']] += n
+
+            reads, write = register_usage(decoded, instr_type)
+            for reg in reads:
+                db.reg_reads[reg] += n
+            if write is not None:
+                db.reg_writes[write] += n
+
+            path = PATH_LW if instr_type == 'LW' else PATH_SW if instr_type == 'SW' else PATH_DEFAULT
+            for a, b in zip(path, path[1:]):
+                db.transitions[a * 5 + b] += n
+
+
+def register_usage(decoded, instr_type):
+    """(registers read, register written or None) for one instruction"""
+    rs, rt, rd = decoded['rs'], decoded['rt'], decoded['rd']
+    if instr_type in ['ADDU', 'SUBU', 'SLT']:
+        return (rs, rt), rd
+    if instr_type in ['ADDI', 'ADDIU', 'ORI', 'LW']:
+        return (rs,), rt
+    if instr_type == 'LUI':
+        return (), rt
+    if instr_type in ['SW', 'BEQ']:
+        return (rs, rt), None
+    if instr_type == 'JR':
+        return (rs,), None
+    if instr_type == 'JAL':
+        return (), 31
+    return (), None
+
+
+def word_ranges(flags, value):
+    """Compress indices whose flag entry equals value into (first, last) ranges"""
+    ranges = []
+    for i, bit in enumerate(flags):
+        if bool(bit) == value:
+            if ranges and ranges[-1][1] == i - 1:
+                ranges[-1][1] = i
+            else:
+                ranges.append([i, i])
+    return ranges
+
+
+def format_report(db: CoverageDB) -> str:
+    """Coverage summary listing the holes first"""
+    assembler = MIPSAssembler()
+    output = [f"Coverage over {db.totals[0]} runs, {db.totals[1]} instructions", ""]
+
+    output.append("Opcodes / functs:")
+    for name, opcode in sorted(assembler.opcodes.items(), key=lambda item: item[1]):
+        count = db.opcodes[opcode]
+        output.append(f"  {'  ' if count else '!!'} {name.upper():6} {count}")
+    for name, funct in sorted(assembler.r_type_funcs.items(), key=lambda item: item[1]):
+        count = db.functs[funct]
+        output.append(f"  {'  ' if count else '!!'} {name.upper():6} {count}")
+    known = set(assembler.opcodes.values()) | {0}
+    unknown = [f"0x{op:02X}" for op in range(64) if db.opcodes[op] and op not in known]
+    unknown += [f"funct 0x{f:02X}" for f in range(64)
+                if db.functs[f] and f not in assembler.r_type_funcs.values()]
+    if unknown:
+        output.append(f"  unsupported encodings executed: {', '.join(unknown)}")
+
+    output.append("FSM transitions:")
+    for a, b in EXPECTED_TRANSITIONS:
+        count = db.transitions[a * 5 + b]
+        output.append(f"  {'  ' if count else '!!'} {STATES[a]:>9} -> {STATES[b]:<9} {count}")
+
+    sites = [i for i in range(MEMORY_WORDS) if db.beq_sites[i]]
+    one_way = [i for i in sites if db.beq_directions[i] != 3]
+    output.append(f"BEQ: {len(sites) - len(one_way)}/{len(sites)} sites took both directions"
+                  f" (taken {db.beq_taken[0]}, not taken {db.beq_taken[1]})")
+    for i in one_way:
+        for bit, direction in [(1, 'taken'), (2, 'not taken')]:
+            if not db.beq_directions[i] & bit:
+                output.append(f"  !! 0x{i * 4:04X} never {direction}")
+
+    never_written = [f"${r}" for r in range(1, 32) if not db.reg_writes[r]]
+    never_read = [f"${r}" for r in range(1, 32) if not db.reg_reads[r]]
+    output.append(f"Registers written: {31 - len(never_written)}/31, read: {31 - len(never_read)}/31")
+    if never_written:
+        output.append(f"  !! never written: {' '.join(never_written)}")
+    if never_read:
+        output.append(f"  !! never read: {' '.join(never_read)}")
+
+    for name, flags, oor in [('LW', db.loads, db.out_of_range[0]), ('SW', db.stores, db.out_of_range[1])]:
+        touched = sum(1 for b in flags if b)
+        ranges = word_ranges(flags, True)
+        shown = ', '.join(f"0x{a * 4:03X}-0x{b * 4 + 3:03X}" for a, b in ranges[:8])
+        more = f" (+{len(ranges) - 8} more)" if len(ranges) > 8 else ""
+        output.append(f"{name} addresses: {touched}/{MEMORY_WORDS} words {shown}{more}")
+        if oor:
+            output.append(f"  !! {oor} accesses beyond 0xFFF alias into the 4KB data memory")
+    return '\n'.join(output)
+
+
+def collect_file(args) -> bytes:
+    """Worker: run one program and return its serialized database"""
+    path, max_steps = args
+    processor = MIPSProcessor()
+    with open(path, 'r') as f:
+        text = f.read()
+    if os.path.splitext(path)[1] == '.asm':
+        assembler = MIPSAssembler()
+        processor.load_program(assembler.assemble(text))
+        processor.load_memory(assembler.data)
+    else:
+        processor.load_instructions(text.splitlines())
+    collector = CoverageCollector()
+    collector.run(processor, max_steps)
+    return collector.db.to_bytes()
+
+
+def merge_databases(chunks: List[bytes]) -> CoverageDB:
+    db = CoverageDB()
+    for chunk in chunks:
+        db.merge(CoverageDB.from_bytes(chunk))
+    return db
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MIPS coverage collection")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = sub.add_parser('run', help="collect coverage from programs")
+    run_parser.add_argument('programs', nargs='+')
+    run_parser.add_argument('-o', '--output', default='coverage.db')
+    run_parser.add_argument('-j', '--jobs', type=int, default=1)
+    run_parser.add_argument('--max-steps', type=int, default=100000)
+
+    merge_parser = sub.add_parser('merge', help="merge coverage databases")
+    merge_parser.add_argument('inputs', nargs='+')
+    merge_parser.add_argument('-o', '--output', required=True)
+
+    report_parser = sub.add_parser('report', help="print a coverage report")
+    report_parser.add_argument('database')
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'run':
+            jobs = [(path, args.max_steps) for path in args.programs]
+            if args.jobs > 1:
+                with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+                    chunks = list(pool.map(collect_file, jobs))
+            else:
+                chunks = [collect_file(job) for job in jobs]
+            db = merge_databases(chunks)
+            db.save(args.output)
+            print(format_report(db))
+            print(f"\nCoverage database written to: {args.output}")
+        elif args.command == 'merge':
+            db = CoverageDB()
+            for path in args.inputs:
+                db.merge(CoverageDB.load(path))
+            db.save(args.output)
+            print(f"Merged {len(args.inputs)} databases into {args.output}")
+        else:
+            print(format_report(CoverageDB.load(args.database)))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
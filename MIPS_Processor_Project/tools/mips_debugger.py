@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Interactive reverse-execution debugger for the MIPS processor model
+Breakpoints on PC or label, watchpoints on registers and memory words,
+and reverse step/continue driven by a compact per-instruction undo log
+with periodic full-state snapshots.
+Usage: python3 mips_debugger.py <program.asm | memory.v>
+"""
+
+import cmd
+import os
+import sys
+from array import array
+from typing import Dict, List, Optional
+
+from advanced_mips_verifier import MIPSProcessor
+from mips_assembler import MIPSAssembler
+
+# Undo log entry kinds
+UNDO_NONE = 0
+UNDO_REGISTER = 1
+UNDO_MEMORY = 2      # Memory word existed, restore old value
+UNDO_MEMORY_NEW = 3  # Memory word was created, delete it
+
+REGISTER_NAMES = ['$zero', '$at', '$v0', '$v1', '$a0', '$a1', '$a2', '$a3',
+                  '$t0', '$t1', '$t2', '$t3', '$t4', '$t5', '$t6', '$t7',
+                  '$s0', '$s1', '$s2', '$s3', '$s4', '$s5', '$s6', '$s7',
+                  '$t8', '$t9', '$k0', '$k1', '$gp', '$sp', '$fp', '$ra']
+
+
+class MIPSDebugger:
+    """Forward and reverse execution control around a MIPSProcessor"""
+
+    def __init__(self, processor: MIPSProcessor, labels: Optional[Dict[str, int]] = None,
+                 snapshot_interval: int = 100000, history_limit: int = 50000000):
+        self.processor = processor
+        self.labels = labels or {}
+        self.snapshot_interval = snapshot_interval
+        self.history_limit = history_limit
+
+        self.breakpoints = set()      # Byte addresses
+        self.watch_registers = set()  # Register numbers
+        self.watch_memory = set()     # Byte addresses
+        self.steps = 0
+        self.stop_reason = None
+
+        # Undo log, one entry per executed instruction, stored as columns
+        self.log_base = 0  # Step number of the oldest entry still in the log
+        self.log_pc = array('I')
+        self.log_kind = array('B')
+        self.log_index = array('I')
+        self.log_value = array('I')
+        self.snapshots = []  # (step, pc, registers, memory)
+
+        self.effects = self.build_effects()
+        self.take_snapshot()
+
+    def build_effects(self) -> List[tuple]:
+        """Per-instruction write target: (kind, register) or (memory, base, offset)"""
+        effects = []
+        for decoded, instr_type in self.processor.decode_program():
+            if instr_type in ["ADDU", "SUBU", "SLT"]:
+                effects.append((UNDO_REGISTER, decoded['rd'], 0))
+            elif instr_type in ["ADDI", "ADDIU", "ORI", "LUI", "LW"]:
+                effects.append((UNDO_REGISTER, decoded['rt'], 0))
+            elif instr_type == "JAL":
+                effects.append((UNDO_REGISTER, 31, 0))
+            elif instr_type == "SW":
+                effects.append((UNDO_MEMORY, decoded['rs'], decoded['immediate_signed']))
+            else:
+                effects.append((UNDO_NONE, 0, 0))
+        return effects
+
+    def take_snapshot(self):
+        p = self.processor
+        self.snapshots.append((self.steps, p.pc, p.registers.copy(), p.memory.copy()))
+
+    def restore_snapshot(self, snapshot):
+        """Reset state to a snapshot and drop undo entries recorded after it"""
+        step, pc, registers, memory = snapshot
+        p = self.processor
+        p.pc = pc
+        p.registers = registers.copy()
+        p.memory = memory.copy()
+        keep = step - self.log_base
+        for column in (self.log_pc, self.log_kind, self.log_index, self.log_value):
+            del column[keep:]
+        self.snapshots = [s for s in self.snapshots if s[0] <= step]
+        self.steps = step
+
+    def trim_history(self):
+        """Forget the oldest snapshot interval once the log exceeds its limit"""
+        if len(self.snapshots) < 2:
+            return
+        self.snapshots.pop(0)
+        drop = self.snapshots[0][0] - self.log_base
+        for column in (self.log_pc, self.log_kind, self.log_index, self.log_value):
+            del column[:drop]
+        self.log_base = self.snapshots[0][0]
+
+    def run(self, max_steps: int = 1 << 62, stop_at_breakpoints: bool = True,
+            stop_at_watchpoints: bool = True) -> str:
+        """Execute forward until a breakpoint, watchpoint, program end or max_steps"""
+        p = self.processor
+        program = p.decoded_program
+        effects = self.effects
+        count = len(program)
+        registers = p.registers
+        memory = p.memory
+        registers_hit = self.watch_registers if stop_at_watchpoints else ()
+        memory_hit = self.watch_memory if stop_at_watchpoints else ()
+        breakpoints = self.breakpoints if stop_at_breakpoints else ()
+        log_pc, log_kind = self.log_pc.append, self.log_kind.append
+        log_index, log_value = self.log_index.append, self.log_value.append
+        execute = p.execute_instruction
+        start = self.steps
+        limit = start + max_steps
+        steps = start
+        next_snapshot = self.snapshots[-1][0] + self.snapshot_interval
+
+        reason = 'limit'
+        while steps < limit:
+            pc = p.pc
+            index = pc >> 2
+            if index >= count or pc < 0:
+                reason = 'end'
+                break
+
+            kind, target, offset = effects[index]
+            if kind == UNDO_REGISTER:
+                old = registers[target]
+            elif kind == UNDO_MEMORY:
+                target = (registers[target] + offset) & 0xFFFFFFFF
+                if target in memory:
+                    old = memory[target]
+                else:
+                    kind, old = UNDO_MEMORY_NEW, 0
+            else:
+                old = 0
+            log_pc(pc)
+            log_kind(kind)
+            log_index(target)
+            log_value(old)
+
+            decoded, instr_type = program[index]
+            if not execute(decoded, instr_type):
+                p.pc += 4
+            steps += 1
+
+            if steps >= next_snapshot:
+                self.steps = steps
+                self.take_snapshot()
+                next_snapshot = steps + self.snapshot_interval
+                if len(self.log_pc) > self.history_limit:
+                    self.trim_history()
+
+            if kind == UNDO_REGISTER:
+                if target in registers_hit and registers[target] != old:
+                    reason = f"watch {REGISTER_NAMES[target]}: 0x{old:08X} -> 0x{registers[target]:08X}"
+                    break
+            elif kind != UNDO_NONE and target in memory_hit and memory.get(target, 0) != old:
+                reason = f"watch mem[0x{target:X}]: 0x{old:08X} -> 0x{memory[target]:08X}"
+                break
+            if p.pc in breakpoints:
+                reason = f"breakpoint 0x{p.pc:04X}"
+                break
+
+        self.steps = steps
+        p.cycle_count += steps - start
+        self.stop_reason = reason
+        return reason
+
+    def undo(self) -> Optional[tuple]:
+        """Undo the most recent instruction; returns (kind, target, value changed) or None"""
+        if self.steps <= self.log_base:
+            return None
+        p = self.processor
+        pc = self.log_pc.pop()
+        kind = self.log_kind.pop()
+        target = self.log_index.pop()
+        old = self.log_value.pop()
+        changed = False
+        if kind == UNDO_REGISTER:
+            changed = p.registers[target] != old
+            p.registers[target] = old
+        elif kind == UNDO_MEMORY:
+            changed = p.memory.get(target, 0) != old
+            p.memory[target] = old
+        elif kind == UNDO_MEMORY_NEW:
+            changed = p.memory.pop(target, 0) != 0
+        p.pc = pc
+        self.steps -= 1
+        p.cycle_count -= 1
+        if self.snapshots and self.snapshots[-1][0] > self.steps:
+            self.snapshots.pop()
+        return kind, target, changed
+
+    def reverse(self, max_steps: int = 1 << 62) -> str:
+        """Run backwards until a breakpoint, watchpoint or the start of history"""
+        self.stop_reason = 'limit'
+        undone = 0
+        while undone < max_steps:
+            effect = self.undo()
+            if effect is None:
+                self.stop_reason = 'start of history'
+                break
+            undone += 1
+            kind, target, changed = effect
+            if changed and kind == UNDO_REGISTER and target in self.watch_registers:
+                self.stop_reason = f"watch {REGISTER_NAMES[target]} (reverse)"
+                break
+            if changed and kind in [UNDO_MEMORY, UNDO_MEMORY_NEW] and target in self.watch_memory:
+                self.stop_reason = f"watch mem[0x{target:X}] (reverse)"
+                break
+            if self.processor.pc in self.breakpoints:
+                self.stop_reason = f"breakpoint 0x{self.processor.pc:04X} (reverse)"
+                break
+        return self.stop_reason
+
+    def goto(self, step: int) -> str:
+        """Move to an absolute step, replaying from a snapshot when that is shorter
+
+        Breakpoints and watchpoints never stop a goto; only the program end
+        or the start of history can leave it short of the requested step.
+        """
+        if step >= self.steps:
+            return self.run(step - self.steps, stop_at_breakpoints=False, stop_at_watchpoints=False)
+        clamped = step < self.log_base
+        step = max(step, self.log_base)
+        snapshot = max((s for s in self.snapshots if s[0] <= step), key=lambda s: s[0])
+        if step - snapshot[0] < self.steps - step:
+            self.restore_snapshot(snapshot)
+            self.run(step - self.steps, stop_at_breakpoints=False, stop_at_watchpoints=False)
+        else:
+            self.undo_to(step)
+        if clamped:
+            self.stop_reason = 'start of history'
+        return self.stop_reason
+
+    def undo_to(self, step: int) -> str:
+        """Undo instructions until the given step, ignoring breakpoints and watchpoints"""
+        while self.steps > step and self.undo() is not None:
+            pass
+        self.stop_reason = 'limit'
+        return self.stop_reason
+
+    def resolve_address(self, text: str) -> int:
+        """Byte address from a label name or a number"""
+        if text in self.labels:
+            return self.labels[text] * 4
+        return int(text, 0)
+
+    def location(self, pc: int) -> str:
+        """label+offset description of a byte address"""
+        best = None
+        for name, index in self.labels.items():
+            if name.startswith('.L') or index * 4 > pc:
+                continue
+            if best is None or index > best[1]:
+                best = (name, index)
+        if best is None:
+            return ""
+        offset = pc - best[1] * 4
+        return f"<{best[0]}+{offset}>" if offset else f"<{best[0]}>"
+
+
+class DebuggerShell(cmd.Cmd):
+    """Command-line front end for MIPSDebugger"""
+
+    prompt = '(mdb) '
+
+    def __init__(self, debugger: MIPSDebugger, sources: Optional[Dict[int, str]] = None):
+        super().__init__()
+        self.debugger = debugger
+        self.sources = sources or {}
+
+    def where(self):
+        d = self.debugger
+        pc = d.processor.pc
+        index = pc // 4
+        program = d.processor.decoded_program
+        if 0 <= index < len(program):
+            text = self.sources.get(index, program[index][1])
+        else:
+            text = "<end of program>"
+        print(f"step {d.steps}  pc 0x{pc:04X} {d.location(pc)}  {text}")
+
+    def report(self, reason):
+        if reason != 'limit':
+            print(f"Stopped: {reason}")
+        self.where()
+
+    def count_arg(self, arg, default=1):
+        return int(arg, 0) if arg.strip() else default
+
+    def parse_register(self, text):
+        text = text.strip()
+        if text in REGISTER_NAMES:
+            return REGISTER_NAMES.index(text)
+        if text.startswith('$') and text[1:].isdigit():
+            return int(text[1:])
+        return None
+
+    def do_break(self, arg):
+        """break <label|address>: stop before executing that instruction"""
+        try:
+            address = self.debugger.resolve_address(arg.strip())
+        except ValueError:
+            print(f"Unknown location: {arg}")
+            return
+        self.debugger.breakpoints.add(address)
+        print(f"Breakpoint at 0x{address:04X} {self.debugger.location(address)}")
+
+    def do_delete(self, arg):
+        """delete [label|address]: remove one or all breakpoints"""
+        if not arg.strip():
+            self.debugger.breakpoints.clear()
+        else:
+            self.debugger.breakpoints.discard(self.debugger.resolve_address(arg.strip()))
+
+    def do_watch(self, arg):
+        """watch <$reg|address>: stop when a register or memory word changes"""
+        reg = self.parse_register(arg)
+        if reg is not None:
+            self.debugger.watch_registers.add(reg)
+            print(f"Watching {REGISTER_NAMES[reg]}")
+        else:
+            address = self.debugger.resolve_address(arg.strip())
+            self.debugger.watch_memory.add(address)
+            print(f"Watching mem[0x{address:X}]")
+
+    def do_unwatch(self, arg):
+        """unwatch [$reg|address]: remove one or all watchpoints"""
+        if not arg.strip():
+            self.debugger.watch_registers.clear()
+            self.debugger.watch_memory.clear()
+            return
+        reg = self.parse_register(arg)
+        if reg is not None:
+            self.debugger.watch_registers.discard(reg)
+        else:
+            self.debugger.watch_memory.discard(self.debugger.resolve_address(arg.strip()))
+
+    def do_step(self, arg):
+        """step [n]: execute n instructions"""
+        self.report(self.debugger.run(self.count_arg(arg), stop_at_breakpoints=False))
+
+    def do_continue(self, arg):
+        """continue [max]: run until a breakpoint, watchpoint or program end"""
+        self.report(self.debugger.run(self.count_arg(arg, 1 << 62)))
+
+    def do_rstep(self, arg):
+        """rstep [n]: undo n instructions"""
+        d = self.debugger
+        target = d.steps - self.count_arg(arg)
+        d.undo_to(max(target, d.log_base))
+        self.where()
+
+    def do_rcontinue(self, arg):
+        """rcontinue: run backwards until a breakpoint or watchpoint"""
+        self.report(self.debugger.reverse())
+
+    def do_goto(self, arg):
+        """goto <step>: move to an absolute instruction count"""
+        self.report(self.debugger.goto(self.count_arg(arg, 0)))
+
+    def do_regs(self, arg):
+        """regs: print non-zero registers"""
+        for i, value in enumerate(self.debugger.processor.registers):
+            if value:
+                print(f"  {REGISTER_NAMES[i]:>5} = 0x{value:08X} ({value})")
+
+    def do_mem(self, arg):
+        """mem <address> [words]: print memory words"""
+        args = arg.split()
+        if not args:
+            print("Usage: mem <address> [words]")
+            return
+        start = self.debugger.resolve_address(args[0])
+        words = int(args[1], 0) if len(args) > 1 else 4
+        memory = self.debugger.processor.memory
+        for address in range(start, start + words * 4, 4):
+            print(f"  0x{address:04X}: 0x{memory.get(address, 0):08X}")
+
+    def do_info(self, arg):
+        """info: breakpoints, watchpoints and history size"""
+        d = self.debugger
+        print(f"  breakpoints: {', '.join(f'0x{b:04X}' for b in sorted(d.breakpoints)) or 'none'}")
+        watches = [REGISTER_NAMES[r] for r in sorted(d.watch_registers)]
+        watches += [f"mem[0x{a:X}]" for a in sorted(d.watch_memory)]
+        print(f"  watchpoints: {', '.join(watches) or 'none'}")
+        print(f"  history: steps {d.log_base}..{d.steps}, {len(d.snapshots)} snapshots")
+
+    def do_where(self, arg):
+        """where: show the next instruction"""
+        self.where()
+
+    def do_quit(self, arg):
+        """quit: leave the debugger"""
+        return True
+
+    do_b = do_break
+    do_s = do_step
+    do_c = do_continue
+    do_rs = do_rstep
+    do_rc = do_rcontinue
+    do_q = do_quit
+    do_EOF = do_quit
+
+
+def load_program(path: str):
+    """Processor, labels and per-instruction source text for an .asm or memory file"""
+    processor = MIPSProcessor()
+    with open(path, 'r') as f:
+        text = f.read()
+
+    if os.path.splitext(path)[1] == '.asm':
+        assembler = MIPSAssembler()
+        processor.load_program(assembler.assemble(text))
+        processor.load_memory(assembler.data)
+        sources = {s['pc']: s['source'] for s in assembler.instructions}
+        return processor, assembler.labels, sources
+
+    processor.load_instructions(text.splitlines())
+    return processor, {}, {}
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python3 mips_debugger.py <program.asm | memory.v>")
+        sys.exit(1)
+
+    processor, labels, sources = load_program(sys.argv[1])
+    shell = DebuggerShell(MIPSDebugger(processor, labels), sources)
+    shell.where()
+    shell.cmdloop()
+
+
+if __name__ == "__main__":
+    main()
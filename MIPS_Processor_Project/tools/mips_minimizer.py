@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Delta-debugging minimizer for failing MIPS programs
+Shrinks an assembly program (or an instruction image, which is disassembled
+with symbolic labels first) while an oracle keeps reporting the failure:
+ddmin over basic blocks and instructions, then immediate and register
+simplification. Candidates are evaluated in parallel on a process pool and
+results are cached by program hash.
+
+Oracles (one is required):
+  --command CMD    shell command, '{}' is replaced by the candidate .asm path,
+                   '{hex}' by its image and '{dmem}' by its data image;
+                   exit status 0 means "still failing"
+  --model          MIPSProcessor and the cycle-level MulticycleDatapath disagree
+                   on registers or data memory after the same number of instructions.
+                   The datapath reproduces the RTL's known deviations (immediate and
+                   R-type instructions write back the stale ALUOut, JAL saves PC+8),
+                   so almost every program fails and shrinks to one such instruction
+
+Usage: python3 mips_minimizer.py failing.asm (--command CMD | --model) [-o minimized.asm] [-j N]
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from advanced_mips_verifier import MEMORY_WORDS, MIPSProcessor, WordMemory
+from datapath_model import MulticycleDatapath, export_data_image, export_image
+from mips_assembler import MIPSAssembler, format_parts
+
+OFFSET_PATTERN = re.compile(r'(-?(?:0x[0-9A-Fa-f]+|\d+))(\(\$\w+\))')
+NUMBER_PATTERN = re.compile(r'-?(?:0x[0-9A-Fa-f]+|\d+)$')
+REGISTER_NAMES = {}
+for _name, _number in MIPSAssembler().registers.items():
+    REGISTER_NAMES.setdefault(_number, _name)
+
+
+# ----------------------------------------------------------------------
+# Program representation: a list of ('label', name) and ('instr', parts)
+
+def parse_program(text: str) -> List[tuple]:
+    program = []
+    for stmt in MIPSAssembler().parse_source(text.split('\n')):
+        if stmt['kind'] == 'label':
+            program.append(('label', stmt['name']))
+        else:
+            program.append(('instr', tuple(stmt['parts'])))
+    return program
+
+
+def render(program: List[tuple]) -> str:
+    lines = []
+    for kind, value in program:
+        lines.append(f"{value}:" if kind == 'label' else f"    {format_parts(list(value))}")
+    return '\n'.join(lines) + '\n'
+
+
+def disassemble(words: List[int]) -> List[tuple]:
+    """Instruction image back to source, with labels for in-range control targets"""
+    processor = MIPSProcessor()
+    decoded = [(processor.decode_instruction(word), word) for word in words]
+    targets = {}
+    for index, (d, word) in enumerate(decoded):
+        kind = processor.get_instruction_type(d)
+        if kind == 'BEQ':
+            target = index + 1 + d['immediate_signed']
+        elif kind in ['J', 'JAL']:
+            target = d['target']
+        else:
+            continue
+        if 0 <= target <= len(words):
+            targets.setdefault(target, f"L{target}")
+
+    program = []
+    for index, (d, word) in enumerate(decoded):
+        if index in targets:
+            program.append(('label', targets[index]))
+        kind = processor.get_instruction_type(d)
+        rs, rt, rd = (REGISTER_NAMES[d[field]] for field in ('rs', 'rt', 'rd'))
+        if word == 0:
+            parts = ('nop',)
+        elif kind in ['ADDU', 'SUBU', 'SLT']:
+            parts = (kind.lower(), rd, rs, rt)
+        elif kind == 'JR':
+            parts = ('jr', rs)
+        elif kind in ['ADDI', 'ADDIU']:
+            parts = (kind.lower(), rt, rs, str(d['immediate_signed']))
+        elif kind == 'ORI':
+            parts = ('ori', rt, rs, hex(d['immediate']))
+        elif kind == 'LUI':
+            parts = ('lui', rt, hex(d['immediate']))
+        elif kind in ['LW', 'SW']:
+            parts = (kind.lower(), rt, f"{d['immediate_signed']}({rs})")
+        elif kind == 'BEQ':
+            target = index + 1 + d['immediate_signed']
+            parts = ('beq', rs, rt, targets.get(target, str(d['immediate_signed'])))
+        elif kind in ['J', 'JAL']:
+            parts = (kind.lower(), targets.get(d['target'], str(d['target'])))
+        else:
+            raise ValueError(f"Cannot disassemble word {word:08X} at index {index}")
+        program.append(('instr', parts))
+    if len(words) in targets:
+        program.append(('label', targets[len(words)]))
+    return program
+
+
+def referenced_labels(program: List[tuple]) -> set:
+    names = set()
+    for kind, value in program:
+        if kind == 'instr':
+            names.update(value[1:])
+    return names
+
+
+def drop_unused_labels(program: List[tuple]) -> List[tuple]:
+    used = referenced_labels(program)
+    return [(kind, value) for kind, value in program if kind == 'instr' or value in used]
+
+
+# ----------------------------------------------------------------------
+# Oracles (run in worker processes)
+
+def model_disagreement(words: List[int], max_steps: int, data: Optional[Dict[int, int]] = None) -> Optional[str]:
+    """Description of the first register/memory mismatch, or None"""
+    processor = MIPSProcessor(WordMemory())
+    processor.load_program(words)
+    processor.load_memory(data or {})
+    steps = processor.run(max_steps)
+    datapath = MulticycleDatapath(words, data)
+    datapath.run_instructions(steps)
+
+    for number in range(32):
+        if processor.registers[number] != datapath.registers[number]:
+            return (f"{REGISTER_NAMES[number]}: ISA {processor.registers[number]:08X}, "
+                    f"datapath {datapath.registers[number]:08X}")
+    for index in range(MEMORY_WORDS):
+        value = processor.memory.read_word(index * 4)
+        if datapath.dmem[index] != value:
+            return f"mem[{index * 4:#x}]: ISA {value:08X}, datapath {datapath.dmem[index]:08X}"
+    return None
+
+
+def evaluate(task: tuple) -> bool:
+    """True if the candidate source still fails"""
+    source, oracle, max_steps = task
+    assembler = MIPSAssembler()
+    try:
+        words = assembler.assemble(source)
+    except (ValueError, IndexError, KeyError):
+        return False
+    if not words:
+        return False
+    if oracle is None:
+        # The datapath model, like InstructionMemory.v, holds 1024 words
+        return len(words) <= MEMORY_WORDS and model_disagreement(words, max_steps, assembler.data) is not None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asm_path = os.path.join(tmp, 'candidate.asm')
+        hex_path = os.path.join(tmp, 'candidate.hex')
+        dmem_path = os.path.join(tmp, 'candidate_data.hex')
+        with open(asm_path, 'w') as f:
+            f.write(source)
+        export_image(words, hex_path)
+        export_data_image(assembler.data, dmem_path)
+        command = oracle.replace('{hex}', hex_path).replace('{dmem}', dmem_path).replace('{}', asm_path)
+        try:
+            process = subprocess.run(command, shell=True, capture_output=True, timeout=60)
+        except subprocess.TimeoutExpired:
+            return False
+    return process.returncode == 0
+
+
+# ----------------------------------------------------------------------
+# Search
+
+class Minimizer:
+    """ddmin plus greedy single-statement simplifications"""
+
+    def __init__(self, oracle: Optional[str] = None, max_steps: int = 10000, jobs: Optional[int] = None,
+                 verbose: bool = True):
+        self.oracle = oracle
+        self.max_steps = max_steps
+        self.jobs = jobs or os.cpu_count() or 1
+        self.verbose = verbose
+        self.cache = {}
+        self.evaluations = 0
+        self.pool = None
+
+    def __enter__(self):
+        if self.jobs > 1:
+            self.pool = ProcessPoolExecutor(self.jobs)
+        return self
+
+    def __exit__(self, *exc):
+        if self.pool:
+            self.pool.shutdown(cancel_futures=True)
+
+    def log(self, message: str):
+        if self.verbose:
+            print(message, flush=True)
+
+    def first_failing(self, candidates: Iterable[List[tuple]]) -> Optional[Tuple[int, List[tuple]]]:
+        """(index, candidate) of the first candidate that still fails; candidates are
+        generated lazily and evaluated in parallel batches"""
+        candidates = iter(candidates)
+        offset = 0
+        while True:
+            batch = list(islice(candidates, self.jobs * 4))
+            if not batch:
+                return None
+            sources = [render(candidate) for candidate in batch]
+            keys = [hashlib.sha256(source.encode()).hexdigest() for source in sources]
+            pending = {key: source for key, source in zip(keys, sources) if key not in self.cache}
+            tasks = [(source, self.oracle, self.max_steps) for source in pending.values()]
+            if self.pool and len(tasks) > 1:
+                results = list(self.pool.map(evaluate, tasks))
+            else:
+                results = [evaluate(task) for task in tasks]
+            self.evaluations += len(tasks)
+            self.cache.update(zip(pending, results))
+            for index, key in enumerate(keys):
+                if self.cache[key]:
+                    return offset + index, batch[index]
+            offset += len(batch)
+
+    @staticmethod
+    def keep(program: List[tuple], units: List[List[int]], selection: List[List[int]]):
+        """Program without the units not in selection, and selection re-indexed into it"""
+        dropped = {index for unit in units for index in unit} - {index for unit in selection for index in unit}
+        remap, kept = {}, []
+        for index, stmt in enumerate(program):
+            if index not in dropped:
+                remap[index] = len(kept)
+                kept.append(stmt)
+        return kept, [[remap[index] for index in unit] for unit in selection]
+
+    def ddmin(self, program: List[tuple], units: List[List[int]]) -> List[tuple]:
+        """ddmin over groups of statement indices; labels are never removed here"""
+        n = 2
+        while len(units) >= 2:
+            size = len(units)
+            chunks = [units[i * size // n:(i + 1) * size // n] for i in range(n)]
+            chunks = [chunk for chunk in chunks if chunk]
+            # With two chunks every subset is also the other chunk's complement
+            subsets = chunks if n > 2 else []
+            selections = subsets + [[unit for other in chunks if other is not chunk for unit in other]
+                                    for chunk in chunks]
+            found = self.first_failing(self.keep(program, units, selection)[0] for selection in selections)
+            if found is None:
+                if n >= len(units):
+                    break
+                n = min(len(units), n * 2)
+                continue
+            index = found[0]
+            program, units = self.keep(program, units, selections[index])
+            n = 2 if index < len(subsets) else max(n - 1, 2)
+            self.log(f"  ddmin: {self.instruction_count(program)} instructions")
+        return program
+
+    @staticmethod
+    def instruction_count(program: List[tuple]) -> int:
+        return sum(1 for kind, _ in program if kind == 'instr')
+
+    def blocks(self, program: List[tuple]) -> List[List[int]]:
+        """Instruction indices grouped into label-delimited blocks"""
+        groups, current = [], []
+        for index, (kind, _) in enumerate(program):
+            if kind == 'label':
+                if current:
+                    groups.append(current)
+                current = []
+            else:
+                current.append(index)
+        if current:
+            groups.append(current)
+        return groups
+
+    def simplifications(self, parts: tuple, registers: List[str]) -> List[tuple]:
+        """Smaller variants of one instruction: zeroed/halved immediates, simpler registers"""
+        variants = []
+        for position, operand in enumerate(parts[1:], 1):
+            match = OFFSET_PATTERN.fullmatch(operand)
+            number = match.group(1) if match else operand if NUMBER_PATTERN.match(operand) else None
+            if number is not None and parts[0] not in ['beq', 'j', 'jal']:
+                value = int(number, 0)
+                for smaller in dict.fromkeys([0, 1, value // 2]):
+                    if abs(smaller) < abs(value):
+                        text = str(smaller) + (match.group(2) if match else '')
+                        variants.append(parts[:position] + (text,) + parts[position + 1:])
+            if operand.startswith('$') and operand not in ['$zero', '$0']:
+                for simpler in registers:
+                    if simpler == operand:
+                        break
+                    variants.append(parts[:position] + (simpler,) + parts[position + 1:])
+            elif match and match.group(2) != '($zero)':
+                variants.append(parts[:position] + (f"{match.group(1)}($zero)",) + parts[position + 1:])
+        return variants
+
+    def simplify(self, program: List[tuple]) -> List[tuple]:
+        """Greedily apply the first failing single-instruction simplification until none applies"""
+        numbers = MIPSAssembler().registers
+        start, full_pass = 0, True
+        while True:
+            used = {operand for kind, value in program if kind == 'instr' for operand in value[1:]
+                    if operand in numbers}
+            registers = ['$zero'] + sorted(used - {'$zero', '$0'}, key=lambda r: numbers[r])
+            origins = []
+
+            def candidates():
+                for index in range(start, len(program)):
+                    kind, value = program[index]
+                    if kind != 'instr':
+                        continue
+                    variants = [] if value == ('nop',) else [('nop',)]
+                    for variant in variants + self.simplifications(value, registers):
+                        origins.append(index)
+                        yield program[:index] + [('instr', variant)] + program[index + 1:]
+
+            found = self.first_failing(candidates())
+            if found is not None:
+                program, start, full_pass = found[1], origins[found[0]], False
+            elif full_pass:
+                return program
+            else:
+                # A later change can enable an earlier one; finish with one full pass
+                start, full_pass = 0, True
+
+    def minimize(self, program: List[tuple]) -> List[tuple]:
+        if not self.first_failing([program]):
+            raise ValueError("The input program does not fail under the oracle")
+        self.log(f"Input: {self.instruction_count(program)} instructions")
+
+        previous = None
+        while previous != program:
+            previous = program
+            program = self.ddmin(program, self.blocks(program))
+            program = self.ddmin(program, [[i] for i, (kind, _) in enumerate(program) if kind == 'instr'])
+            candidate = drop_unused_labels(program)
+            if candidate != program and self.first_failing([candidate]):
+                program = candidate
+            program = self.simplify(program)
+            # nops left behind by simplification are removed by the next ddmin round
+        self.log(f"Result: {self.instruction_count(program)} instructions "
+                 f"({self.evaluations} evaluations)")
+        return program
+
+
+def load_input(path: str) -> List[tuple]:
+    with open(path, 'r') as f:
+        text = f.read()
+    if os.path.splitext(path)[1] == '.asm':
+        return parse_program(text)
+    processor = MIPSProcessor()
+    processor.load_instructions(text.splitlines())
+    return disassemble([word for _, word in processor.instructions])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delta-debugging minimizer for failing MIPS programs")
+    parser.add_argument('input', help=".asm source, or an instruction image (hex words)")
+    parser.add_argument('-o', '--output', help="minimized source (default: <input>.min.asm)")
+    parser.add_argument('--image', help="also write the minimized instruction image")
+    oracle = parser.add_mutually_exclusive_group(required=True)
+    oracle.add_argument('--command', help="failure oracle command, exit 0 = still failing")
+    oracle.add_argument('--model', action='store_true',
+                        help="oracle: MIPSProcessor and MulticycleDatapath disagree. The datapath "
+                             "reproduces the RTL's known deviations (stale ALUOut write-back for "
+                             "immediate and R-type instructions, JAL saves PC+8), so nearly every "
+                             "program fails under it")
+    parser.add_argument('--max-steps', type=int, default=10000, help="instruction limit for the model oracle")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="worker processes")
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.input)[0] + '.min.asm'
+    start = time.time()
+    try:
+        program = load_input(args.input)
+        with Minimizer(args.command, args.max_steps, args.jobs) as minimizer:
+            program = minimizer.minimize(program)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    source = render(program)
+    with open(output, 'w') as f:
+        f.write(source)
+    if args.image:
+        export_image(MIPSAssembler().assemble(source), args.image)
+    if args.command is None:
+        assembler = MIPSAssembler()
+        reason = model_disagreement(assembler.assemble(source), args.max_steps, assembler.data)
+        print(f"Mismatch: {reason}")
+    print(f"Minimized program written to: {output} ({time.time() - start:.1f}s)")
+    print(source, end='')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Persistent MIPS tool server
+Keeps the assembler, parsed design files and decoded programs warm between
+requests so that CI scripts do not pay interpreter startup per program.
+
+Protocol: one JSON-RPC 2.0 object per line, over stdin/stdout or a Unix socket.
+Methods: ping, assemble, load_image, run, analyze, shutdown
+Each cache keeps the most recently used --cache-size entries; a request naming
+an evicted image gets an "Unknown image" error and must assemble or load it again.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import socketserver
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from advanced_mips_verifier import MIPSProcessor, MIPSVerifier
+from mips_assembler import MIPSAssembler, instruction_cycles
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+
+DEFAULT_SOCKET = '/tmp/mips_server.sock'
+CACHE_ENTRIES = 256
+
+
+def parse_hex_image(text: str) -> List[int]:
+    """Words from Verilog memory assignments or $readmemh-style text"""
+    if "32'h" in text:
+        return [int(m, 16) for m in re.findall(r"32'h([0-9A-Fa-f]{8})", text)]
+    words = []
+    for line in text.splitlines():
+        for token in line.split('//')[0].split():
+            if not token.startswith('@'):
+                words.append(int(token, 16))
+    return words
+
+
+class RequestError(Exception):
+    """Error reported back to the client as a JSON-RPC error object"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+class LRUCache:
+    """At most `size` entries, evicting the least recently used one"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.entries = OrderedDict()
+
+    def get(self, key, default=None):
+        if key not in self.entries:
+            return default
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def __contains__(self, key) -> bool:
+        return key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class SimulationService:
+    """Request handlers plus the caches shared between requests"""
+
+    def __init__(self, base_path: str, cache_size: int = CACHE_ENTRIES):
+        self.base_path = base_path
+        self.assembler = MIPSAssembler()
+        self.optimizing_assembler = MIPSAssembler(optimize=True)
+        self.verifier = MIPSVerifier(base_path)
+        self.lock = threading.Lock()
+
+        self.sources = LRUCache(cache_size)    # path -> (mtime, text)
+        self.assembled = LRUCache(cache_size)  # source hash -> assemble result
+        self.images = LRUCache(cache_size)     # image id -> words, preloaded data, decoded program
+        self.design_index = None  # summary of src/*.v, rebuilt when files change
+        self.design_mtimes = {}
+        self.stopping = False
+
+        self.methods = {
+            'ping': self.ping,
+            'assemble': self.assemble,
+            'load_image': self.load_image,
+            'run': self.run,
+            'analyze': self.analyze,
+            'shutdown': self.shutdown,
+        }
+
+    def read_source(self, path: str) -> str:
+        """Read a file under the project root, reusing the cached text while its mtime is unchanged"""
+        root = os.path.realpath(self.base_path)
+        path = os.path.realpath(os.path.join(root, path))
+        if os.path.commonpath([root, path]) != root:
+            raise RequestError(INVALID_PARAMS, f"Path outside the project root: {path}")
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            raise RequestError(INVALID_PARAMS, f"File not found: {path}")
+        cached = self.sources.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(path, 'r') as f:
+            text = f.read()
+        self.sources.put(path, (mtime, text))
+        return text
+
+    def program_source(self, params: Dict) -> str:
+        if 'source' in params:
+            return params['source']
+        if 'path' in params:
+            return self.read_source(params['path'])
+        raise RequestError(INVALID_PARAMS, "Expected 'source' or 'path'")
+
+    def register_image(self, words: List[int], data: Optional[Dict[int, int]] = None) -> str:
+        """Store an instruction image (and its preloaded data) under its content hash"""
+        words = [w & 0xFFFFFFFF for w in words]
+        content = b''.join(w.to_bytes(4, 'big') for w in words)
+        if data:
+            content += b'data' + b''.join(a.to_bytes(4, 'big') + w.to_bytes(4, 'big')
+                                          for a, w in sorted(data.items()))
+        image_id = hashlib.sha1(content).hexdigest()[:16]
+        if self.images.get(image_id) is None:
+            self.images.put(image_id, {'words': words, 'data': dict(data or {}), 'decoded': None})
+        return image_id
+
+    def ping(self, params: Dict) -> Dict:
+        return {'pong': True, 'images': len(self.images), 'programs': len(self.assembled)}
+
+    def assembled_program(self, params: Dict) -> Dict:
+        """Assemble once per distinct source text and optimization level"""
+        source = self.program_source(params)
+        optimize = bool(params.get('optimize', False))
+        key = hashlib.sha1(f"{optimize}:{source}".encode()).hexdigest()
+        entry = self.assembled.get(key)
+        # The image may have been evicted on its own; assembling again registers it
+        if entry is None or entry['image'] not in self.images:
+            assembler = self.optimizing_assembler if optimize else self.assembler
+            try:
+                words = assembler.assemble(source)
+            except ValueError as e:
+                raise RequestError(SERVER_ERROR, str(e))
+            entry = {
+                'image': self.register_image(words, assembler.data),
+                'words': words,
+                'data': {f"{address:#x}": word for address, word in sorted(assembler.data.items())},
+                'labels': {k: v for k, v in assembler.labels.items() if not k.startswith('.L')},
+                'stats': dict(assembler.stats),
+                'source': source,
+                'optimize': optimize,
+            }
+            self.assembled.put(key, entry)
+        return entry
+
+    def assemble(self, params: Dict) -> Dict:
+        entry = self.assembled_program(params)
+        return {k: entry[k] for k in ['image', 'words', 'data', 'labels', 'stats']}
+
+    def load_image(self, params: Dict) -> Dict:
+        if 'words' in params:
+            words = [int(w, 16) if isinstance(w, str) else int(w) for w in params['words']]
+        elif 'hex' in params or 'path' in params:
+            text = params['hex'] if 'hex' in params else self.read_source(params['path'])
+            words = parse_hex_image(text)
+        else:
+            raise RequestError(INVALID_PARAMS, "Expected 'words', 'hex' or 'path'")
+        return {'image': self.register_image(words), 'count': len(words)}
+
+    def resolve_image(self, params: Dict) -> str:
+        if 'image' in params:
+            if params['image'] not in self.images:
+                raise RequestError(INVALID_PARAMS, f"Unknown image: {params['image']}")
+            return params['image']
+        return self.assembled_program(params)['image']
+
+    def run(self, params: Dict) -> Dict:
+        image_id = self.resolve_image(params)
+        image = self.images.get(image_id)
+        max_steps = int(params.get('max_steps', 1000))
+
+        processor = MIPSProcessor()
+        processor.load_program(image['words'])
+        processor.load_memory(image['data'])
+        if image['decoded'] is not None:
+            processor.decoded_program = image['decoded']
+        else:
+            image['decoded'] = processor.decode_program()
+        for reg, value in params.get('registers', {}).items():
+            processor.registers[int(reg)] = int(value) & 0xFFFFFFFF
+        for addr, value in params.get('memory', {}).items():
+            processor.memory[int(addr, 0) if isinstance(addr, str) else addr] = int(value) & 0xFFFFFFFF
+
+        # FSM cycles follow from the instruction mix, counted per executed type
+        program = processor.decoded_program
+        cycles = 0
+        steps = 0
+        halted = None
+        while halted is None:
+            pc = processor.pc
+            index = pc // 4
+            if index >= len(program) or index < 0:
+                halted = 'end'
+            elif steps >= max_steps:
+                break
+            else:
+                cycles += instruction_cycles(program[index][1].lower())
+                processor.step()
+                steps += 1
+                # A jump or branch to itself (j end, beq $zero, $zero, end) spins without
+                # changing any state, so the program is finished
+                if processor.pc == pc:
+                    halted = 'spin'
+
+        return {
+            'image': image_id,
+            'steps': steps,
+            'cycles': cycles,
+            'pc': processor.pc,
+            'halted': halted is not None,
+            'halt': halted,
+            'registers': processor.registers,
+            'memory': {str(addr): value for addr, value in sorted(processor.memory.items())},
+        }
+
+    def load_design(self) -> Dict:
+        """Index of the Verilog design, rebuilt only when a design file changes"""
+        mtimes = {}
+        for name in self.verifier_files():
+            path = os.path.join(self.base_path, name)
+            mtimes[name] = os.path.getmtime(path) if os.path.exists(path) else None
+        if self.design_index is not None and mtimes == self.design_mtimes:
+            return self.design_index
+
+        files = {name: self.read_source(name) for name, mtime in mtimes.items() if mtime is not None}
+        self.verifier.files = files
+        defines = files.get('src/definitions.vh', '')
+        self.design_index = {
+            'missing': [name for name, mtime in mtimes.items() if mtime is None],
+            'modules': {name: re.findall(r'^\s*module\s+(\w+)', text, re.MULTILINE)
+                        for name, text in files.items()},
+            'states': dict(re.findall(r"`define\s+STATE_(\w+)\s+3'b([01]+)", defines)),
+            'opcodes': dict(re.findall(r"`define\s+OPCODE_(\w+)\s+6'b([01]+)", defines)),
+            'functs': dict(re.findall(r"`define\s+FUNC_(\w+)\s+6'b([01]+)", defines)),
+            'test_program': len(self.verifier.extract_test_instructions()),
+        }
+        self.design_mtimes = mtimes
+        return self.design_index
+
+    def verifier_files(self) -> List[str]:
+        return ['src/MIPS_Multicycle.v', 'src/ControlUnit.v', 'src/ALU.v', 'src/RegisterFile.v',
+                'src/InstructionMemory.v', 'src/DataMemory.v', 'src/SignExtender.v', 'src/definitions.vh']
+
+    def analyze(self, params: Dict) -> Dict:
+        result = {'design': self.load_design()}
+        if 'source' in params or 'path' in params:
+            entry = self.assembled_program(params)
+            if 'analysis' not in entry:
+                assembler = self.optimizing_assembler if entry['optimize'] else self.assembler
+                assembler.assemble(entry['source'])
+                entry['analysis'] = {'cycles': assembler.estimate_cycles(),
+                                     'listing': assembler.generate_listing()}
+            result['image'] = entry['image']
+            result['cycles'] = entry['analysis']['cycles']
+            if params.get('listing'):
+                result['listing'] = entry['analysis']['listing']
+        return result
+
+    def shutdown(self, params: Dict) -> Dict:
+        self.stopping = True
+        return {'stopping': True}
+
+    def handle(self, line: str) -> Optional[str]:
+        """Process one request line and return the response line"""
+        request_id = None
+        try:
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise RequestError(PARSE_ERROR, f"Parse error: {e}")
+            if not isinstance(request, dict):
+                raise RequestError(INVALID_PARAMS, "Request must be an object")
+            request_id = request.get('id')
+            method = self.methods.get(request.get('method'))
+            if method is None:
+                raise RequestError(METHOD_NOT_FOUND, f"Unknown method: {request.get('method')}")
+            params = request.get('params') or {}
+            if not isinstance(params, dict):
+                raise RequestError(INVALID_PARAMS, "params must be an object")
+
+            start = time.perf_counter()
+            with self.lock:
+                result = method(params)
+            result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 3)
+            response = {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+        except RequestError as e:
+            response = {'jsonrpc': '2.0', 'id': request_id,
+                        'error': {'code': e.code, 'message': str(e)}}
+        except Exception as e:
+            response = {'jsonrpc': '2.0', 'id': request_id,
+                        'error': {'code': SERVER_ERROR, 'message': f"{type(e).__name__}: {e}"}}
+        return json.dumps(response)
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """Serve line-delimited requests on one client connection"""
+
+    def handle(self):
+        service = self.server.service
+        for raw in self.rfile:
+            line = raw.decode('utf-8').strip()
+            if not line:
+                continue
+            self.wfile.write((service.handle(line) + '\n').encode('utf-8'))
+            self.wfile.flush()
+            if service.stopping:
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                break
+
+
+class UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve_stdio(service: SimulationService):
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        print(service.handle(line), flush=True)
+        if service.stopping:
+            break
+
+
+def serve_socket(service: SimulationService, path: str):
+    if os.path.exists(path):
+        os.unlink(path)
+    with UnixServer(path, RequestHandler) as server:
+        server.service = service
+        print(f"MIPS server listening on {path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Persistent MIPS assembler/simulator server")
+    parser.add_argument('--socket', nargs='?', const=DEFAULT_SOCKET,
+                        help=f"listen on a Unix socket (default {DEFAULT_SOCKET}) instead of stdin")
+    parser.add_argument('--base', default=os.path.dirname(script_dir),
+                        help="project root used for relative paths")
+    parser.add_argument('--cache-size', type=int, default=CACHE_ENTRIES,
+                        help=f"entries kept per cache (default {CACHE_ENTRIES})")
+    args = parser.parse_args()
+
+    service = SimulationService(os.path.abspath(args.base), max(1, args.cache_size))
+    if args.socket:
+        serve_socket(service, args.socket)
+    else:
+        serve_stdio(service)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,497 @@
+#!/usr/bin/env python3
+"""
+Switching-activity and dynamic-power proxy for MIPS programs
+Runs MIPSProcessor and reconstructs the values on the main datapath buses
+(register file write port, ALU operands and result, DataMemory address and
+data) in the cycle the ControlUnit FSM drives them. Bit toggles are counted
+with a vectorized popcount per batch, functional-unit activity is counted per
+FSM state, and results are reported per PC region (code label). A SAIF-like
+file with per-bit toggle counts and high times can be exported.
+
+Buses are modelled as gated: a bus holds its value until the next cycle that
+uses it, so toggles reflect data-dependent switching rather than glitches.
+
+Usage: python3 power_estimator.py program.asm [--max-steps N] [--saif out.saif]
+"""
+
+import argparse
+import bisect
+import os
+import sys
+import time
+from array import array
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # Pure-Python popcount fallback
+    np = None
+
+from advanced_mips_verifier import MIPSProcessor
+from datapath_model import (ALU_CTRL, ALU_SRC_A, ALU_SRC_B, EXT_OP, INSTRUCTION_CLASSES, IR_WRITE,
+                            MEM_READ, MEM_WRITE, PC_WRITE, PC_WRITE_COND, REG_WRITE, STATE_DECODE,
+                            STATE_EXECUTE, STATE_FETCH, STATE_NAMES, alu, control_signals, next_state)
+from mips_assembler import MIPSAssembler
+
+MASK = 0xFFFFFFFF
+BATCH = 65536
+
+# Bus name (SAIF path below the cpu instance) and width
+BUSES = [('regfile/write_reg', 5), ('regfile/write_data', 32),
+         ('alu/a', 32), ('alu/b', 32), ('alu/result', 32),
+         ('dmem/address', 32), ('dmem/write_data', 32), ('dmem/read_data', 32)]
+
+UNITS = ['alu', 'regfile_read', 'regfile_write', 'dmem_read', 'dmem_write', 'ir_write', 'pc_write']
+NO_ALU = ['J', 'JAL', 'JR', 'OTHER']
+
+
+def class_states(cls: str) -> List[tuple]:
+    """(state, control signals) for every cycle an instruction class spends in the FSM"""
+    states = []
+    state = STATE_FETCH
+    while True:
+        states.append((state, control_signals(state, cls)))
+        state = next_state(state, cls)
+        if state == STATE_FETCH:
+            return states
+
+
+def unit_activity(cls: str) -> List[List[int]]:
+    """Active cycles per [FSM state][unit] for one execution of an instruction class"""
+    table = [[0] * len(UNITS) for _ in STATE_NAMES]
+    for state, s in class_states(cls):
+        row = table[state]
+        row[0] = int(state in [STATE_FETCH, STATE_DECODE] or (state == STATE_EXECUTE and cls not in NO_ALU))
+        row[1] = int(state == STATE_DECODE)
+        row[2] = s[REG_WRITE]
+        row[3] = s[MEM_READ]
+        row[4] = s[MEM_WRITE]
+        row[5] = s[IR_WRITE]
+        row[6] = s[PC_WRITE] | s[PC_WRITE_COND]
+    return table
+
+
+CLASS_CYCLES = [len(class_states(cls)) for cls in INSTRUCTION_CLASSES]
+CLASS_ACTIVITY = [unit_activity(cls) for cls in INSTRUCTION_CLASSES]
+
+
+def popcount(value: int) -> int:
+    return bin(value).count('1')
+
+
+class ToggleCounter:
+    """Toggle and high-time statistics of one bus, fed in batches of (value, cycle, region)"""
+
+    def __init__(self, name: str, width: int, regions: int):
+        self.name = name
+        self.width = width
+        self.events = 0
+        self.toggles = 0
+        self.bit_toggles = [0] * width
+        self.bit_high = [0] * width  # Cycles each bit spent at 1
+        self.region_toggles = [0] * regions
+        self.last_value = 0  # Reset value, held from cycle 0
+        self.last_cycle = 0
+
+    def add(self, values, cycles, regions):
+        if len(values) == 0:
+            return
+        if np is not None:
+            self._add_numpy(values, cycles, regions)
+        else:
+            self._add_python(values, cycles, regions)
+        self.events += len(values)
+
+    def _add_numpy(self, values, cycles, regions):
+        values = np.asarray(values, dtype=np.uint32)
+        cycles = np.asarray(cycles, dtype=np.int64)
+        previous = np.concatenate(([self.last_value], values[:-1])).astype(np.uint32)
+        changed = values ^ previous
+        counts = np.bitwise_count(changed) if hasattr(np, 'bitwise_count') else \
+            np.unpackbits(changed.view(np.uint8)).reshape(-1, 32).sum(axis=1)
+        self.toggles += int(counts.sum())
+        region_counts = np.bincount(regions, weights=counts, minlength=len(self.region_toggles))
+        for index, count in enumerate(region_counts.tolist()):
+            self.region_toggles[index] += int(count)
+
+        # Per-bit statistics from the little-endian bit matrix of each batch
+        bits = np.unpackbits(changed.view(np.uint8), bitorder='little').reshape(-1, 32)[:, :self.width]
+        for bit, count in enumerate(bits.sum(axis=0).tolist()):
+            self.bit_toggles[bit] += count
+        durations = np.diff(np.concatenate(([self.last_cycle], cycles)))
+        held = np.unpackbits(previous.view(np.uint8), bitorder='little').reshape(-1, 32)[:, :self.width]
+        for bit, high in enumerate((held * durations[:, None]).sum(axis=0).tolist()):
+            self.bit_high[bit] += high
+
+        self.last_value = int(values[-1])
+        self.last_cycle = int(cycles[-1])
+
+    def _add_python(self, values, cycles, regions):
+        last_value, last_cycle = self.last_value, self.last_cycle
+        bit_toggles, bit_high, region_toggles = self.bit_toggles, self.bit_high, self.region_toggles
+        for value, cycle, region in zip(values, cycles, regions):
+            changed = value ^ last_value
+            if changed:
+                count = popcount(changed)
+                self.toggles += count
+                region_toggles[region] += count
+            duration = cycle - last_cycle
+            for bit in range(self.width):
+                if changed >> bit & 1:
+                    bit_toggles[bit] += 1
+                if last_value >> bit & 1:
+                    bit_high[bit] += duration
+            last_value, last_cycle = value, cycle
+        self.last_value, self.last_cycle = last_value, last_cycle
+
+    def finish(self, total_cycles: int):
+        """Account for the final value being held until the end of the run"""
+        duration = total_cycles - self.last_cycle
+        for bit in range(self.width):
+            if self.last_value >> bit & 1:
+                self.bit_high[bit] += duration
+        self.last_cycle = total_cycles
+
+
+class ActivityEstimator:
+    """Runs a program and accumulates bus toggles and unit activity"""
+
+    def __init__(self, processor: MIPSProcessor, labels: Optional[Dict[str, int]] = None):
+        self.processor = processor
+        # PC regions: code labels (instruction index -> name), everything before the first is <start>
+        named = sorted((index, name) for name, index in (labels or {}).items() if not name.startswith('.L'))
+        self.region_starts = [0] + [index for index, _ in named if index > 0]
+        self.region_names = ['<start>'] + [name for index, name in named if index > 0]
+        if named and named[0][0] == 0:
+            self.region_names[0] = named[0][1]
+        regions = len(self.region_names)
+        self.counters = [ToggleCounter(name, width, regions) for name, width in BUSES]
+        self.class_counts = [0] * len(INSTRUCTION_CLASSES)
+        self.region_cycles = [0] * regions
+        self.region_instructions = [0] * regions
+        self.cycles = 0
+        self.instructions = 0
+        self.static_arrays = None
+
+    def static_table(self) -> List[tuple]:
+        """Per instruction: class, EXECUTE operand sources, destination, memory use and region"""
+        table = []
+        for index, (decoded, instr_type) in enumerate(self.processor.decode_program()):
+            cls = instr_type if instr_type in INSTRUCTION_CLASSES else 'OTHER'
+            s = control_signals(STATE_EXECUTE, cls)
+            imm = decoded['immediate']
+            imm_ext = (imm | 0xFFFF0000) if s[EXT_OP] and imm & 0x8000 else imm
+            decode_b = (((imm | 0xFFFF0000) if imm & 0x8000 else imm) << 2) & MASK
+            if cls in ['ADDU', 'SUBU', 'SLT']:
+                dest = decoded['rd']
+            elif cls in ['ADDI', 'ADDIU', 'ORI', 'LUI', 'LW']:
+                dest = decoded['rt']
+            elif cls == 'JAL':
+                dest = 31
+            else:
+                dest = -1
+            region = bisect.bisect_right(self.region_starts, index) - 1
+            table.append((INSTRUCTION_CLASSES.index(cls), cls not in NO_ALU, decoded['rs'], decoded['rt'],
+                          s[ALU_SRC_A], s[ALU_SRC_B], imm_ext, s[ALU_CTRL], dest,
+                          1 if cls == 'LW' else 2 if cls == 'SW' else 0, region, decode_b))
+        return table
+
+    def run(self, max_instructions: int = 100000) -> int:
+        processor = self.processor
+        static = self.static_table()
+        program = processor.decode_program()
+        registers = processor.registers
+        memory = processor.memory
+        execute = processor.execute_instruction
+        count = len(program)
+
+        columns = self.new_columns()
+        (add_index, add_a, add_b, add_r, add_wreg, add_wdata,
+         add_addr, add_mdata) = (columns[name].append for name in
+                                 ['index', 'a', 'b', 'r', 'wreg', 'wdata', 'addr', 'mdata'])
+        steps = 0
+        while steps < max_instructions:
+            pc = processor.pc
+            index = pc >> 2
+            if index >= count or pc < 0:
+                break
+            (cls_id, uses_alu, rs, rt, src_a, src_b, imm_ext, ctrl, dest, memory_op,
+             region, decode_b) = static[index]
+
+            a = b = result = address = mem_data = 0
+            if uses_alu:
+                a = registers[rs] if src_a == 1 else (pc + 4) & MASK
+                b = registers[rt] if src_b == 0 else imm_ext
+                result = alu(a, b, ctrl)
+                if memory_op == 2:
+                    address, mem_data = result, registers[rt]
+                elif memory_op == 1:
+                    address = result
+
+            decoded, instr_type = program[index]
+            if not execute(decoded, instr_type):
+                processor.pc += 4
+
+            if memory_op == 1:
+                mem_data = memory.get(address, 0)
+            add_index(index)
+            add_a(a)
+            add_b(b)
+            add_r(result)
+            add_wreg(dest if dest >= 0 else 0)
+            add_wdata(registers[dest] if dest >= 0 else 0)
+            add_addr(address)
+            add_mdata(mem_data)
+            steps += 1
+            if len(columns['index']) >= BATCH:
+                self.flush(columns, static)
+                for column in columns.values():
+                    del column[:]
+
+        self.flush(columns, static)
+        for counter in self.counters:
+            counter.finish(self.cycles)
+        processor.cycle_count += steps
+        return steps
+
+    @staticmethod
+    def new_columns() -> Dict[str, array]:
+        return {'index': array('I'), 'a': array('I'), 'b': array('I'), 'r': array('I'),
+                'wreg': array('I'), 'wdata': array('I'), 'addr': array('I'), 'mdata': array('I')}
+
+    def flush(self, columns: Dict[str, array], static: List[tuple]):
+        """Turn one batch of executed instructions into per-bus events"""
+        if len(columns['index']) == 0:
+            return
+        if np is not None:
+            self._flush_numpy(columns, static)
+        else:
+            self._flush_python(columns, static)
+
+    def _flush_numpy(self, columns: Dict[str, array], static: List[tuple]):
+        if self.static_arrays is None:
+            fields = list(zip(*static))
+            self.static_arrays = {
+                'cls': np.array(fields[0], dtype=np.int64), 'uses_alu': np.array(fields[1], dtype=bool),
+                'writes': np.array(fields[8], dtype=np.int64) >= 0, 'memory': np.array(fields[9], dtype=np.int8),
+                'region': np.array(fields[10], dtype=np.int64), 'decode_b': np.array(fields[11], dtype=np.uint32)}
+        table = self.static_arrays
+        column = {name: np.frombuffer(values, dtype=np.uint32) for name, values in columns.items()}
+        index = column['index']
+        cls = table['cls'][index]
+        regions = table['region'][index]
+        costs = np.array(CLASS_CYCLES, dtype=np.int64)[cls]
+        ends = np.cumsum(costs) + self.cycles
+        starts = ends - costs
+        self.cycles = int(ends[-1])
+        self.instructions += len(index)
+        for totals, values in [(self.class_counts, np.bincount(cls, minlength=len(self.class_counts))),
+                               (self.region_cycles, np.bincount(regions, weights=costs,
+                                                                minlength=len(self.region_cycles))),
+                               (self.region_instructions, np.bincount(regions,
+                                                                      minlength=len(self.region_cycles)))]:
+            for i, value in enumerate(values.tolist()):
+                totals[i] += int(value)
+
+        # ALU: FETCH computes PC+4, DECODE the branch target, EXECUTE the instruction's operation
+        pc = index << np.uint32(2)
+        pc4 = pc + np.uint32(4)
+        decode_b = table['decode_b'][index]
+        used = np.stack([np.ones_like(pc, dtype=bool), np.ones_like(pc, dtype=bool),
+                         table['uses_alu'][index]], axis=1)
+
+        def alu_events(fetch, decode, execute):
+            return np.stack([fetch, decode, execute], axis=1)[used]
+
+        alu_cycles = alu_events(starts, starts + 1, starts + 2)
+        alu_regions = alu_events(regions, regions, regions)
+
+        # Register writes: EXECUTE for ALU/JAL, WRITEBACK for LW
+        memory = table['memory'][index]
+        write = table['writes'][index]
+        write_cycles = (starts + np.where(memory == 1, 4, 2))[write]
+        memory_ops, stores, loads = memory != 0, memory == 2, memory == 1
+        feeds = [
+            (column['wreg'][write], write_cycles, regions[write]),
+            (column['wdata'][write], write_cycles, regions[write]),
+            (alu_events(pc, pc4, column['a']), alu_cycles, alu_regions),
+            (alu_events(np.full_like(pc, 4), decode_b, column['b']), alu_cycles, alu_regions),
+            (alu_events(pc4, pc4 + decode_b, column['r']), alu_cycles, alu_regions),
+            (column['addr'][memory_ops], starts[memory_ops] + 3, regions[memory_ops]),
+            (column['mdata'][stores], starts[stores] + 3, regions[stores]),
+            (column['mdata'][loads], starts[loads] + 3, regions[loads]),
+        ]
+        for counter, (values, cycles, event_regions) in zip(self.counters, feeds):
+            counter.add(values, cycles, event_regions)
+
+    def _flush_python(self, columns: Dict[str, array], static: List[tuple]):
+        n = len(columns['index'])
+        info = [static[index] for index in columns['index']]
+        cls = [entry[0] for entry in info]
+        regions = [entry[10] for entry in info]
+        costs = [CLASS_CYCLES[c] for c in cls]
+
+        starts, cycle = [], self.cycles
+        for cost in costs:
+            starts.append(cycle)
+            cycle += cost
+        self.cycles = cycle
+        self.instructions += n
+        for c, region, cost in zip(cls, regions, costs):
+            self.class_counts[c] += 1
+            self.region_cycles[region] += cost
+            self.region_instructions[region] += 1
+
+        # ALU: FETCH computes PC+4, DECODE the branch target, EXECUTE the instruction's operation
+        pcs = [index << 2 for index in columns['index']]
+        alu_a, alu_b, alu_r, alu_cycles, alu_regions = [], [], [], [], []
+        for k in range(n):
+            pc, start, region = pcs[k], starts[k], regions[k]
+            pc4 = (pc + 4) & MASK
+            alu_a += [pc, pc4]
+            alu_b += [4, info[k][11]]
+            alu_r += [pc4, (pc4 + info[k][11]) & MASK]
+            alu_cycles += [start, start + 1]
+            alu_regions += [region, region]
+            if info[k][1]:
+                alu_a.append(columns['a'][k])
+                alu_b.append(columns['b'][k])
+                alu_r.append(columns['r'][k])
+                alu_cycles.append(start + 2)
+                alu_regions.append(region)
+
+        # Register writes: EXECUTE for ALU/JAL, WRITEBACK for LW
+        write = [k for k in range(n) if info[k][8] >= 0]
+        write_cycles = [starts[k] + (4 if info[k][9] == 1 else 2) for k in write]
+        write_regions = [regions[k] for k in write]
+        memory_ops = [k for k in range(n) if info[k][9]]
+        stores = [k for k in memory_ops if info[k][9] == 2]
+        loads = [k for k in memory_ops if info[k][9] == 1]
+
+        def pick(name, rows):
+            column = columns[name]
+            return [column[k] for k in rows]
+
+        feeds = [
+            (pick('wreg', write), write_cycles, write_regions),
+            (pick('wdata', write), write_cycles, write_regions),
+            (alu_a, alu_cycles, alu_regions),
+            (alu_b, alu_cycles, alu_regions),
+            (alu_r, alu_cycles, alu_regions),
+            (pick('addr', memory_ops), [starts[k] + 3 for k in memory_ops], [regions[k] for k in memory_ops]),
+            (pick('mdata', stores), [starts[k] + 3 for k in stores], [regions[k] for k in stores]),
+            (pick('mdata', loads), [starts[k] + 3 for k in loads], [regions[k] for k in loads]),
+        ]
+        for counter, (values, cycles, event_regions) in zip(self.counters, feeds):
+            counter.add(values, cycles, event_regions)
+
+    def state_activity(self) -> List[List[int]]:
+        """Active cycles per [FSM state][unit] over the whole run"""
+        totals = [[0] * len(UNITS) for _ in STATE_NAMES]
+        for count, table in zip(self.class_counts, CLASS_ACTIVITY):
+            if count:
+                for state, row in enumerate(table):
+                    for unit, active in enumerate(row):
+                        totals[state][unit] += count * active
+        return totals
+
+    def total_toggles(self) -> int:
+        return sum(counter.toggles for counter in self.counters)
+
+    def region_toggles(self) -> List[int]:
+        return [sum(counter.region_toggles[i] for counter in self.counters)
+                for i in range(len(self.region_names))]
+
+
+def format_report(estimator: ActivityEstimator, name: str) -> str:
+    cycles = max(estimator.cycles, 1)
+    lines = [f"Switching activity: {name} ({estimator.instructions} instructions, {estimator.cycles} cycles)",
+             "", f"  {'Bus':<20} {'width':>5} {'events':>9} {'toggles':>10} {'/cycle':>8} {'activity':>9}"]
+    for counter in estimator.counters:
+        activity = counter.toggles / (counter.width * cycles)
+        lines.append(f"  {counter.name:<20} {counter.width:5d} {counter.events:9d} {counter.toggles:10d} "
+                     f"{counter.toggles / cycles:8.3f} {activity:9.4f}")
+    total = estimator.total_toggles()
+    lines.append(f"  {'total':<20} {'':5} {'':9} {total:10d} {total / cycles:8.3f}")
+
+    lines += ["", "  Unit activity per FSM state (active cycles)",
+              f"  {'unit':<14}" + ''.join(f"{state:>10}" for state in STATE_NAMES)]
+    activity = estimator.state_activity()
+    for unit_index, unit in enumerate(UNITS):
+        lines.append(f"  {unit:<14}" + ''.join(f"{activity[state][unit_index]:10d}"
+                                              for state in range(len(STATE_NAMES))))
+
+    lines += ["", f"  {'Region':<20} {'instr':>9} {'cycles':>9} {'toggles':>10} {'/cycle':>8} {'share':>7}"]
+    region_toggles = estimator.region_toggles()
+    ranked = sorted(range(len(estimator.region_names)), key=lambda i: -region_toggles[i])
+    for i in ranked:
+        if not estimator.region_instructions[i]:
+            continue
+        per_cycle = region_toggles[i] / max(estimator.region_cycles[i], 1)
+        share = region_toggles[i] / max(total, 1)
+        lines.append(f"  {estimator.region_names[i]:<20} {estimator.region_instructions[i]:9d} "
+                     f"{estimator.region_cycles[i]:9d} {region_toggles[i]:10d} {per_cycle:8.3f} {share:7.1%}")
+    lines += ["", f"Power proxy: {total / cycles:.3f} bus toggles per cycle"]
+    return '\n'.join(lines)
+
+
+def write_saif(estimator: ActivityEstimator, path: str, period_ns: int = 10):
+    """SAIF-style backward annotation: per-bit T0/T1/TC under MIPS_Multicycle_tb/cpu"""
+    duration = estimator.cycles * period_ns
+    lines = ['(SAIFILE', '(SAIFVERSION "2.0")', '(DIRECTION "backward")', '(DESIGN "MIPS_Multicycle")',
+             f'(DATE "{time.strftime("%a %b %d %H:%M:%S %Y")}")', '(VENDOR "MIPS_Processor_Project")',
+             '(PROGRAM_NAME "power_estimator.py")', '(VERSION "1.0")', '(DIVIDER / )',
+             '(TIMESCALE 1 ns)', f'(DURATION {duration})', '(INSTANCE MIPS_Multicycle_tb', '  (INSTANCE cpu']
+    instances = {}
+    for counter in estimator.counters:
+        instance, net = counter.name.split('/')
+        instances.setdefault(instance, []).append((net, counter))
+    for instance, nets in instances.items():
+        lines += [f'    (INSTANCE {instance}', '      (NET']
+        for net, counter in nets:
+            for bit in range(counter.width):
+                high = counter.bit_high[bit] * period_ns
+                lines.append(f'        ({net}\\[{bit}\\] (T0 {duration - high}) (T1 {high}) (TX 0) '
+                             f'(TC {counter.bit_toggles[bit]}) (IG 0))')
+        lines += ['      )', '    )']
+    lines += ['  )', ')', ')']
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Switching-activity and power-proxy estimation")
+    parser.add_argument('program', help=".asm source or instruction memory file")
+    parser.add_argument('--max-steps', type=int, default=100000)
+    parser.add_argument('--saif', help="write per-bit toggle rates in SAIF format")
+    args = parser.parse_args()
+
+    processor = MIPSProcessor()
+    labels = {}
+    try:
+        with open(args.program, 'r') as f:
+            text = f.read()
+        if os.path.splitext(args.program)[1] == '.asm':
+            assembler = MIPSAssembler()
+            processor.load_program(assembler.assemble(text))
+            processor.load_memory(assembler.data)
+            labels = assembler.labels
+        else:
+            processor.load_instructions(text.splitlines())
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    estimator = ActivityEstimator(processor, labels)
+    start = time.time()
+    estimator.run(args.max_steps)
+    print(format_report(estimator, args.program))
+    print(f"({time.time() - start:.2f}s, {'NumPy' if np is not None else 'pure Python'} popcount)")
+
+    if args.saif:
+        write_saif(estimator, args.saif)
+        print(f"SAIF written to: {args.saif}")
+
+
+if __name__ == "__main__":
+    main()
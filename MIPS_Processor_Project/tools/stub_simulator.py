@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the compiled batch testbench when no Verilog simulator is installed
+Accepts the plusargs of tests/MIPS_Multicycle_Batch_tb.v (+imem, +dmem,
++cycles, +dump), clocks a Python model for the requested cycles and writes the
+same state dump, so batch_runner.py can be exercised end to end.
+
+Models:
+  isa       MIPSProcessor advanced by the FSM cycle cost of each instruction
+            (default). This is the same computation batch_runner.py uses for
+            the expected state, so every program passes: a PASS only shows the
+            image, plusarg, dump and compare plumbing works, not the RTL
+  datapath  clock-accurate MulticycleDatapath, mirrors the RTL including its
+            known deviations from MIPSProcessor, so programs are expected to FAIL
+
+Usage: python3 stub_simulator.py [--model isa|datapath] +imem=F [+dmem=F] +cycles=N +dump=F
+"""
+
+import argparse
+import sys
+from typing import Dict, List
+
+from advanced_mips_verifier import MEMORY_WORDS, MIPSProcessor, WordMemory
+from batch_runner import format_dump
+from datapath_model import MulticycleDatapath
+from mips_assembler import DEFAULT_CYCLES, INSTRUCTION_CYCLES
+
+
+def read_memh(path: str) -> Dict[int, int]:
+    """Word index -> value from a $readmemh file"""
+    words = {}
+    index = 0
+    with open(path, 'r') as f:
+        for line in f:
+            for token in line.split('//')[0].split():
+                if token.startswith('@'):
+                    index = int(token[1:], 16)
+                else:
+                    words[index] = int(token, 16)
+                    index += 1
+    return words
+
+
+def run_datapath(program: List[int], data: Dict[int, int], cycles: int) -> tuple:
+    model = MulticycleDatapath(program, data)
+    for _ in range(cycles):
+        model.clock()
+    return model.pc, model.registers, dict(enumerate(model.dmem))
+
+
+def run_isa(program: List[int], data: Dict[int, int], cycles: int) -> tuple:
+    processor = MIPSProcessor(WordMemory())
+    processor.load_program(program)
+    processor.load_memory(data)
+    used = 0
+    while used < cycles:
+        executed = processor.step()
+        if executed is None:
+            break
+        used += INSTRUCTION_CYCLES.get(executed[2].lower(), DEFAULT_CYCLES)
+    return processor.pc, processor.registers, processor.memory.words()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Python stand-in for the batch testbench",
+                                     epilog="plusargs: +imem=F +dmem=F +cycles=N +dump=F")
+    parser.add_argument('--model', choices=['isa', 'datapath'], default='isa')
+    args, rest = parser.parse_known_args()
+
+    plusargs = {}
+    for arg in rest:
+        if not arg.startswith('+') or '=' not in arg:
+            parser.error(f"unexpected argument: {arg}")
+        name, value = arg[1:].split('=', 1)
+        plusargs[name] = value
+    if 'dump' not in plusargs:
+        print("Usage: +dump=<file> [+imem=<file>] [+dmem=<file>] [+cycles=N]")
+        sys.exit(1)
+    cycles = int(plusargs.get('cycles', 200))
+
+    try:
+        image = read_memh(plusargs['imem']) if 'imem' in plusargs else {}
+        program = [image.get(i, 0) for i in range(min(MEMORY_WORDS, max(image, default=-1) + 1))]
+        data = {index * 4: value for index, value in read_memh(plusargs['dmem']).items()} \
+            if 'dmem' in plusargs else {}
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    run = run_isa if args.model == 'isa' else run_datapath
+    pc, registers, dmem = run(program, data, cycles)
+    with open(plusargs['dump'], 'w') as f:
+        f.write(format_dump(cycles, pc, registers, dmem))
+    print(f"DONE: {cycles} cycles")
+
+
+if __name__ == "__main__":
+    main()
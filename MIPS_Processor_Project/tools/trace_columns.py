@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Columnar execution traces for the MIPS processor model
+Records one row per executed instruction into typed columns, saves them as
+an uncompressed .npz (one member per column) and memory-maps them on load.
+A small query API filters, groups and aggregates with vectorized NumPy.
+
+Usage:
+  python3 trace_columns.py export prog.asm -o trace.npz [--max-steps N]
+  python3 trace_columns.py query trace.npz [load|store|write|taken]
+                                  [name=value | name=lo:hi ...]
+                                  [--count-by column] [--show N]
+"""
+
+import argparse
+import os
+import struct
+import sys
+import zipfile
+from array import array
+from typing import Dict, Optional
+
+try:
+    import numpy as np
+except ImportError:  # Recording works without NumPy; export and queries need it
+    np = None
+
+from advanced_mips_verifier import MIPSProcessor
+from mips_assembler import MIPSAssembler, instruction_cycles
+
+# Column name, array typecode, NumPy dtype
+COLUMNS = [
+    ('cycle', 'Q', '<u8'),      # FSM cycle at which the instruction is fetched
+    ('pc', 'I', '<u4'),
+    ('opcode', 'B', 'u1'),
+    ('funct', 'B', 'u1'),
+    ('rs', 'B', 'u1'),
+    ('rt', 'B', 'u1'),
+    ('rd', 'B', 'u1'),
+    ('dest', 'B', 'u1'),        # Register written, NO_REGISTER if none
+    ('value', 'I', '<u4'),      # Value written to dest
+    ('mem_addr', 'I', '<u4'),
+    ('mem_value', 'I', '<u4'),  # Value loaded or stored
+    ('flags', 'B', 'u1'),
+]
+
+NO_REGISTER = 0xFF
+FLAG_REG_WRITE = 1
+FLAG_MEM_READ = 2
+FLAG_MEM_WRITE = 4
+FLAG_BRANCH_TAKEN = 8
+FLAG_NAMES = {'load': FLAG_MEM_READ, 'store': FLAG_MEM_WRITE,
+              'write': FLAG_REG_WRITE, 'taken': FLAG_BRANCH_TAKEN}
+
+# Columns that are only meaningful on rows with FLAG_MEM_READ or FLAG_MEM_WRITE
+MEMORY_COLUMNS = ['mem_addr', 'mem_value']
+
+TRACE_DTYPE = np.dtype([(name, dtype) for name, _, dtype in COLUMNS]) if np else None
+
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("NumPy is required for trace export and queries (pip install numpy)")
+
+
+class TraceRecorder:
+    """Runs MIPSProcessor and appends one row per instruction to typed columns"""
+
+    def __init__(self):
+        self.columns = {name: array(code) for name, code, _ in COLUMNS}
+        self.cycles = 0
+
+    def run(self, processor: MIPSProcessor, max_instructions: int = 100000) -> int:
+        program = processor.decode_program()
+        static = []
+        for decoded, instr_type in program:
+            if instr_type in ['ADDU', 'SUBU', 'SLT']:
+                dest = decoded['rd']
+            elif instr_type in ['ADDI', 'ADDIU', 'ORI', 'LUI', 'LW']:
+                dest = decoded['rt']
+            elif instr_type == 'JAL':
+                dest = 31
+            else:
+                dest = NO_REGISTER
+            memory = FLAG_MEM_READ if instr_type == 'LW' else FLAG_MEM_WRITE if instr_type == 'SW' else 0
+            static.append((decoded['opcode'], decoded['funct'], decoded['rs'], decoded['rt'],
+                           decoded['rd'], dest, memory, decoded['immediate_signed'],
+                           instr_type == 'BEQ', instruction_cycles(instr_type.lower())))
+
+        c = self.columns
+        add_cycle, add_pc = c['cycle'].append, c['pc'].append
+        add_opcode, add_funct = c['opcode'].append, c['funct'].append
+        add_rs, add_rt, add_rd = c['rs'].append, c['rt'].append, c['rd'].append
+        add_dest, add_value = c['dest'].append, c['value'].append
+        add_addr, add_mem = c['mem_addr'].append, c['mem_value'].append
+        add_flags = c['flags'].append
+        registers = processor.registers
+        memory_words = processor.memory
+        execute = processor.execute_instruction
+        count = len(program)
+        cycles = self.cycles
+        steps = 0
+
+        while steps < max_instructions:
+            pc = processor.pc
+            index = pc >> 2
+            if index >= count or pc < 0:
+                break
+            opcode, funct, rs, rt, rd, dest, memory, imm, is_branch, cost = static[index]
+            flags = memory
+            address = mem_value = 0
+            if memory:
+                address = (registers[rs] + imm) & 0xFFFFFFFF
+                if memory == FLAG_MEM_WRITE:
+                    mem_value = registers[rt]
+            elif is_branch and registers[rs] == registers[rt]:
+                flags |= FLAG_BRANCH_TAKEN
+
+            decoded, instr_type = program[index]
+            if not execute(decoded, instr_type):
+                processor.pc += 4
+
+            if dest != NO_REGISTER:
+                flags |= FLAG_REG_WRITE
+                value = registers[dest]
+                if memory == FLAG_MEM_READ:
+                    mem_value = memory_words.get(address, 0)
+            else:
+                value = 0
+
+            add_cycle(cycles)
+            add_pc(pc)
+            add_opcode(opcode)
+            add_funct(funct)
+            add_rs(rs)
+            add_rt(rt)
+            add_rd(rd)
+            add_dest(dest)
+            add_value(value)
+            add_addr(address)
+            add_mem(mem_value)
+            add_flags(flags)
+            cycles += cost
+            steps += 1
+
+        processor.cycle_count += steps
+        self.cycles = cycles
+        return steps
+
+    def table(self) -> 'TraceTable':
+        """Zero-copy NumPy view of the recorded columns"""
+        require_numpy()
+        return TraceTable({name: np.frombuffer(self.columns[name], dtype=dtype)
+                           for name, _, dtype in COLUMNS})
+
+    def save(self, path: str):
+        self.table().save(path)
+
+
+class TraceTable:
+    """Equal-length NumPy columns with filter and aggregate helpers"""
+
+    def __init__(self, columns: Dict[str, 'np.ndarray']):
+        require_numpy()
+        self.columns = columns
+        lengths = {len(column) for column in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("Trace columns have different lengths")
+        self.rows = lengths.pop() if lengths else 0
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, name: str):
+        return self.columns[name]
+
+    def save(self, path: str):
+        """Uncompressed .npz so that every column can be memory-mapped"""
+        np.savez(path, **self.columns)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'TraceTable':
+        """Load a trace; stored members are memory-mapped in place"""
+        require_numpy()
+        if not mmap:
+            with np.load(path) as data:
+                return cls({name: data[name] for name in data.files})
+
+        columns = {}
+        with zipfile.ZipFile(path) as archive, open(path, 'rb') as f:
+            for info in archive.infolist():
+                name = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+                if info.compress_type != zipfile.ZIP_STORED:
+                    columns[name] = np.load(archive.open(info))
+                    continue
+                # Skip the local file header to reach the .npy payload
+                f.seek(info.header_offset)
+                header = f.read(30)
+                name_length, extra_length = struct.unpack('<HH', header[26:30])
+                f.seek(info.header_offset + 30 + name_length + extra_length)
+                version = np.lib.format.read_magic(f)
+                if version == (1, 0):
+                    shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+                else:
+                    shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+                if shape[0] == 0:
+                    columns[name] = np.zeros(shape, dtype=dtype)
+                else:
+                    columns[name] = np.memmap(path, dtype=dtype, mode='r', offset=f.tell(),
+                                              shape=shape, order='F' if fortran else 'C')
+        return cls(columns)
+
+    def records(self) -> 'np.ndarray':
+        """The trace as a structured array with TRACE_DTYPE rows"""
+        result = np.empty(self.rows, dtype=TRACE_DTYPE)
+        for name in TRACE_DTYPE.names:
+            result[name] = self.columns[name]
+        return result
+
+    def query(self) -> 'TraceQuery':
+        return TraceQuery(self)
+
+    def where(self, **conditions) -> 'TraceQuery':
+        return TraceQuery(self).where(**conditions)
+
+
+class TraceQuery:
+    """A boolean row mask over a TraceTable, combined lazily until aggregated"""
+
+    def __init__(self, table: TraceTable, mask=None):
+        self.table = table
+        self.mask = mask
+
+    def _and(self, condition) -> 'TraceQuery':
+        mask = condition if self.mask is None else self.mask & condition
+        return TraceQuery(self.table, mask)
+
+    def where(self, **conditions) -> 'TraceQuery':
+        """Filter rows: value for equality, (lo, hi) for lo <= x < hi (None = open),
+        a list/set for membership, or a callable taking the column.
+        Conditions on mem_addr/mem_value only match rows that access memory"""
+        query = self
+        for name, condition in conditions.items():
+            if name not in self.table.columns:
+                raise ValueError(f"Unknown trace column: {name} "
+                                 f"(columns: {', '.join(self.table.columns)})")
+            column = self.table[name]
+            if callable(condition):
+                mask = condition(column)
+            elif isinstance(condition, tuple):
+                lo, hi = condition
+                mask = np.ones(len(column), dtype=bool)
+                if lo is not None:
+                    mask &= column >= lo
+                if hi is not None:
+                    mask &= column < hi
+            elif isinstance(condition, (list, set, frozenset)):
+                mask = np.isin(column, list(condition))
+            else:
+                mask = column == condition
+            if name in MEMORY_COLUMNS:
+                mask = mask & ((self.table['flags'] & (FLAG_MEM_READ | FLAG_MEM_WRITE)) != 0)
+            query = query._and(mask)
+        return query
+
+    def flagged(self, flag: int) -> 'TraceQuery':
+        return self._and((self.table['flags'] & flag) != 0)
+
+    def stores(self) -> 'TraceQuery':
+        return self.flagged(FLAG_MEM_WRITE)
+
+    def loads(self) -> 'TraceQuery':
+        return self.flagged(FLAG_MEM_READ)
+
+    def writes(self) -> 'TraceQuery':
+        return self.flagged(FLAG_REG_WRITE)
+
+    def column(self, name: str) -> 'np.ndarray':
+        column = self.table[name]
+        return np.asarray(column) if self.mask is None else column[self.mask]
+
+    def count(self) -> int:
+        return len(self.table) if self.mask is None else int(np.count_nonzero(self.mask))
+
+    def rows(self, limit: Optional[int] = None) -> 'np.ndarray':
+        """Matching rows as a structured array"""
+        indices = np.arange(len(self.table)) if self.mask is None else np.flatnonzero(self.mask)
+        if limit is not None:
+            indices = indices[:limit]
+        result = np.empty(len(indices), dtype=TRACE_DTYPE)
+        for name in TRACE_DTYPE.names:
+            result[name] = self.table[name][indices]
+        return result
+
+    def count_by(self, key: str) -> Dict[int, int]:
+        """Number of matching rows per distinct key value"""
+        keys, counts = np.unique(self.column(key), return_counts=True)
+        return dict(zip(keys.tolist(), counts.tolist()))
+
+    def aggregate(self, key: str, value: str, func: str = 'sum') -> Dict[int, float]:
+        """Per-key sum, min, max, mean or count of a value column"""
+        keys, inverse = np.unique(self.column(key), return_inverse=True)
+        values = self.column(value)
+        if func == 'count':
+            result = np.bincount(inverse, minlength=len(keys))
+        elif func in ['sum', 'mean']:
+            result = np.bincount(inverse, weights=values.astype(np.float64), minlength=len(keys))
+            if func == 'mean':
+                result = result / np.maximum(np.bincount(inverse, minlength=len(keys)), 1)
+        elif func in ['min', 'max']:
+            ufunc = np.minimum if func == 'min' else np.maximum
+            result = np.full(len(keys), values.max() if func == 'min' else values.min(),
+                             dtype=values.dtype) if len(values) else np.zeros(0, dtype=values.dtype)
+            ufunc.at(result, inverse, values)
+        else:
+            raise ValueError(f"Unknown aggregate: {func}")
+        return dict(zip(keys.tolist(), result.tolist()))
+
+    def per_pc(self) -> Dict[int, int]:
+        return self.count_by('pc')
+
+    def write_frequency(self) -> Dict[int, int]:
+        """How often each register is written"""
+        return self.writes().count_by('dest')
+
+
+def parse_condition(text: str):
+    """'name=value' or 'name=lo:hi' (either side may be empty)"""
+    name, separator, value = text.partition('=')
+    if not separator:
+        raise ValueError(f"Bad condition: {text} (expected name=value, name=lo:hi "
+                         f"or one of {', '.join(FLAG_NAMES)})")
+    if ':' in value:
+        lo, _, hi = value.partition(':')
+        return name, (int(lo, 0) if lo else None, int(hi, 0) if hi else None)
+    return name, int(value, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar MIPS execution traces")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = sub.add_parser('export', help="run a program and save its trace")
+    export_parser.add_argument('program')
+    export_parser.add_argument('-o', '--output', default='trace.npz')
+    export_parser.add_argument('--max-steps', type=int, default=100000)
+
+    query_parser = sub.add_parser('query', help="filter and aggregate a saved trace")
+    query_parser.add_argument('trace')
+    query_parser.add_argument('conditions', nargs='*', help="name=value, name=lo:hi, or a flag: " + ', '.join(FLAG_NAMES))
+    query_parser.add_argument('--count-by', help="count matching rows per column value")
+    query_parser.add_argument('--show', type=int, default=0, help="print the first N rows")
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'export':
+            processor = MIPSProcessor()
+            with open(args.program, 'r') as f:
+                text = f.read()
+            if os.path.splitext(args.program)[1] == '.asm':
+                assembler = MIPSAssembler()
+                processor.load_program(assembler.assemble(text))
+                processor.load_memory(assembler.data)
+            else:
+                processor.load_instructions(text.splitlines())
+            recorder = TraceRecorder()
+            steps = recorder.run(processor, args.max_steps)
+            recorder.save(args.output)
+            print(f"{steps} rows ({recorder.cycles} cycles) written to: {args.output}")
+        else:
+            table = TraceTable.load(args.trace)
+            query = table.query()
+            for flag in [c for c in args.conditions if c in FLAG_NAMES]:
+                query = query.flagged(FLAG_NAMES[flag])
+            query = query.where(**dict(parse_condition(c) for c in args.conditions if c not in FLAG_NAMES))
+            print(f"{query.count()} of {len(table)} rows match")
+            if args.count_by:
+                for key, count in sorted(query.count_by(args.count_by).items()):
+                    print(f"  {args.count_by}={key:#x}: {count}")
+            for row in query.rows(args.show) if args.show else []:
+                print("  " + ' '.join(f"{name}={row[name]:#x}" for name in TRACE_DTYPE.names))
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()